@@ -0,0 +1,119 @@
+"""Benchmark del normalizador: tiempo y precisión de OCR antes y después.
+
+Uso (desde src/server):
+    python -m benchmarks.bench_normalizador benchmarks/muestras --esperado benchmarks/esperado_muestras.json
+
+`esperado.json` es opcional y mapea nombre de archivo -> lista de textos que
+deberían aparecer en el OCR (números de cédula, nombres...). Sin él solo se
+reportan tiempos, tamaños y longitud del texto.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import time
+import tracemalloc
+
+import pytesseract
+from PIL import Image
+
+from utils.file_normalizer import normalizar_imagen
+from validators.cedula_validator import normalize_text
+
+EXTENSIONES = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".webp")
+
+
+def _precision(texto: str, esperados: list[str]) -> float | None:
+    if not esperados:
+        return None
+    plano = normalize_text(texto).replace(" ", "")
+    encontrados = [e for e in esperados if normalize_text(e).replace(" ", "") in plano]
+    return len(encontrados) / len(esperados)
+
+
+def _medir(preparar, datos: bytes, lang: str, repeticiones: int) -> dict:
+    tiempos_prep, tiempos_ocr = [], []
+    pico = pico_prep = 0
+    texto = ""
+    for _ in range(repeticiones):
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        img = preparar(datos)
+        t1 = time.perf_counter()
+        # Pico de la preparación sola (binarización incluida), antes del OCR
+        pico_prep = max(pico_prep, tracemalloc.get_traced_memory()[1])
+        texto = pytesseract.image_to_string(img, lang=lang)
+        t2 = time.perf_counter()
+        pico = max(pico, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        tiempos_prep.append(t1 - t0)
+        tiempos_ocr.append(t2 - t1)
+    return {
+        "pixeles": img.width * img.height,
+        "preparacionSeg": min(tiempos_prep),
+        "ocrSeg": min(tiempos_ocr),
+        "totalSeg": min(tiempos_prep) + min(tiempos_ocr),
+        "picoMemoriaPythonMB": round(pico / 1e6, 2),
+        "picoMemoriaPreparacionMB": round(pico_prep / 1e6, 2),
+        "longitudTexto": len(texto),
+        "texto": texto,
+    }
+
+
+def _original(datos: bytes) -> Image.Image:
+    img = Image.open(io.BytesIO(datos))
+    img.load()
+    return img
+
+
+def _normalizada(datos: bytes) -> Image.Image:
+    return normalizar_imagen(datos)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directorio", nargs="?", default="benchmarks/muestras")
+    parser.add_argument("--esperado", help="JSON archivo -> textos esperados")
+    parser.add_argument("--salida", help="Guardar el resultado en este JSON")
+    parser.add_argument("--lang", default="spa")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    esperado = {}
+    if args.esperado:
+        with open(args.esperado, encoding="utf-8") as f:
+            esperado = json.load(f)
+
+    archivos = sorted(
+        p for p in glob.glob(os.path.join(args.directorio, "*"))
+        if p.lower().endswith(EXTENSIONES)
+    )
+    resultados = []
+    for ruta in archivos:
+        nombre = os.path.basename(ruta)
+        with open(ruta, "rb") as f:
+            datos = f.read()
+
+        fila = {"archivo": nombre}
+        for etiqueta, preparar in (("antes", _original), ("despues", _normalizada)):
+            medida = _medir(preparar, datos, args.lang, args.repeticiones)
+            medida["precision"] = _precision(medida.pop("texto"), esperado.get(nombre, []))
+            fila[etiqueta] = medida
+        fila["aceleracion"] = fila["antes"]["totalSeg"] / max(fila["despues"]["totalSeg"], 1e-9)
+        resultados.append(fila)
+
+        print(
+            f"{nombre:30s} OCR {fila['antes']['totalSeg']:.2f}s -> {fila['despues']['totalSeg']:.2f}s "
+            f"(x{fila['aceleracion']:.1f})  px {fila['antes']['pixeles']} -> {fila['despues']['pixeles']}  "
+            f"precisión {fila['antes']['precision']} -> {fila['despues']['precision']}  "
+            f"memoria preparación {fila['despues']['picoMemoriaPreparacionMB']}MB"
+        )
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
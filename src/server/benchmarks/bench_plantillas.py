@@ -0,0 +1,85 @@
+"""Precisión de cada plantilla de regiones sobre su muestra.
+
+Lee las regiones de utils.plantillas en la muestra de cada tipo (a
+resolución completa y reducidas a OCR_LADO_RAPIDO, como en el nivel rápido)
+y cuenta cuántos de los textos esperados aparecen. Una plantilla que no
+encuentra todos sus campos hace que los validadores suban de nivel y lean
+más que sin ella, así que el benchmark sale con código 1.
+
+Uso (desde src/server):
+    python -m benchmarks.bench_plantillas
+    python -m benchmarks.bench_plantillas --esperado benchmarks/esperado_plantillas.json --minimo 1.0
+
+`esperado_plantillas.json` mapea tipo de plantilla -> {"archivo", "esperado"}.
+"""
+import argparse
+import json
+import os
+import sys
+
+# Se mide el OCR real de las regiones, sin cache
+os.environ["OCR_CACHE"] = "0"
+
+from utils.niveles import OCR_LADO_RAPIDO  # noqa: E402
+from utils.ocr import Fuente  # noqa: E402
+from utils.plantillas import PLANTILLAS, leer_regiones, texto_regiones  # noqa: E402
+from validators.cedula_validator import normalize_text  # noqa: E402
+
+
+def _precision(texto: str, esperados: list[str]) -> float:
+    plano = normalize_text(texto).replace(" ", "")
+    return sum(normalize_text(e).replace(" ", "") in plano for e in esperados) / len(esperados)
+
+
+def medir_plantilla(tipo: str, datos: bytes, esperados: list[str]) -> dict:
+    resultado = {}
+    for nombre, lado_maximo in (("completa", None), ("rapida", OCR_LADO_RAPIDO)):
+        regiones = leer_regiones(Fuente(datos), tipo, lado_maximo=lado_maximo) or {}
+        resultado[nombre] = {
+            "precision": _precision(texto_regiones(regiones), esperados),
+            "regiones": regiones,
+        }
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--esperado", default="benchmarks/esperado_plantillas.json")
+    parser.add_argument("--directorio", default="benchmarks/muestras")
+    parser.add_argument("--minimo", type=float, default=1.0, help="Precisión mínima de cada plantilla")
+    parser.add_argument("--salida", help="Guardar el resultado en este JSON")
+    args = parser.parse_args()
+
+    with open(args.esperado, encoding="utf-8") as f:
+        esperado = json.load(f)
+
+    resultado, fallas = {}, []
+    for tipo in PLANTILLAS:
+        caso = esperado.get(tipo)
+        if caso is None:
+            fallas.append(f"{tipo}: sin muestra en {args.esperado}")
+            continue
+        with open(os.path.join(args.directorio, caso["archivo"]), "rb") as f:
+            medicion = medir_plantilla(tipo, f.read(), caso["esperado"])
+        resultado[tipo] = medicion
+        print(
+            f"{tipo:10s} {caso['archivo']:20s} "
+            f"completa {medicion['completa']['precision']:.2f}  rápida {medicion['rapida']['precision']:.2f}"
+        )
+        for nombre, medida in medicion.items():
+            if medida["precision"] < args.minimo:
+                fallas.append(f"{tipo} ({nombre}): precisión {medida['precision']:.2f} < {args.minimo:.2f}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    for falla in fallas:
+        print(f"❌ Plantilla: {falla}")
+    if fallas:
+        sys.exit(1)
+    print("✅ Todas las plantillas leen sus campos")
+
+
+if __name__ == "__main__":
+    main()
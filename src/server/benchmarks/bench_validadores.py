@@ -0,0 +1,218 @@
+"""Benchmark de los validadores sobre documentos sintéticos.
+
+Mide por etapa (decodificación, normalización, OCR, coincidencia) cada
+validador y el endpoint /validar completo, guarda el resultado en JSON y
+compara contra una referencia para detectar regresiones.
+
+Uso (desde src/server):
+    python -m benchmarks.bench_validadores --salida bench.json
+    python -m benchmarks.bench_validadores --referencia bench.json --tolerancia 0.2
+
+Sale con código 1 si alguna latencia empeora más que --tolerancia (relativa)
+o alguna precisión baja más que --tolerancia-precision (absoluta).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+# El benchmark mide el trabajo real: sin cache y con el pool en hilos
+os.environ["OCR_CACHE"] = "0"
+os.environ.setdefault("OCR_EJECUTOR", "hilos")
+
+from benchmarks.sinteticos import CONDUCTOR, PLANTILLAS, VARIANTES, generar  # noqa: E402
+from utils.ocr import Fuente  # noqa: E402
+from utils.ocr_backend import BackendOCR, obtener_backend, usar_backend  # noqa: E402
+from validators.arl_validator import validar_arl  # noqa: E402
+from validators.cedula_validator import validar_cedula  # noqa: E402
+from validators.eps_validator import validar_eps  # noqa: E402
+from validators.formato_validator import validar_formato_transportador  # noqa: E402
+from validators.pension_validator import validar_documento_pension  # noqa: E402
+
+D = CONDUCTOR
+
+# tipo -> (llamada al validador, verificaciones que deberían dar True)
+VALIDADORES = {
+    "cedula": (
+        lambda f: validar_cedula(f, D["cedula"], D["nombreConductor"]),
+        lambda r: [r["coincidencias"]["cedula"], r["coincidencias"]["nombre"]],
+    ),
+    "eps": (
+        lambda f: validar_eps(f, D["nombreConductor"], D["cedula"]),
+        lambda r: [r["nombreEncontrado"], r["cedulaEncontrada"], r["fechaValida"]],
+    ),
+    "arl": (
+        lambda f: validar_arl(f, D["nombreConductor"], D["cedula"]),
+        lambda r: [r["nombreEncontrado"], r["cedulaEncontrada"], r["fechaValida"], r["cumpleRiesgo"]],
+    ),
+    "pension": (
+        lambda f: validar_documento_pension(f, D["nombreConductor"], D["cedula"]),
+        lambda r: [r["nombreEncontrado"], r["cedulaEncontrada"], r["fechaValida"]],
+    ),
+    "proteccion": (
+        lambda f: validar_documento_pension(f, D["nombreConductor"], D["cedula"]),
+        lambda r: [r["nombreEncontrado"], r["cedulaEncontrada"], r["fechaValida"], r.get("esDocumentoProteccion", False)],
+    ),
+    "formato": (
+        lambda f: validar_formato_transportador(
+            f, D["codigoTransportador"], D["nombreTransportador"], D["cedula"], D["nombreConductor"]
+        ),
+        lambda r: [
+            r["codigoTransportador"]["coincide"],
+            r["conductor"]["cedula"]["coincide"],
+            r["conductor"]["nombre"]["coincide"],
+        ],
+    ),
+}
+
+
+class BackendGrabador(BackendOCR):
+    """Envuelve el backend real: mide el tiempo de OCR y permite repetir sin OCR."""
+
+    nombre = "grabador"
+
+    def __init__(self, real: BackendOCR):
+        self.real = real
+        self.grabado = {}
+        self.reproducir = False
+        self.tiempo = 0.0
+
+    def _llamar(self, tipo, imagen, lang, config):
+        # El tamaño distingue las regiones de una plantilla que comparten config
+        clave = (tipo, lang, config, imagen.size)
+        if self.reproducir:
+            return self.grabado[clave]
+        inicio = time.perf_counter()
+        valor = getattr(self.real, tipo)(imagen, lang, config)
+        self.tiempo += time.perf_counter() - inicio
+        self.grabado[clave] = valor
+        return valor
+
+    def texto(self, imagen, lang="spa", config=""):
+        return self._llamar("texto", imagen, lang, config)
+
+    def datos(self, imagen, lang="spa", config=""):
+        return self._llamar("datos", imagen, lang, config)
+
+
+def _cronometrar(fn):
+    inicio = time.perf_counter()
+    valor = fn()
+    return valor, time.perf_counter() - inicio
+
+
+def medir_caso(tipo: str, datos: bytes, real: BackendOCR) -> dict:
+    validar, verificar = VALIDADORES[tipo]
+    fuente = Fuente(datos)
+    _, t_decodificacion = _cronometrar(lambda: fuente.imagen)
+    _, t_normalizacion = _cronometrar(lambda: fuente.normalizada)
+
+    grabador = BackendGrabador(real)
+    usar_backend(grabador)
+    try:
+        resultado, t_primera = _cronometrar(lambda: validar(fuente))
+        grabador.reproducir = True
+        _, t_coincidencia = _cronometrar(lambda: validar(fuente))
+    finally:
+        usar_backend(real)
+
+    verificaciones = [bool(v) for v in verificar(resultado)]
+    etapas = {
+        "decodificacion": t_decodificacion,
+        "normalizacion": t_normalizacion,
+        "ocr": grabador.tiempo,
+        "coincidencia": t_coincidencia,
+    }
+    return {
+        "etapas": etapas,
+        "total": sum(etapas.values()),
+        "precision": sum(verificaciones) / len(verificaciones),
+        "verificaciones": verificaciones,
+        # Nivel de OCR que resolvió el documento (rapido, regiones o pagina)
+        "nivel": resultado.get("nivelOCR") or resultado.get("metricas", {}).get("nivelOCR"),
+    }
+
+
+def medir_endpoint(repeticiones: int) -> dict:
+    from fastapi.testclient import TestClient
+    from benchmarks.sinteticos import a_jpeg
+    import main
+
+    archivos = {}
+    for tipo in ("formato", "cedula", "eps", "arl", "pension"):
+        plantilla, campo = PLANTILLAS[tipo]
+        archivos[campo] = (f"{tipo}.jpg", a_jpeg(plantilla()), "image/jpeg")
+    formulario = {k: D[k] for k in ("codigoTransportador", "nombreTransportador", "cedula", "nombreConductor")}
+
+    tiempos = []
+    with TestClient(main.app) as cliente:
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            respuesta = cliente.post("/validar", files=archivos, data=formulario)
+            tiempos.append(time.perf_counter() - inicio)
+            respuesta.raise_for_status()
+    return {"mediana": statistics.median(tiempos), "minimo": min(tiempos), "repeticiones": repeticiones}
+
+
+def comparar(actual: dict, referencia: dict, tolerancia: float, tolerancia_precision: float) -> list[str]:
+    regresiones = []
+    for clave, caso in actual["casos"].items():
+        ref = referencia.get("casos", {}).get(clave)
+        if not ref:
+            continue
+        if caso["total"] > ref["total"] * (1 + tolerancia):
+            regresiones.append(f"{clave}: latencia {ref['total']:.3f}s -> {caso['total']:.3f}s")
+        if caso["precision"] < ref["precision"] - tolerancia_precision:
+            regresiones.append(f"{clave}: precisión {ref['precision']:.2f} -> {caso['precision']:.2f}")
+    ref_endpoint = referencia.get("endpoint")
+    if ref_endpoint and actual.get("endpoint"):
+        if actual["endpoint"]["mediana"] > ref_endpoint["mediana"] * (1 + tolerancia):
+            regresiones.append(
+                f"/validar: latencia {ref_endpoint['mediana']:.3f}s -> {actual['endpoint']['mediana']:.3f}s"
+            )
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tipos", default=",".join(PLANTILLAS), help="Tipos separados por coma")
+    parser.add_argument("--variantes", default=",".join(VARIANTES))
+    parser.add_argument("--repeticiones-endpoint", type=int, default=3)
+    parser.add_argument("--sin-endpoint", action="store_true")
+    parser.add_argument("--salida", help="Guardar el resultado en este JSON")
+    parser.add_argument("--referencia", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento relativo de latencia permitido")
+    parser.add_argument("--tolerancia-precision", type=float, default=0.0)
+    args = parser.parse_args()
+
+    real = obtener_backend()
+    resultado = {"backend": real.nombre, "casos": {}}
+    for tipo, variante, datos in generar(args.tipos.split(","), args.variantes.split(",")):
+        caso = medir_caso(tipo, datos, real)
+        resultado["casos"][f"{tipo}/{variante}"] = caso
+        etapas = "  ".join(f"{k} {v * 1000:7.1f}ms" for k, v in caso["etapas"].items())
+        print(f"{tipo:10s} {variante:10s} {etapas}  precisión {caso['precision']:.2f}  nivel {caso['nivel']}")
+
+    if not args.sin_endpoint:
+        resultado["endpoint"] = medir_endpoint(args.repeticiones_endpoint)
+        print(f"/validar (5 documentos) mediana {resultado['endpoint']['mediana']:.3f}s")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    if args.referencia:
+        with open(args.referencia, encoding="utf-8") as f:
+            referencia = json.load(f)
+        regresiones = comparar(resultado, referencia, args.tolerancia, args.tolerancia_precision)
+        for r in regresiones:
+            print(f"❌ Regresión: {r}")
+        if regresiones:
+            sys.exit(1)
+        print("✅ Sin regresiones respecto a la referencia")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+"""Prueba de carga de /validar con envíos concurrentes del formulario.
+
+Levanta la app en el mismo proceso (httpx + ASGITransport, con el lifespan
+y el pool de OCR de verdad) o le pega a un servidor ya corriendo con --url.
+Con --backend falso el OCR lo reemplaza benchmarks.ocr_falso: texto fijo
+tras --demora-ms, así se mide el pipeline de peticiones aparte del costo
+de tesseract.
+
+Reporta throughput (peticiones y documentos por segundo), latencia p50,
+p90, p99 y máxima, errores, retraso del event loop, memoria (RSS del
+proceso y de sus workers) y el promedio de cada etapa del Server-Timing.
+
+Uso (desde src/server):
+    python -m benchmarks.carga --concurrencia 16 --peticiones 200
+    python -m benchmarks.carga --mezcla completo:3,certificados:1 --duracion 60 --salida carga.json
+    python -m benchmarks.carga --referencia carga.json --tolerancia 0.15
+    python -m benchmarks.carga --url http://127.0.0.1:9000 --pid 1234 --backend real
+    python -m benchmarks.carga --ruta auto --mezcla certificados
+
+Mezclas: completo (los seis documentos del formulario), certificados (EPS,
+ARL y pensión), cedula, o tipos de benchmarks.sinteticos unidos con "+"
+(eps+arl). Cada una admite un peso con ":" y se elige al azar por petición
+con --semilla. Con --ruta auto los mismos archivos van a /validar/auto,
+sin decir qué campo es cada uno: se mide también la clasificación.
+
+En proceso el retraso del event loop es el del servidor (el cliente comparte
+el loop pero casi no trabaja); con --url es el del cliente. Sale con código 1
+si el throughput baja o el p99 sube más que --tolerancia (relativa).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import struct
+import sys
+import time
+
+import httpx
+
+from benchmarks.sinteticos import CONDUCTOR, PLANTILLAS, a_jpeg
+
+D = CONDUCTOR
+
+# mezcla -> tipos de benchmarks.sinteticos (la licencia se manda como una
+# foto de documento más: el servidor la recibe y la lee pero aún no la valida)
+MEZCLAS = {
+    "completo": ("formato", "cedula", "licencia", "eps", "arl", "pension"),
+    "certificados": ("eps", "arl", "pension"),
+    "cedula": ("cedula",),
+}
+
+# tipo -> campo del formulario (licencia no está en PLANTILLAS)
+CAMPOS = {tipo: campo for tipo, (_, campo) in PLANTILLAS.items()}
+CAMPOS["licencia"] = "licenciaConduccion"
+
+FORMULARIO = {k: D[k] for k in ("codigoTransportador", "nombreTransportador", "cedula", "nombreConductor")}
+
+
+# ==============================
+# Documentos
+# ==============================
+
+def parsear_mezcla(texto: str) -> list[tuple[tuple[str, ...], float]]:
+    """"completo:3,eps+arl" -> [(tipos, peso), ...]."""
+    mezcla = []
+    for parte in texto.split(","):
+        nombre, _, peso = parte.strip().partition(":")
+        tipos = MEZCLAS.get(nombre) or tuple(nombre.split("+"))
+        desconocidos = [t for t in tipos if t not in CAMPOS]
+        if desconocidos:
+            raise SystemExit(f"Tipo desconocido en --mezcla: {', '.join(desconocidos)}")
+        mezcla.append((tipos, float(peso or 1)))
+    return mezcla
+
+
+def plantillas_jpeg(tipos) -> dict[str, bytes]:
+    """tipo -> JPEG de su plantilla, generado una sola vez."""
+    jpegs = {}
+    for tipo in set(tipos):
+        plantilla, _ = PLANTILLAS["cedula" if tipo == "licencia" else tipo]
+        jpegs[tipo] = a_jpeg(plantilla())
+    return jpegs
+
+
+def marcar_jpeg(datos: bytes, marca: int) -> bytes:
+    """Mismo JPEG con un comentario (segmento COM) distinto: otro hash, misma imagen.
+
+    Así cada petición es un documento nuevo para el cache de OCR, el
+    almacén de verificaciones y la unión de validaciones idénticas.
+    """
+    comentario = f"carga-{marca}".encode()
+    return datos[:2] + b"\xff\xfe" + struct.pack(">H", len(comentario) + 2) + comentario + datos[2:]
+
+
+# ==============================
+# Mediciones del proceso
+# ==============================
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def _hijos(pid: int) -> list[int]:
+    hijos = []
+    try:
+        for tarea in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tarea}/children") as f:
+                hijos.extend(int(h) for h in f.read().split())
+    except OSError:
+        pass
+    return hijos
+
+
+def rss_mb(pid: int) -> float:
+    """RSS en MB de un proceso y todos sus descendientes (workers del pool); 0 sin /proc."""
+    total = 0
+    pendientes = [pid]
+    while pendientes:
+        actual = pendientes.pop()
+        try:
+            with open(f"/proc/{actual}/status") as f:
+                for linea in f:
+                    if linea.startswith("VmRSS:"):
+                        total += int(linea.split()[1])
+                        break
+        except OSError:
+            continue
+        pendientes.extend(_hijos(actual))
+    return total / 1024
+
+
+class Monitor:
+    """Muestrea el retraso del event loop (cada 10 ms) y la memoria (cada 250 ms)."""
+
+    def __init__(self, pid: int | None, intervalo: float = 0.01):
+        self.pid = pid
+        self.intervalo = intervalo
+        self.retrasos: list[float] = []
+        self.memoria: list[float] = []
+        self._tarea = None
+
+    async def _medir(self):
+        loop = asyncio.get_running_loop()
+        for n in itertools.count():
+            esperado = loop.time() + self.intervalo
+            await asyncio.sleep(self.intervalo)
+            self.retrasos.append(max(0.0, loop.time() - esperado))
+            if self.pid and n % 25 == 0:
+                self.memoria.append(rss_mb(self.pid))
+
+    def iniciar(self):
+        self.retrasos.clear()
+        self.memoria.clear()
+        self._tarea = asyncio.ensure_future(self._medir())
+
+    async def detener(self):
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        if self.pid:
+            self.memoria.append(rss_mb(self.pid))
+
+
+def parsear_server_timing(cabecera: str | None) -> dict[str, float]:
+    etapas = {}
+    for parte in (cabecera or "").split(","):
+        nombre, _, duracion = parte.strip().partition(";dur=")
+        if nombre and duracion:
+            etapas[nombre] = float(duracion) / 1000
+    return etapas
+
+
+# ==============================
+# Carga
+# ==============================
+
+async def correr(cliente: httpx.AsyncClient, args, monitor: Monitor) -> dict:
+    mezcla = parsear_mezcla(args.mezcla)
+    jpegs = plantillas_jpeg(t for tipos, _ in mezcla for t in tipos)
+    rng = random.Random(args.semilla)
+    contador = itertools.count()
+    latencias, documentos, errores = [], [0], {}
+    etapas: dict[str, list[float]] = {}
+
+    def siguiente_envio():
+        n = next(contador)
+        tipos = rng.choices([t for t, _ in mezcla], weights=[p for _, p in mezcla])[0]
+        archivos = [
+            (CAMPOS[tipo] if args.ruta == "validar" else "archivos",
+             (f"{tipo}.jpg", jpegs[tipo] if args.repetidos else marcar_jpeg(jpegs[tipo], n), "image/jpeg"))
+            for tipo in tipos
+        ]
+        return archivos, len(tipos)
+
+    ruta = "/validar" if args.ruta == "validar" else "/validar/auto"
+
+    async def enviar(medir: bool):
+        archivos, num_documentos = siguiente_envio()
+        inicio = time.perf_counter()
+        try:
+            respuesta = await cliente.post(ruta, files=archivos, data=FORMULARIO)
+            estado = respuesta.status_code
+        except httpx.HTTPError as e:
+            respuesta, estado = None, type(e).__name__
+        duracion = time.perf_counter() - inicio
+        if not medir:
+            return
+        if estado != 200:
+            errores[str(estado)] = errores.get(str(estado), 0) + 1
+            return
+        latencias.append(duracion)
+        documentos[0] += num_documentos
+        for nombre, segundos in parsear_server_timing(respuesta.headers.get("server-timing")).items():
+            etapas.setdefault(nombre, []).append(segundos)
+
+    async def usuario(fin: float, restantes: list[int]):
+        # Cada "usuario" manda un envío detrás del otro (carga de lazo cerrado)
+        while time.perf_counter() < fin and restantes[0] > 0:
+            restantes[0] -= 1
+            await enviar(medir=True)
+
+    if args.calentamiento:
+        await asyncio.gather(*(enviar(medir=False) for _ in range(args.calentamiento)))
+
+    restantes = [args.peticiones if not args.duracion else sys.maxsize]
+    fin = time.perf_counter() + (args.duracion or float("inf"))
+    monitor.iniciar()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(usuario(fin, restantes) for _ in range(args.concurrencia)))
+    transcurrido = time.perf_counter() - inicio
+    await monitor.detener()
+
+    retrasos = monitor.retrasos
+    return {
+        "concurrencia": args.concurrencia,
+        "ruta": ruta,
+        "mezcla": args.mezcla,
+        "peticiones": len(latencias),
+        "errores": errores,
+        "segundos": transcurrido,
+        "throughput": {
+            "peticiones": len(latencias) / transcurrido,
+            "documentos": documentos[0] / transcurrido,
+        },
+        "latencia": {
+            "p50": percentil(latencias, 50),
+            "p90": percentil(latencias, 90),
+            "p99": percentil(latencias, 99),
+            "max": max(latencias, default=0.0),
+            "media": statistics.fmean(latencias) if latencias else 0.0,
+        },
+        "eventLoop": {
+            "p50": percentil(retrasos, 50),
+            "p99": percentil(retrasos, 99),
+            "max": max(retrasos, default=0.0),
+        },
+        "memoriaMB": {
+            "inicio": monitor.memoria[0] if monitor.memoria else None,
+            "pico": max(monitor.memoria, default=None),
+            "final": monitor.memoria[-1] if monitor.memoria else None,
+        },
+        "etapas": {nombre: statistics.fmean(valores) for nombre, valores in etapas.items()},
+    }
+
+
+async def en_proceso(args) -> dict:
+    # El backend y el pool se eligen por entorno al importar: antes de importar main
+    if args.backend == "falso":
+        os.environ["OCR_BACKEND"] = "benchmarks.ocr_falso:BackendFalso"
+        os.environ["OCR_FALSO_DEMORA_MS"] = str(args.demora_ms)
+        os.environ["OCR_FALSO_VARIACION"] = str(args.variacion)
+    if args.workers:
+        os.environ["OCR_WORKERS"] = str(args.workers)
+    # Sin almacén de verificaciones: cada envío repetido sería un hit sin OCR
+    os.environ.setdefault("VERIFICACIONES", "0")
+    import main
+
+    transporte = httpx.ASGITransport(app=main.app)
+    async with main.lifespan(main.app):
+        async with httpx.AsyncClient(transport=transporte, base_url="http://carga", timeout=None) as cliente:
+            return await correr(cliente, args, Monitor(os.getpid()))
+
+
+async def remoto(args) -> dict:
+    limites = httpx.Limits(max_connections=args.concurrencia)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limites) as cliente:
+        return await correr(cliente, args, Monitor(args.pid))
+
+
+def comparar(actual: dict, referencia: dict, tolerancia: float) -> list[str]:
+    regresiones = []
+    ref, act = referencia["throughput"]["peticiones"], actual["throughput"]["peticiones"]
+    if act < ref * (1 - tolerancia):
+        regresiones.append(f"throughput {ref:.2f} -> {act:.2f} peticiones/s")
+    ref, act = referencia["latencia"]["p99"], actual["latencia"]["p99"]
+    if act > ref * (1 + tolerancia):
+        regresiones.append(f"latencia p99 {ref:.3f}s -> {act:.3f}s")
+    return regresiones
+
+
+def imprimir(r: dict):
+    lat, loop, mem = r["latencia"], r["eventLoop"], r["memoriaMB"]
+    print(f"📊 {r['peticiones']} envíos a {r.get('ruta', '/validar')} ({r['mezcla']}) con concurrencia {r['concurrencia']} en {r['segundos']:.1f}s")
+    print(f"   throughput  {r['throughput']['peticiones']:.2f} envíos/s  {r['throughput']['documentos']:.2f} documentos/s")
+    print(f"   latencia    p50 {lat['p50']:.3f}s  p90 {lat['p90']:.3f}s  p99 {lat['p99']:.3f}s  max {lat['max']:.3f}s")
+    print(f"   event loop  p50 {loop['p50'] * 1000:.1f}ms  p99 {loop['p99'] * 1000:.1f}ms  max {loop['max'] * 1000:.1f}ms")
+    if mem["pico"] is not None:
+        print(f"   memoria     inicio {mem['inicio']:.0f}MB  pico {mem['pico']:.0f}MB  final {mem['final']:.0f}MB")
+    if r["etapas"]:
+        print("   etapas      " + "  ".join(f"{k} {v * 1000:.1f}ms" for k, v in r["etapas"].items()))
+    if r["errores"]:
+        print(f"⚠️ Errores: {r['errores']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Servidor ya corriendo (si no, la app se levanta en este proceso)")
+    parser.add_argument("--pid", type=int, help="Con --url: PID del servidor para medir su memoria")
+    parser.add_argument("--concurrencia", type=int, default=8, help="Envíos simultáneos")
+    parser.add_argument("--peticiones", type=int, default=100, help="Envíos medidos")
+    parser.add_argument("--duracion", type=float, help="Segundos de carga (en lugar de --peticiones)")
+    parser.add_argument("--calentamiento", type=int, default=0, help="Envíos previos que no se miden")
+    parser.add_argument("--mezcla", default="completo", help="Mezcla de documentos por envío")
+    parser.add_argument("--ruta", choices=("validar", "auto"), default="validar",
+                        help="auto: los archivos van a /validar/auto sin campo asignado")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repetidos", action="store_true",
+                        help="Mandar siempre los mismos bytes (mide cache y validaciones unidas)")
+    parser.add_argument("--backend", choices=("falso", "real"), default="falso")
+    parser.add_argument("--demora-ms", type=float, default=300, help="Demora de cada OCR falso")
+    parser.add_argument("--variacion", type=float, default=0.0, help="Variación relativa de la demora falsa")
+    parser.add_argument("--workers", type=int, help="OCR_WORKERS del pool (en proceso)")
+    parser.add_argument("--timeout", type=float, default=120, help="Con --url: segundos por petición")
+    parser.add_argument("--salida", help="Guardar el resultado en este JSON")
+    parser.add_argument("--referencia", help="JSON de una corrida anterior para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento relativo permitido")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(remoto(args) if args.url else en_proceso(args))
+    resultado["backend"] = "remoto" if args.url else args.backend
+    imprimir(resultado)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    if args.referencia:
+        with open(args.referencia, encoding="utf-8") as f:
+            referencia = json.load(f)
+        regresiones = comparar(resultado, referencia, args.tolerancia)
+        for r in regresiones:
+            print(f"❌ Regresión: {r}")
+        if regresiones:
+            sys.exit(1)
+        print("✅ Sin regresiones respecto a la referencia")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Backend de OCR falso para pruebas de carga.
+
+Devuelve el texto de las plantillas de benchmarks.sinteticos según el tipo
+de documento que se está validando, después de una demora configurable.
+Así se mide el pipeline de peticiones (lectura, pool, coincidencia,
+serialización) sin el costo ni el ruido de tesseract.
+
+Al clasificar un archivo de /validar/auto todavía no se sabe qué documento
+es: la plantilla se reconoce por la imagen, comparando una miniatura de su
+contenido con la de cada plantilla preparada igual que en el servidor.
+
+Uso: OCR_BACKEND=benchmarks.ocr_falso:BackendFalso (benchmarks.carga lo
+configura solo con --backend falso).
+
+    OCR_FALSO_DEMORA_MS   demora de cada llamada al OCR (default 300)
+    OCR_FALSO_VARIACION   variación relativa de la demora, 0.2 = ±20% (default 0)
+    OCR_FALSO_MODO        "espera" (duerme, como un proceso tesseract aparte)
+                          o "cpu" (ocupa el núcleo, como tesserocr)
+"""
+import os
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.sinteticos import CONDUCTOR, PLANTILLAS, a_jpeg, texto
+from utils import metricas
+from utils.ocr_backend import BackendOCR
+
+OCR_FALSO_DEMORA_MS = float(os.getenv("OCR_FALSO_DEMORA_MS", "300"))
+OCR_FALSO_VARIACION = float(os.getenv("OCR_FALSO_VARIACION", "0"))
+OCR_FALSO_MODO = os.getenv("OCR_FALSO_MODO", "espera")
+
+# tipo que valida el hilo (clave en "resultados") -> plantilla de sinteticos
+PLANTILLA_POR_TIPO = {
+    "cedula": "cedula",
+    "documentoFormato": "formato",
+    "documentoEPS": "eps",
+    "documentoARL": "arl",
+    "documentoPension": "pension",
+}
+
+# Tipo de métricas de utils.clasificador: la plantilla sale de la imagen
+TIPO_CLASIFICACION = "clasificacion"
+_LADO_MINIATURA = 24
+_TINTA_MINIMA = 0.05
+
+# Geometría de las cajas de datos(): la de una página carta a 150 dpi
+_MARGEN = 80
+_ALTO_RENGLON = 45
+_ANCHO_CARACTER = 16
+
+
+def miniatura(imagen: Image.Image) -> np.ndarray | None:
+    """Miniatura en grises del recorte con tinta de la imagen; None si está en blanco."""
+    gris = imagen.convert("L")
+    tinta = np.asarray(gris) < 128
+    # Filas y columnas con bastante tinta: los puntos sueltos del ruido no cuentan
+    filas = np.flatnonzero(tinta.mean(axis=1) > _TINTA_MINIMA)
+    if filas.size == 0:
+        return None
+    columnas = np.flatnonzero(tinta[filas[0]:filas[-1] + 1].mean(axis=0) > _TINTA_MINIMA)
+    if columnas.size == 0:
+        return None
+    recorte = gris.crop((int(columnas[0]), int(filas[0]), int(columnas[-1]) + 1, int(filas[-1]) + 1))
+    return np.asarray(recorte.resize((_LADO_MINIATURA, _LADO_MINIATURA), Image.BILINEAR), dtype=np.float32) / 255
+
+
+_miniaturas: dict[str, np.ndarray] | None = None
+_lock_miniaturas = threading.Lock()
+
+
+def _miniaturas_plantillas() -> dict[str, np.ndarray]:
+    """plantilla -> miniatura de su imagen de OCR (normalizada como en el servidor), una vez por proceso."""
+    global _miniaturas
+    with _lock_miniaturas:
+        if _miniaturas is None:
+            from utils.ocr import Fuente  # utils.ocr carga el backend: import diferido
+            _miniaturas = {
+                tipo: miniatura(Fuente(a_jpeg(plantilla())).imagen_ocr())
+                for tipo, (plantilla, _) in PLANTILLAS.items()
+            }
+    return _miniaturas
+
+
+def reconocer_plantilla(imagen: Image.Image) -> str | None:
+    """La plantilla de benchmarks.sinteticos más parecida a la imagen."""
+    propia = miniatura(imagen)
+    if propia is None:
+        return None
+    distancias = {
+        tipo: float(np.abs(propia - otra).mean())
+        for tipo, otra in _miniaturas_plantillas().items() if otra is not None
+    }
+    return min(distancias, key=distancias.get)
+
+
+class BackendFalso(BackendOCR):
+    """Texto fijo por tipo de documento tras una demora determinista."""
+
+    nombre = "falso"
+
+    def __init__(self, demora_ms: float = OCR_FALSO_DEMORA_MS, variacion: float = OCR_FALSO_VARIACION,
+                 modo: str = OCR_FALSO_MODO, conductor: dict = CONDUCTOR):
+        self.demora = demora_ms / 1000
+        self.variacion = variacion
+        self.modo = modo
+        self.conductor = conductor
+
+    def _esperar(self, imagen, lang: str, config: str):
+        demora = self.demora
+        if self.variacion:
+            # Misma imagen y config -> misma demora: las corridas se pueden repetir
+            semilla = zlib.crc32(f"{imagen.size}|{lang}|{config}|{metricas.tipo_actual()}".encode())
+            demora *= 1 + self.variacion * random.Random(semilla).uniform(-1, 1)
+        if self.modo == "cpu":
+            fin = time.perf_counter() + demora
+            while time.perf_counter() < fin:
+                pass
+        else:
+            time.sleep(demora)
+
+    def _renglones(self, imagen) -> list[str]:
+        tipo = metricas.tipo_actual()
+        plantilla = reconocer_plantilla(imagen) if tipo == TIPO_CLASIFICACION else PLANTILLA_POR_TIPO.get(tipo)
+        # Fuera de un validador (calentamiento del pool) no hay nada que leer
+        return texto(plantilla, self.conductor) if plantilla else []
+
+    def texto(self, imagen, lang="spa", config=""):
+        self._esperar(imagen, lang, config)
+        return "\n".join(self._renglones(imagen))
+
+    def datos(self, imagen, lang="spa", config=""):
+        self._esperar(imagen, lang, config)
+        salida = {k: [] for k in (
+            "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+            "left", "top", "width", "height", "conf", "text",
+        )}
+        for n, renglon in enumerate(self._renglones(imagen), start=1):
+            x = _MARGEN
+            for m, palabra in enumerate(renglon.split(), start=1):
+                ancho = len(palabra) * _ANCHO_CARACTER
+                for k, v in (
+                    ("level", 5), ("page_num", 1), ("block_num", 1), ("par_num", 1),
+                    ("line_num", n), ("word_num", m), ("left", x), ("top", _MARGEN + n * _ALTO_RENGLON),
+                    ("width", ancho), ("height", _ALTO_RENGLON - 10), ("conf", 95.0), ("text", palabra),
+                ):
+                    salida[k].append(v)
+                x += ancho + _ANCHO_CARACTER
+        return salida
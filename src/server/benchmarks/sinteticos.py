@@ -0,0 +1,205 @@
+"""Documentos sintéticos con datos conocidos para los benchmarks.
+
+Genera cédula, certificado EPS, ARL, pensión/Protección y formato de creación
+con PIL, más variantes con ruido, desenfoque y rotación.
+"""
+import io
+import random
+from datetime import date, timedelta
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+CONDUCTOR = {
+    "nombreConductor": "Herny Yulian Franklin Serrano",
+    "cedula": "1095926634",
+    "codigoTransportador": "4501234",
+    "nombreTransportador": "Transportes La Sabana SAS",
+}
+
+VARIANTES = ("limpio", "ruido", "desenfoque", "rotacion")
+
+
+def _fuente(tamano: int):
+    for nombre in ("DejaVuSans.ttf", "Arial.ttf", "LiberationSans-Regular.ttf"):
+        try:
+            return ImageFont.truetype(nombre, tamano)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=tamano)
+
+
+def _cedula_puntos(cedula: str) -> str:
+    return f"{int(cedula):,}".replace(",", ".")
+
+
+def _lienzo(ancho: int, alto: int, lineas: list[tuple[str, int]], margen: int = 80) -> Image.Image:
+    img = Image.new("L", (ancho, alto), 255)
+    dibujo = ImageDraw.Draw(img)
+    y = margen
+    for texto, tamano in lineas:
+        dibujo.text((margen, y), texto, fill=0, font=_fuente(tamano))
+        y += int(tamano * 1.6)
+    return img
+
+
+def _fecha_expedicion() -> str:
+    return (date.today() - timedelta(days=5)).strftime("%d/%m/%Y")
+
+
+# ==============================
+# Plantillas por tipo de documento
+# ==============================
+#
+# Cada tipo tiene sus renglones (texto, tamaño) aparte de la imagen: el
+# backend falso de benchmarks.ocr_falso devuelve ese mismo texto sin OCR.
+
+def lineas_cedula(d=CONDUCTOR) -> list[tuple[str, int]]:
+    nombres = d["nombreConductor"].upper().split()
+    return [
+        ("REPUBLICA DE COLOMBIA", 40),
+        ("IDENTIFICACION PERSONAL", 30),
+        ("CEDULA DE CIUDADANIA", 26),
+        (f"NUMERO {_cedula_puntos(d['cedula'])}", 40),
+        (" ".join(nombres[2:]), 34),
+        ("APELLIDOS", 20),
+        (" ".join(nombres[:2]), 34),
+        ("NOMBRES", 20),
+    ]
+
+
+def lineas_eps(d=CONDUCTOR) -> list[tuple[str, int]]:
+    return [
+        ("CERTIFICADO DE AFILIACION EPS", 40),
+        ("La EPS certifica que el señor", 28),
+        (f"{d['nombreConductor'].upper()} identificado con", 28),
+        (f"CC {d['cedula']} se encuentra afiliado y activo.", 28),
+        ("Estado de la afiliación: ACTIVO", 28),
+        (f"Fecha de expedición {_fecha_expedicion()}", 28),
+    ]
+
+
+def lineas_arl(d=CONDUCTOR) -> list[tuple[str, int]]:
+    return [
+        ("CERTIFICADO DE AFILIACION ARL", 40),
+        (f"Trabajador: {d['nombreConductor'].upper()}", 28),
+        (f"Documento: {d['cedula']}", 28),
+        ("Estado: vigente - afiliado activo", 28),
+        ("Clase de riesgo: 4", 28),
+        (f"Expedido el {_fecha_expedicion()}", 28),
+    ]
+
+
+def lineas_pension(d=CONDUCTOR) -> list[tuple[str, int]]:
+    return [
+        ("CERTIFICADO DE AFILIACION A PENSIONES", 36),
+        (f"Nombre: {d['nombreConductor'].upper()}", 28),
+        (f"Identificación: {d['cedula']}", 28),
+        (f"Fecha: {_fecha_expedicion()}", 28),
+    ]
+
+
+def lineas_proteccion(d=CONDUCTOR) -> list[tuple[str, int]]:
+    return [
+        ("PROTECCION S.A.", 40),
+        ("FONDO DE PENSIONES OBLIGATORIAS", 32),
+        ("CONSTANCIA DE AFILIACION", 30),
+        (f"{d['nombreConductor'].upper()}", 28),
+        (f"CC {d['cedula']} se encuentra afiliado", 28),
+        (f"Fecha de expedición {_fecha_expedicion()}", 28),
+    ]
+
+
+def lineas_formato(d=CONDUCTOR) -> list[tuple[str, int]]:
+    return [
+        ("FORMATO DE CREACION DE CONDUCTOR", 36),
+        (f"Código transportador: {d['codigoTransportador']}", 28),
+        (f"Transportador: {d['nombreTransportador'].upper()}", 28),
+        (f"Cédula conductor: {_cedula_puntos(d['cedula'])}", 28),
+        (f"Nombre conductor: {d['nombreConductor'].upper()}", 28),
+    ]
+
+
+def cedula(d=CONDUCTOR) -> Image.Image:
+    img = _lienzo(1000, 640, lineas_cedula(d), margen=50)
+    # Tarjeta sobre un fondo oscuro, como las fotos de celular
+    fondo = Image.new("L", (1200, 840), 60)
+    fondo.paste(img, (100, 100))
+    return fondo
+
+
+def eps(d=CONDUCTOR) -> Image.Image:
+    return _lienzo(1275, 1650, lineas_eps(d))
+
+
+def arl(d=CONDUCTOR) -> Image.Image:
+    return _lienzo(1275, 1650, lineas_arl(d))
+
+
+def pension(d=CONDUCTOR) -> Image.Image:
+    return _lienzo(1275, 1650, lineas_pension(d))
+
+
+def proteccion(d=CONDUCTOR) -> Image.Image:
+    return _lienzo(1275, 1650, lineas_proteccion(d))
+
+
+def formato(d=CONDUCTOR) -> Image.Image:
+    return _lienzo(1275, 1650, lineas_formato(d))
+
+
+# tipo -> (plantilla, campo del formulario de /validar)
+PLANTILLAS = {
+    "cedula": (cedula, "documento"),
+    "eps": (eps, "certificadoEPS"),
+    "arl": (arl, "certificadoARL"),
+    "pension": (pension, "certificadoPension"),
+    "proteccion": (proteccion, "certificadoPension"),
+    "formato": (formato, "formatoCreacion"),
+}
+
+LINEAS = {
+    "cedula": lineas_cedula,
+    "eps": lineas_eps,
+    "arl": lineas_arl,
+    "pension": lineas_pension,
+    "proteccion": lineas_proteccion,
+    "formato": lineas_formato,
+}
+
+
+def texto(tipo: str, d=CONDUCTOR) -> list[str]:
+    """Renglones de texto que contiene la plantilla de `tipo`."""
+    return [linea for linea, _ in LINEAS[tipo](d)]
+
+
+# ==============================
+# Variantes de degradación
+# ==============================
+
+def degradar(img: Image.Image, variante: str, semilla: int = 0) -> Image.Image:
+    if variante == "ruido":
+        rng = np.random.default_rng(semilla)
+        arr = np.asarray(img, dtype=np.int16) + rng.normal(0, 25, (img.height, img.width))
+        return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+    if variante == "desenfoque":
+        return img.filter(ImageFilter.GaussianBlur(1.6))
+    if variante == "rotacion":
+        angulo = random.Random(semilla).uniform(2.0, 4.0)
+        return img.rotate(angulo, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    return img
+
+
+def a_jpeg(img: Image.Image, calidad: int = 85) -> bytes:
+    buffer = io.BytesIO()
+    img.convert("RGB").save(buffer, format="JPEG", quality=calidad)
+    return buffer.getvalue()
+
+
+def generar(tipos=tuple(PLANTILLAS), variantes=VARIANTES):
+    """Casos (tipo, variante, bytes JPEG) con los datos de CONDUCTOR."""
+    for tipo in tipos:
+        plantilla, _ = PLANTILLAS[tipo]
+        base = plantilla()
+        for i, variante in enumerate(variantes):
+            yield tipo, variante, a_jpeg(degradar(base, variante, semilla=i))
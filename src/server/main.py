@@ -1,20 +1,63 @@
+import asyncio
 import os
-import shutil
-from fastapi import FastAPI, UploadFile, Form
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-
-# Importar validadores
-from validators.formato_validator import validar_formato_transportador
-from validators.cedula_validator import validar_cedula
-from validators.eps_validator import validar_eps
-# from validators.license_validator import validar_licencia
-from validators.arl_validator import validar_arl     
-from validators.pension_validator import validar_documento_pension
-
-UPLOAD_DIR = "./uploads"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-app = FastAPI()
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES
+
+# Validadores por campo del formulario
+from utils.almacen_uploads import obtener_almacen_uploads
+from utils.documentos import esperar_en_curso, validar_formulario
+from utils.ejecutor import calentar_pool, cerrar_pool, estado_servidor
+from utils.entrada import LimiteCuerpo, SUBIDA_MAX_MB_LOTE, SUBIDA_MAX_MB_PETICION
+from utils import metricas
+from utils.respuesta import FormaRespuesta, forma_respuesta, RespuestaJSON, RESPUESTA_GZIP_MINIMO
+from utils.trabajos import cola_trabajos
+from routes.auto import router as auto_router
+from routes.formulario import formulario_validacion
+from routes.lote import router as lote_router
+from routes.metricas import router as metricas_router
+from routes.salud import router as salud_router
+from routes.trabajos import router as trabajos_router
+from routes.uploads import router as uploads_router
+from routes.verificaciones import router as verificaciones_router
+
+
+# Segundos que se esperan las validaciones en curso al apagar
+SERVIDOR_DRENADO = float(os.getenv("SERVIDOR_DRENADO", "30"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Arrancar y calentar todos los workers del pool antes de aceptar tráfico
+    await calentar_pool()
+    await cola_trabajos.iniciar()
+    # Limpiador de las copias de uploads (vencidas y por cuota)
+    almacen_uploads = obtener_almacen_uploads()
+    limpiador = asyncio.create_task(almacen_uploads.limpiar_periodicamente()) if almacen_uploads else None
+    yield
+    # Drenado: /salud/listo pasa a 503 y se espera lo que ya está en el pool
+    estado_servidor["drenando"] = True
+    quedaron = await esperar_en_curso(SERVIDOR_DRENADO)
+    if quedaron:
+        print(f"⚠️ Se apaga con {quedaron} validaciones sin terminar")
+    await cola_trabajos.detener()
+    if limpiador is not None:
+        limpiador.cancel()
+    cerrar_pool()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=RespuestaJSON)
+
+# Tope del cuerpo: un upload enorme se corta con 413 mientras llega (dentro
+# de CORS para que el navegador pueda leer el rechazo)
+app.add_middleware(
+    LimiteCuerpo,
+    limite_mb=SUBIDA_MAX_MB_PETICION,
+    limites_mb={"/validar/lote": SUBIDA_MAX_MB_LOTE},
+)
 
 # CORS
 app.add_middleware(
@@ -24,80 +67,52 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Gzip para las respuestas JSON; el NDJSON de /validar/lote se deja sin
+# comprimir para que cada línea llegue apenas se valida el documento
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=RESPUESTA_GZIP_MINIMO,
+    compresslevel=5,
+    exclude_content_types=DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/x-ndjson",),
+)
+
+app.include_router(lote_router)
+app.include_router(auto_router)
+app.include_router(trabajos_router)
+app.include_router(metricas_router)
+app.include_router(verificaciones_router)
+app.include_router(salud_router)
+app.include_router(uploads_router)
+
+
+@app.middleware("http")
+async def medir_peticion(request: Request, call_next):
+    # Las etapas que se midan durante la petición se suman en `tiempos`
+    tiempos = metricas.iniciar_peticion()
+    inicio = time.perf_counter()
+    respuesta = await call_next(request)
+    tiempos["total"] = time.perf_counter() - inicio
+
+    ruta = request.scope.get("route")
+    metricas.registrar(
+        metricas.HTTP_SEGUNDOS.nombre, "observar", tiempos["total"],
+        ruta=getattr(ruta, "path", "sin_ruta"), metodo=request.method,
+    )
+    respuesta.headers["Server-Timing"] = metricas.server_timing(tiempos)
+    return respuesta
+
+
 @app.post("/validar")
 async def validar_documentos(
-    # Archivos
-    formatoCreacion: UploadFile | None = None,
-    documento: UploadFile | None = None,          # Cédula
-    licenciaConduccion: UploadFile | None = None,
-    certificadoEPS: UploadFile | None = None,
-    certificadoARL: UploadFile | None = None,
-    certificadoPension: UploadFile | None = None,
-
-    # Datos del formulario
-    codigoTransportador: str = Form(None),
-    nombreTransportador: str = Form(None),
-    cedula: str = Form(None),
-    nombreConductor: str = Form(None),
+    envio: tuple[dict, dict] = Depends(formulario_validacion),
+    forma: FormaRespuesta = Depends(forma_respuesta),
 ):
-    resultados = {}
-
-    # 1) Guardar temporal y validar formato transportador
-    if formatoCreacion:
-        file_path = os.path.join(UPLOAD_DIR, formatoCreacion.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(formatoCreacion.file, buffer)
-
-        resultados["documentoFormato"] = validar_formato_transportador(
-            file_path,
-            codigoTransportador,
-            nombreTransportador,
-            cedula,
-            nombreConductor
-        )
-
-    # 2) Guardar temporal y validar cédula
-    if documento:
-        file_path = os.path.join(UPLOAD_DIR, documento.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(documento.file, buffer)
-
-        resultados["cedula"] = validar_cedula(
-            file_path,
-            cedula,
-            nombreConductor
-        )
-
-    # 3) Validar licencia de conducción
-    if licenciaConduccion:
-        file_path = os.path.join(UPLOAD_DIR, licenciaConduccion.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(licenciaConduccion.file, buffer)
-
-        # resultados["licencia"] = validar_licencia(file_path, cedula, nombreConductor)
-
-    # 4) Validar EPS
-    if certificadoEPS:
-        file_path = os.path.join(UPLOAD_DIR, certificadoEPS.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(certificadoEPS.file, buffer)
-
-        resultados["documentoEPS"] = validar_eps(file_path, nombreConductor, cedula)
-
-    # 5) Validar ARL
-    if certificadoARL:
-        file_path = os.path.join(UPLOAD_DIR, certificadoARL.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(certificadoARL.file, buffer)
-
-        resultados["documentoARL"] = validar_arl(file_path, nombreConductor, cedula)
-
-    # 6) Validar pensión
-    if certificadoPension:
-        file_path = os.path.join(UPLOAD_DIR, certificadoPension.filename)
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(certificadoPension.file, buffer)
-
-        resultados["documentoPension"] = validar_documento_pension(file_path, nombreConductor, cedula)
-
-    return {"resultados": resultados}
+    documentos, formulario = envio
+
+    # Cada validador se agenda en el pool y se ejecutan todos en paralelo
+    resultados = await validar_formulario(documentos, formulario)
+
+    inicio = time.perf_counter()
+    respuesta = RespuestaJSON({"resultados": forma.resultados(resultados)})
+    metricas.registrar_etapa("formulario", "serializacion", time.perf_counter() - inicio)
+    return respuesta
@@ -0,0 +1,71 @@
+import asyncio
+import os
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+
+from routes.formulario import leer_upload
+from utils.documentos import CAMPOS_DOCUMENTO, resultado_error, validar_sin_etiqueta
+from utils.entrada import Presupuesto
+from utils.respuesta import FormaRespuesta, forma_respuesta
+
+router = APIRouter()
+
+# Archivos por envío en /validar/auto
+AUTO_MAX_ARCHIVOS = int(os.getenv("AUTO_MAX_ARCHIVOS", "12"))
+
+
+@router.post("/validar/auto")
+async def validar_auto(
+    archivos: list[UploadFile] = File(...),
+    codigoTransportador: str = Form(None),
+    nombreTransportador: str = Form(None),
+    cedula: str = Form(None),
+    nombreConductor: str = Form(None),
+    forma: FormaRespuesta = Depends(forma_respuesta),
+):
+    """Valida archivos sueltos sin campo asignado: cada uno se clasifica y va a su validador.
+
+    Responde {"documentos": [{"archivo", "tipo", "clasificacion",
+    "resultado"|"error"}], "faltantes": [tipos del formulario sin archivo]}.
+    Un documento que falla al validarse trae {"error"} en "resultado", como
+    en /validar; "error" a nivel del documento es que no se reconoció su tipo.
+    """
+    if len(archivos) > AUTO_MAX_ARCHIVOS:
+        raise HTTPException(status_code=413, detail=f"Se aceptan hasta {AUTO_MAX_ARCHIVOS} archivos por envío")
+    formulario = {
+        "codigoTransportador": codigoTransportador,
+        "nombreTransportador": nombreTransportador,
+        "cedula": cedula,
+        "nombreConductor": nombreConductor,
+    }
+
+    presupuesto = Presupuesto()
+    # El nombre del archivo lo pone el cliente: solo va en el mensaje de error, no en las métricas
+    contenidos = [
+        await leer_upload(upload, "auto", presupuesto, nombre=upload.filename) for upload in archivos
+    ]
+    validaciones = await asyncio.gather(
+        *(validar_sin_etiqueta(datos, formulario) for datos in contenidos), return_exceptions=True
+    )
+
+    documentos = []
+    for upload, validacion in zip(archivos, validaciones):
+        documento = {"archivo": upload.filename}
+        if isinstance(validacion, Exception):
+            # Falló antes de clasificarse (archivo ilegible): sin tipo, con el error en el resultado
+            documento.update(tipo=None, clasificacion=None, resultado=forma.documento(resultado_error(validacion)))
+        elif validacion["tipo"] is None:
+            documento.update(
+                tipo=None, clasificacion=validacion["clasificacion"],
+                error="No se reconoció el tipo de documento",
+            )
+        else:
+            documento.update(
+                tipo=validacion["tipo"], clasificacion=validacion["clasificacion"],
+                resultado=forma.documento(validacion["resultado"]),
+            )
+        documentos.append(documento)
+
+    encontrados = {d.get("tipo") for d in documentos}
+    faltantes = [tipo for tipo, _, _ in CAMPOS_DOCUMENTO.values() if tipo not in encontrados]
+    return {"documentos": documentos, "faltantes": faltantes}
@@ -0,0 +1,65 @@
+import time
+
+from fastapi import Form, HTTPException, UploadFile
+
+from utils.almacen_uploads import guardar_copia
+from utils.documentos import CAMPOS_DOCUMENTO, clave_resultado
+from utils.entrada import DocumentoRechazado, Presupuesto, leer_documento_subido
+from utils.metricas import registrar_etapa
+
+
+async def leer_upload(upload: UploadFile, tipo: str = "desconocido", presupuesto: Presupuesto | None = None,
+                      nombre: str | None = None) -> bytes:
+    """Lee el upload en memoria, revisando formato y tamaño antes de aceptarlo.
+
+    `tipo` es la etiqueta de las métricas (un conjunto fijo); `nombre`, si
+    viene, identifica el archivo en el mensaje de rechazo.
+    """
+    inicio = time.perf_counter()
+    try:
+        datos = await leer_documento_subido(upload, presupuesto)
+    except DocumentoRechazado as e:
+        raise HTTPException(status_code=e.estado, detail=f"{nombre or tipo}: {e}")
+    await guardar_copia(datos)
+    registrar_etapa(tipo, "lectura", time.perf_counter() - inicio)
+    return datos
+
+
+async def formulario_validacion(
+    # Archivos
+    formatoCreacion: UploadFile | None = None,
+    documento: UploadFile | None = None,          # Cédula
+    licenciaConduccion: UploadFile | None = None,
+    certificadoEPS: UploadFile | None = None,
+    certificadoARL: UploadFile | None = None,
+    certificadoPension: UploadFile | None = None,
+
+    # Datos del formulario
+    codigoTransportador: str = Form(None),
+    nombreTransportador: str = Form(None),
+    cedula: str = Form(None),
+    nombreConductor: str = Form(None),
+) -> tuple[dict, dict]:
+    """Dependencia común de /validar y /trabajos: (documentos en bytes por campo, datos del formulario)."""
+    formulario = {
+        "codigoTransportador": codigoTransportador,
+        "nombreTransportador": nombreTransportador,
+        "cedula": cedula,
+        "nombreConductor": nombreConductor,
+    }
+    archivos = {
+        "formatoCreacion": formatoCreacion,
+        "documento": documento,
+        "licenciaConduccion": licenciaConduccion,  # validador de licencia pendiente
+        "certificadoEPS": certificadoEPS,
+        "certificadoARL": certificadoARL,
+        "certificadoPension": certificadoPension,
+    }
+
+    # Bytes y píxeles de todos los documentos de la petición juntos
+    presupuesto = Presupuesto()
+    documentos = {}
+    for campo, upload in archivos.items():
+        if upload and campo in CAMPOS_DOCUMENTO:
+            documentos[campo] = await leer_upload(upload, clave_resultado(campo), presupuesto)
+    return documentos, formulario
@@ -0,0 +1,194 @@
+import asyncio
+import json
+import os
+import zipfile
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from utils.almacen_uploads import guardar_copia
+from utils.documentos import CAMPOS_DOCUMENTO, CAMPOS_FORMULARIO, clave_resultado, validar_documento
+from utils.ejecutor import OCR_WORKERS
+from utils.entrada import MB, SUBIDA_MAX_MB_ARCHIVO, inspeccionar
+from utils.respuesta import FormaRespuesta, forma_respuesta, serializar
+
+router = APIRouter()
+
+# Documentos en vuelo a la vez: mantiene el pool lleno sin cargar todo el lote en memoria
+LOTE_EN_VUELO = int(os.getenv("LOTE_EN_VUELO", "0")) or OCR_WORKERS * 2
+NOMBRE_MANIFIESTO = "manifiesto.json"
+
+
+# ==============================
+# Lectura del lote
+# ==============================
+
+def _cargar_json(texto):
+    try:
+        return json.loads(texto)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=f"Manifiesto inválido: {e}")
+
+
+def _validar_manifiesto(manifiesto) -> list[dict]:
+    """El manifiesto es una lista de conductores:
+
+    [{"id": "c1", "cedula": "...", "nombreConductor": "...",
+      "codigoTransportador": "...", "nombreTransportador": "...",
+      "documentos": {"documento": "c1/cedula.jpg", "certificadoEPS": "c1/eps.jpg"}}]
+
+    Las rutas de "documentos" apuntan a entradas del ZIP o a nombres de
+    archivo del multipart.
+    """
+    if isinstance(manifiesto, dict):
+        manifiesto = manifiesto.get("conductores", [])
+    if not isinstance(manifiesto, list):
+        raise HTTPException(status_code=400, detail="El manifiesto debe ser una lista de conductores")
+    for i, conductor in enumerate(manifiesto):
+        if not isinstance(conductor, dict) or not isinstance(conductor.get("documentos"), dict):
+            raise HTTPException(status_code=400, detail=f"Conductor {i}: falta el objeto 'documentos'")
+        desconocidos = set(conductor["documentos"]) - set(CAMPOS_DOCUMENTO)
+        if desconocidos:
+            raise HTTPException(status_code=400, detail=f"Conductor {i}: campos desconocidos {sorted(desconocidos)}")
+        conductor.setdefault("id", conductor.get("cedula") or str(i))
+    return manifiesto
+
+
+class _OrigenZip:
+    def __init__(self, upload: UploadFile):
+        try:
+            self._zip = zipfile.ZipFile(upload.file)
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="El archivo no es un ZIP válido")
+        self._nombres = set(self._zip.namelist())
+
+    def manifiesto(self):
+        if NOMBRE_MANIFIESTO not in self._nombres:
+            raise HTTPException(status_code=400, detail=f"El ZIP no contiene {NOMBRE_MANIFIESTO}")
+        return _cargar_json(self._zip.read(NOMBRE_MANIFIESTO))
+
+    def existe(self, nombre: str) -> bool:
+        return nombre in self._nombres
+
+    def leer(self, nombre: str) -> bytes:
+        # El tamaño descomprimido está en el directorio del ZIP: no se infla una bomba
+        if self._zip.getinfo(nombre).file_size > SUBIDA_MAX_MB_ARCHIVO * MB:
+            raise ValueError(f"'{nombre}' supera {SUBIDA_MAX_MB_ARCHIVO:g} MB")
+        return self._zip.read(nombre)
+
+    def cerrar(self):
+        self._zip.close()
+
+
+class _OrigenMultipart:
+    def __init__(self, archivos: list[UploadFile]):
+        # Starlette ya dejó cada archivo en un SpooledTemporaryFile; se leen de a uno
+        self._archivos = {a.filename: a for a in archivos}
+
+    def existe(self, nombre: str) -> bool:
+        return nombre in self._archivos
+
+    def leer(self, nombre: str) -> bytes:
+        if (self._archivos[nombre].size or 0) > SUBIDA_MAX_MB_ARCHIVO * MB:
+            raise ValueError(f"'{nombre}' supera {SUBIDA_MAX_MB_ARCHIVO:g} MB")
+        archivo = self._archivos[nombre].file
+        archivo.seek(0)
+        return archivo.read()
+
+    def cerrar(self):
+        pass
+
+
+def _documentos(manifiesto: list[dict]):
+    for conductor in manifiesto:
+        for campo, nombre in conductor["documentos"].items():
+            yield conductor, campo, nombre
+
+
+# ==============================
+# Ejecución y streaming
+# ==============================
+
+def _linea(obj) -> bytes:
+    return serializar(obj) + b"\n"
+
+
+async def _procesar_lote(origen, manifiesto: list[dict], forma: FormaRespuesta):
+    # Indexado por objeto: el manifiesto podría repetir ids
+    pendientes_por_conductor = {id(c): len(c["documentos"]) for c in manifiesto}
+    fallidos_por_conductor = {id(c): 0 for c in manifiesto}
+    documentos = _documentos(manifiesto)
+    en_vuelo: dict[asyncio.Task, tuple[dict, str]] = {}
+
+    async def validar(conductor, campo, nombre):
+        if not origen.existe(nombre):
+            raise FileNotFoundError(f"No se encontró '{nombre}' en el lote")
+        # Leer el documento solo cuando le toca entrar al pool
+        datos = await asyncio.to_thread(origen.leer, nombre)
+        # Formato, dimensiones y páginas antes de ocupar un worker de OCR
+        await asyncio.to_thread(inspeccionar, datos)
+        await guardar_copia(datos)
+        formulario = {k: conductor.get(k) for k in CAMPOS_FORMULARIO}
+        return await validar_documento(campo, datos, formulario)
+
+    def agendar():
+        while len(en_vuelo) < LOTE_EN_VUELO:
+            siguiente = next(documentos, None)
+            if siguiente is None:
+                return
+            conductor, campo, nombre = siguiente
+            en_vuelo[asyncio.create_task(validar(conductor, campo, nombre))] = (conductor, campo)
+
+    try:
+        agendar()
+        while en_vuelo:
+            terminadas, _ = await asyncio.wait(en_vuelo, return_when=asyncio.FIRST_COMPLETED)
+            for tarea in terminadas:
+                conductor, campo = en_vuelo.pop(tarea)
+                linea = {"id": conductor["id"], "campo": campo, "clave": clave_resultado(campo)}
+                if tarea.exception() is not None:
+                    linea["error"] = str(tarea.exception())
+                    fallidos_por_conductor[id(conductor)] += 1
+                else:
+                    linea["resultado"] = forma.documento(tarea.result())
+                yield _linea(linea)
+
+                pendientes_por_conductor[id(conductor)] -= 1
+                if pendientes_por_conductor[id(conductor)] == 0:
+                    yield _linea({
+                        "id": conductor["id"],
+                        "completo": True,
+                        "documentos": len(conductor["documentos"]),
+                        "errores": fallidos_por_conductor[id(conductor)],
+                    })
+            agendar()
+    finally:
+        for tarea in en_vuelo:
+            tarea.cancel()
+        origen.cerrar()
+
+
+@router.post("/validar/lote")
+async def validar_lote(
+    archivo: UploadFile | None = File(None),           # ZIP con manifiesto.json
+    manifiesto: str | None = Form(None),               # o manifiesto JSON + archivos sueltos
+    archivos: list[UploadFile] | None = File(None),
+    forma: FormaRespuesta = Depends(forma_respuesta),
+):
+    """Valida muchos conductores a la vez y devuelve NDJSON a medida que termina cada documento.
+
+    Cada línea es un documento ({"id", "campo", "clave", "resultado"|"error"});
+    al terminar todos los documentos de un conductor se emite
+    {"id", "completo": true, "documentos", "errores"}.
+    """
+    if archivo is not None:
+        origen = _OrigenZip(archivo)
+        datos_manifiesto = origen.manifiesto() if manifiesto is None else _cargar_json(manifiesto)
+    elif manifiesto is not None:
+        origen = _OrigenMultipart(archivos or [])
+        datos_manifiesto = _cargar_json(manifiesto)
+    else:
+        raise HTTPException(status_code=400, detail="Envíe un ZIP en 'archivo' o un 'manifiesto' con 'archivos'")
+
+    conductores = _validar_manifiesto(datos_manifiesto)
+    return StreamingResponse(_procesar_lote(origen, conductores, forma), media_type="application/x-ndjson")
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils import metricas
+from utils.trabajos import cola_trabajos
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def exportar_metricas():
+    """Métricas en formato de texto de Prometheus (de este proceso)."""
+    metricas.registrar(metricas.TRABAJOS_EN_COLA.nombre, "fijar", cola_trabajos.profundidad())
+    return PlainTextResponse(
+        metricas.registro.exportar(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,24 @@
+import os
+
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from utils.ejecutor import OCR_WORKERS, estado_servidor
+
+router = APIRouter()
+
+
+@router.get("/salud/vivo")
+async def vivo():
+    """Liveness: el proceso responde (no depende del pool de OCR)."""
+    return {"vivo": True, "pid": os.getpid()}
+
+
+@router.get("/salud/listo")
+async def listo():
+    """Readiness: 200 con todos los workers calentados; 503 mientras arranca, si el OCR falló o al drenar."""
+    preparado = estado_servidor["calentado"] and not estado_servidor["drenando"]
+    return JSONResponse(
+        {"listo": preparado, "pid": os.getpid(), "workersOCR": OCR_WORKERS, **estado_servidor},
+        status_code=200 if preparado else 503,
+    )
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from routes.formulario import formulario_validacion
+from utils.respuesta import FormaRespuesta, forma_respuesta
+from utils.trabajos import cola_trabajos, ColaCerrada, ColaLlena
+
+router = APIRouter()
+
+
+@router.post("/trabajos", status_code=202)
+async def crear_trabajo(envio: tuple[dict, dict] = Depends(formulario_validacion)):
+    """Encola un envío de /validar y devuelve el id para consultarlo después."""
+    documentos, formulario = envio
+    try:
+        id_trabajo = await cola_trabajos.encolar(documentos, formulario)
+    except ColaLlena as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Hay demasiados trabajos en cola, intente más tarde",
+            headers={"Retry-After": str(e.reintentar_en)},
+        )
+    except ColaCerrada:
+        raise HTTPException(
+            status_code=503,
+            detail="El servidor no está aceptando trabajos",
+            headers={"Retry-After": "5"},
+        )
+    return {"id": id_trabajo, "estado": "en_cola", "enCola": cola_trabajos.profundidad()}
+
+
+@router.get("/trabajos/{id_trabajo}")
+async def consultar_trabajo(id_trabajo: str, forma: FormaRespuesta = Depends(forma_respuesta)):
+    """Estado del trabajo; al completarse incluye los mismos "resultados" que /validar."""
+    trabajo = await cola_trabajos.obtener(id_trabajo)
+    if trabajo is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado o vencido")
+    if trabajo.get("resultados"):
+        trabajo = {**trabajo, "resultados": forma.resultados(trabajo["resultados"])}
+    return trabajo
@@ -0,0 +1,45 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from utils.almacen_uploads import es_huella, obtener_almacen_uploads
+from utils.auditoria import requiere_auditoria
+from utils.entrada import detectar_formato
+
+router = APIRouter(dependencies=[Depends(requiere_auditoria)])
+
+TIPOS_MIME = {
+    "pdf": "application/pdf",
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "tiff": "image/tiff",
+    "bmp": "image/bmp",
+    "webp": "image/webp",
+}
+
+
+def _cabecera(ruta: str) -> bytes:
+    with open(ruta, "rb") as archivo:
+        return archivo.read(1024)
+
+
+@router.get("/uploads/{huella}")
+async def obtener_upload(huella: str):
+    """Documento guardado por su sha256 (la huella de /verificaciones), para auditoría."""
+    almacen = obtener_almacen_uploads()
+    if almacen is None:
+        raise HTTPException(status_code=404, detail="El guardado de uploads está desactivado")
+    huella = huella.lower()
+    if not es_huella(huella):
+        raise HTTPException(status_code=422, detail="La huella debe ser un sha256 en hexadecimal")
+    ruta = await asyncio.to_thread(almacen.buscar, huella)
+    if ruta is None:
+        raise HTTPException(status_code=404, detail="Documento no encontrado o ya vencido")
+    formato = detectar_formato(await asyncio.to_thread(_cabecera, ruta))
+    return FileResponse(
+        ruta,
+        media_type=TIPOS_MIME.get(formato, "application/octet-stream"),
+        # El contenido de una huella nunca cambia
+        headers={"Cache-Control": "private, max-age=31536000, immutable", "X-Content-Type-Options": "nosniff"},
+    )
@@ -0,0 +1,35 @@
+import asyncio
+
+from fastapi import APIRouter, Body, Depends, HTTPException
+
+from utils.auditoria import requiere_auditoria
+from utils.verificaciones import obtener_almacen
+
+router = APIRouter(dependencies=[Depends(requiere_auditoria)])
+
+# Cédulas por consulta en /verificaciones/consulta
+MAX_CEDULAS_CONSULTA = 500
+
+
+async def _consultar(cedulas: list[str]) -> dict:
+    almacen = obtener_almacen()
+    if almacen is None:
+        raise HTTPException(status_code=404, detail="El almacén de verificaciones está desactivado")
+    # El almacén solo guarda el veredicto (sin texto OCR ni depuración)
+    return await asyncio.to_thread(almacen.consultar, cedulas)
+
+
+@router.get("/verificaciones/{cedula}")
+async def verificaciones_conductor(cedula: str):
+    """Veredictos vigentes de un conductor, por tipo de documento."""
+    encontradas = await _consultar([cedula])
+    if not encontradas:
+        raise HTTPException(status_code=422, detail="Cédula inválida")
+    cedula, documentos = next(iter(encontradas.items()))
+    return {"cedula": cedula, "documentos": documentos}
+
+
+@router.post("/verificaciones/consulta")
+async def consultar_verificaciones(cedulas: list[str] = Body(..., embed=True, max_length=MAX_CEDULAS_CONSULTA)):
+    """Consulta en lote: {"cedulas": [...]} -> cédula -> tipo -> veredicto vigente."""
+    return {"verificaciones": await _consultar(cedulas)}
@@ -1,9 +1,67 @@
+import os
+import sys
+
 import uvicorn
 
+# ==============================
+# Perfiles de arranque
+# ==============================
+#
+#   python run.py                -> desarrollo: un proceso con reload en 127.0.0.1
+#   python run.py --produccion   -> producción (o SERVIDOR_MODO=produccion)
+#
+# En producción los núcleos se reparten entre los workers de uvicorn y el
+# pool de OCR de cada uno, de modo que el total de procesos OCR sea igual al
+# número de núcleos. Cada tesseract usa un solo hilo (OMP_THREAD_LIMIT=1):
+# con varios OCR en paralelo, los hilos de OpenMP solo compiten entre sí.
+
+SERVIDOR_MODO = os.getenv("SERVIDOR_MODO", "desarrollo")
+HOST = os.getenv("HOST")
+PORT = int(os.getenv("PORT", "9000"))   # usa el mismo puerto que sí te funcionó
+
+# Hilos de librerías nativas por proceso OCR en producción
+_LIMITES_HILOS = ("OMP_THREAD_LIMIT", "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def nucleos_disponibles() -> int:
+    # Respeta el límite de CPUs del contenedor o de taskset
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def perfil_produccion() -> dict:
+    """Workers de uvicorn y de OCR según los núcleos; deja las variables para los hijos."""
+    nucleos = nucleos_disponibles()
+    # Un worker HTTP cada 4 núcleos (máximo 4): solo reciben y responden, el OCR va al pool
+    workers = int(os.getenv("SERVIDOR_WORKERS", "0")) or max(1, min(4, nucleos // 4))
+    os.environ.setdefault("OCR_WORKERS", str(max(1, nucleos // workers)))
+    for variable in _LIMITES_HILOS:
+        os.environ.setdefault(variable, "1")
+    return {
+        "host": HOST or "0.0.0.0",
+        "port": PORT,
+        "workers": workers,
+        "reload": False,
+        # uvicorn espera las peticiones abiertas y luego el lifespan drena el pool
+        "timeout_graceful_shutdown": int(os.getenv("SERVIDOR_DRENADO", "30")),
+        "proxy_headers": True,
+        "access_log": os.getenv("SERVIDOR_ACCESS_LOG", "0") == "1",
+    }
+
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="127.0.0.1",
-        port=9000,   # usa el mismo puerto que sí te funcionó
-        reload=True
-    )
+    if "--produccion" in sys.argv[1:] or SERVIDOR_MODO == "produccion":
+        opciones = perfil_produccion()
+        print(
+            f"🚀 Producción: {opciones['workers']} workers HTTP x {os.environ['OCR_WORKERS']} workers OCR "
+            f"en {nucleos_disponibles()} núcleos"
+        )
+        uvicorn.run("main:app", **opciones)
+    else:
+        uvicorn.run(
+            "main:app",
+            host=HOST or "127.0.0.1",
+            port=PORT,
+            reload=True
+        )
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos se importan como en el servidor (desde src/server)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,66 @@
+import hashlib
+import os
+
+import pytest
+
+from utils.almacen_uploads import AlmacenUploads
+
+
+def _guardar(almacen: AlmacenUploads, datos: bytes, fecha: float | None = None) -> str:
+    huella = hashlib.sha256(datos).hexdigest()
+    almacen.guardar(datos, huella)
+    if fecha is not None:
+        os.utime(almacen.ruta(huella), (fecha, fecha))
+    return huella
+
+
+def test_el_mismo_documento_ocupa_un_solo_archivo(tmp_path):
+    almacen = AlmacenUploads(str(tmp_path))
+    datos = b"%PDF-1.4 documento"
+    huella = hashlib.sha256(datos).hexdigest()
+
+    assert almacen.guardar(datos, huella) is True
+    os.utime(almacen.ruta(huella), (1000, 1000))
+    assert almacen.guardar(datos, huella) is False
+
+    assert almacen.ruta(huella) == os.path.join(str(tmp_path), huella[:2], huella[2:4], huella)
+    assert os.path.getmtime(almacen.ruta(huella)) > 1000  # se renovó la fecha
+    assert [r for r, _, _ in almacen._archivos()] == [almacen.ruta(huella)]
+    assert almacen.buscar(huella) == almacen.ruta(huella)
+    assert almacen.buscar("../" + huella) is None
+
+
+def test_escritura_fallida_no_deja_archivo_ni_temporal(tmp_path, monkeypatch):
+    almacen = AlmacenUploads(str(tmp_path))
+    datos = b"contenido"
+    huella = hashlib.sha256(datos).hexdigest()
+
+    def fallar(origen, destino):
+        raise OSError("disco lleno")
+
+    monkeypatch.setattr(os, "replace", fallar)
+    with pytest.raises(OSError):
+        almacen.guardar(datos, huella)
+
+    assert almacen.buscar(huella) is None
+    assert os.listdir(os.path.dirname(almacen.ruta(huella))) == []
+
+
+def test_limpieza_por_ttl_y_por_cuota(tmp_path):
+    ahora = 1_000_000.0
+    almacen = AlmacenUploads(str(tmp_path), ttl=100, max_mb=2500 / (1024 * 1024))
+    vencido = _guardar(almacen, b"v" * 1000, ahora - 200)
+    viejo = _guardar(almacen, b"a" * 1000, ahora - 50)
+    medio = _guardar(almacen, b"b" * 1000, ahora - 20)
+    nuevo = _guardar(almacen, b"c" * 1000, ahora - 10)
+    temporal = os.path.join(os.path.dirname(almacen.ruta(nuevo)), "abandonado.tmp")
+    with open(temporal, "wb") as archivo:
+        archivo.write(b"t" * 10)
+    os.utime(temporal, (ahora - 7200, ahora - 7200))
+
+    resumen = almacen.limpiar(ahora)
+
+    assert resumen["borrados"] == {"ttl": 1, "cuota": 1, "temporal": 1}
+    assert resumen["bytes"] == 2000
+    assert [almacen.buscar(h) is not None for h in (vencido, viejo, medio, nuevo)] == [False, False, True, True]
+    assert not os.path.exists(temporal)
@@ -0,0 +1,39 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from fastapi import FastAPI
+
+from benchmarks.ocr_falso import BackendFalso
+from benchmarks.sinteticos import CONDUCTOR, a_jpeg, cedula
+from routes import auto
+from utils import ejecutor
+from utils.ocr_backend import obtener_backend, usar_backend
+
+
+def test_validar_auto_clasifica_y_valida_una_cedula_sintetica(monkeypatch):
+    monkeypatch.setattr(ejecutor, "_pool", ThreadPoolExecutor(max_workers=2))
+    anterior = obtener_backend()
+    usar_backend(BackendFalso(demora_ms=0))
+    app = FastAPI()
+    app.include_router(auto.router)
+
+    async def enviar():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://prueba") as cliente:
+            return await cliente.post(
+                "/validar/auto",
+                files=[("archivos", ("foto.jpg", a_jpeg(cedula()), "image/jpeg"))],
+                data={"cedula": CONDUCTOR["cedula"], "nombreConductor": CONDUCTOR["nombreConductor"]},
+            )
+
+    try:
+        respuesta = asyncio.run(enviar())
+    finally:
+        usar_backend(anterior)
+        ejecutor._pool.shutdown()
+
+    assert respuesta.status_code == 200
+    documento = respuesta.json()["documentos"][0]
+    assert documento["tipo"] == "cedula"
+    assert documento["clasificacion"]["tipo"] == "cedula"
+    assert documento["resultado"]["coincidencias"] == {"cedula": True, "nombre": True}
@@ -0,0 +1,44 @@
+import random
+from difflib import SequenceMatcher
+
+from rapidfuzz import fuzz, process
+
+from utils.coincidencias import mejor_ventana, primera_ventana
+
+
+def _textos(semilla: int, cantidad: int = 300):
+    """Nombres con errores de OCR (incluida la primera letra) dentro de texto de relleno."""
+    azar = random.Random(semilla)
+    relleno = "certificado de afiliacion entidad fecha activo cotizante el la de".split()
+    nombres = ["juan perez gomez", "maria lopez", "ana maria ruiz diaz", "luis"]
+    for _ in range(cantidad):
+        nombre = azar.choice(nombres)
+        leido = list(nombre)
+        for _ in range(azar.randint(0, 4)):
+            leido[azar.randrange(len(leido))] = azar.choice("abcdefghijklmnopqrstuvwxyz0 ")
+        tokens = azar.sample(relleno, azar.randint(0, 8)) + "".join(leido).split() + azar.sample(relleno, 3)
+        yield nombre, tokens
+
+
+def test_mejor_ventana_reporta_la_misma_similitud_que_la_busqueda_completa():
+    for objetivo, tokens in _textos(7):
+        todas = [" ".join(tokens[i:i + t]) for i in range(len(tokens)) for t in range(2, 6) if i + t <= len(tokens)]
+        esperado = process.extractOne(objetivo, todas, scorer=fuzz.ratio) if todas else None
+        candidato, similitud = mejor_ventana(objetivo, tokens, corte=0.55)
+        if esperado is None:
+            assert (candidato, similitud) == (None, 0.0)
+        else:
+            assert (candidato, similitud) == (esperado[0], esperado[1] / 100)
+
+
+def test_primera_ventana_conserva_la_metrica_de_difflib():
+    for objetivo, tokens in _textos(11):
+        tamano = len(objetivo.split()) + 2
+        esperado = None
+        for i in range(len(tokens)):
+            ventana = " ".join(tokens[i:i + tamano])
+            puntaje = SequenceMatcher(None, ventana, objetivo).ratio()
+            if puntaje >= 0.8:
+                esperado = {"match": ventana, "score": puntaje}
+                break
+        assert primera_ventana(objetivo, tokens, tamano, 0.8) == esperado
@@ -0,0 +1,48 @@
+import re
+
+from utils.documento_ocr import DocumentoOCR
+
+
+def _datos(palabras) -> dict:
+    """Dict de image_to_data con una palabra por (texto, renglón, x0, x1)."""
+    datos = {k: [] for k in ("block_num", "par_num", "line_num", "left", "top", "width", "height", "conf", "text")}
+    for texto, renglon, x0, x1 in palabras:
+        for clave, valor in (("block_num", 1), ("par_num", 1), ("line_num", renglon), ("left", x0),
+                             ("top", 30 * renglon), ("width", x1 - x0), ("height", 20), ("conf", 90),
+                             ("text", texto)):
+            datos[clave].append(valor)
+    return datos
+
+
+# Dos columnas: la etiqueta "Número:" a la izquierda, "Fecha expedición" a la derecha
+FORMULARIO = DocumentoOCR.desde_datos(_datos([
+    ("Número:", 1, 10, 90), ("1.095.926.634", 1, 100, 240), ("Fecha", 1, 400, 460), ("expedición", 1, 470, 590),
+    ("12/10/2026", 2, 420, 540),
+    ("APELLIDOS", 3, 10, 240),
+    ("FRANKLIN", 4, 10, 110), ("SERRANO", 4, 120, 230),
+]))
+
+
+def test_derecha_de_solo_mira_el_mismo_renglon():
+    assert [p.texto for p in FORMULARIO.derecha_de("numero", max_palabras=1)] == ["1.095.926.634"]
+    assert [p.texto for p in FORMULARIO.derecha_de("fecha expedicion")] == []
+    assert FORMULARIO.derecha_de("no existe") == []
+
+
+def test_debajo_de_toma_lo_que_se_superpone_con_la_etiqueta():
+    assert [p.texto for p in FORMULARIO.debajo_de("fecha expedicion")] == ["12/10/2026"]
+    assert [p.texto for p in FORMULARIO.debajo_de("apellidos")] == ["FRANKLIN", "SERRANO"]
+    # Nada se superpone con "Número:" debajo: se devuelve el renglón siguiente completo
+    assert [p.texto for p in FORMULARIO.debajo_de("numero")] == ["12/10/2026"]
+
+
+def test_valor_prueba_a_la_derecha_y_luego_debajo():
+    fecha = re.compile(r"\d{8}")
+    assert FORMULARIO.valor("fecha expedicion", fecha).texto == "12/10/2026"
+    assert FORMULARIO.valor("numero", re.compile(r"\d{10}")).texto == "1.095.926.634"
+
+
+def test_desde_texto_usa_columnas_como_caja():
+    documento = DocumentoOCR.desde_texto("Clase de riesgo\n   III     IV")
+    assert [p.texto for p in documento.debajo_de("riesgo")] == ["IV"]
+    assert documento.derecha_de("clase") == [documento.palabras[1], documento.palabras[2]]
@@ -0,0 +1,52 @@
+import asyncio
+
+from benchmarks.sinteticos import CONDUCTOR, a_jpeg, cedula
+from utils import documentos, metricas
+
+
+def _coalescidas() -> float:
+    linea = 'validacion_coalescida_total{tipo="cedula"} '
+    return next((float(l[len(linea):]) for l in metricas.COALESCIDOS.lineas() if l.startswith(linea)), 0)
+
+
+def test_validaciones_identicas_simultaneas_usan_una_sola_llamada_al_pool(monkeypatch):
+    llamadas = []
+
+    async def ejecutar(*args):
+        llamadas.append(args)
+        await asyncio.sleep(0.05)  # sigue en curso cuando llega la copia
+        return {"coincidencias": {"cedula": True, "nombre": True}}, []
+
+    monkeypatch.setattr(documentos, "ejecutar", ejecutar)
+    datos = a_jpeg(cedula())
+    antes = _coalescidas()
+
+    async def enviar_dos_veces():
+        return await asyncio.gather(*(documentos.validar_documento("documento", datos, CONDUCTOR) for _ in range(2)))
+
+    primera, segunda = asyncio.run(enviar_dos_veces())
+
+    assert len(llamadas) == 1
+    assert primera is segunda
+    assert _coalescidas() == antes + 1
+    assert documentos._en_curso == {}
+
+
+def test_datos_distintos_no_se_coalescen(monkeypatch):
+    llamadas = []
+
+    async def ejecutar(*args):
+        llamadas.append(args)
+        return {"coincidencias": {}}, []
+
+    monkeypatch.setattr(documentos, "ejecutar", ejecutar)
+    datos = a_jpeg(cedula())
+
+    async def enviar():
+        return await asyncio.gather(
+            documentos.validar_documento("documento", datos, CONDUCTOR),
+            documentos.validar_documento("documento", datos, {**CONDUCTOR, "cedula": "1"}),
+        )
+
+    asyncio.run(enviar())
+    assert len(llamadas) == 2
@@ -0,0 +1,91 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, UploadFile
+
+from benchmarks.sinteticos import a_jpeg, cedula
+from utils.entrada import MB, DocumentoRechazado, LimiteCuerpo, Presupuesto, leer_documento_subido
+
+
+def _app_con_limite() -> tuple[FastAPI, list]:
+    app = FastAPI()
+    leidos = []
+
+    @app.post("/validar")
+    @app.post("/validar/lote")
+    async def recibir(request: Request):
+        async for bloque in request.stream():
+            leidos.append(len(bloque))
+        return {"bytes": sum(leidos)}
+
+    app.add_middleware(LimiteCuerpo, limite_mb=1, limites_mb={"/validar/lote": 3})
+    return app, leidos
+
+
+def _enviar(app, ruta: str, bloques: int) -> tuple[httpx.Response, int]:
+    enviados = 0
+
+    async def cuerpo():
+        # Sin Content-Length: el tope se aplica contando lo que llega
+        nonlocal enviados
+        for _ in range(bloques):
+            enviados += 1
+            yield b"x" * (MB // 4)
+
+    async def pedir():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://prueba") as cliente:
+            return await cliente.post(ruta, content=cuerpo())
+
+    return asyncio.run(pedir()), enviados
+
+
+def test_cuerpo_se_corta_con_413_mientras_llega():
+    app, leidos = _app_con_limite()
+    respuesta, enviados = _enviar(app, "/validar", bloques=40)
+
+    assert respuesta.status_code == 413
+    assert "1 MB" in respuesta.json()["detail"]
+    assert enviados < 40 and sum(leidos) <= MB
+
+
+def test_el_lote_tiene_su_propio_tope():
+    app, _ = _app_con_limite()
+    assert _enviar(app, "/validar/lote", bloques=8)[0].status_code == 200
+    assert _enviar(app, "/validar/lote", bloques=13)[0].status_code == 413
+
+
+def test_content_length_grande_se_rechaza_sin_leer():
+    app, leidos = _app_con_limite()
+
+    async def pedir():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://prueba") as cliente:
+            return await cliente.post("/validar", content=b"x" * (2 * MB))
+
+    assert asyncio.run(pedir()).status_code == 413
+    assert leidos == []
+
+
+def test_presupuesto_por_peticion_suma_todos_los_documentos():
+    datos = a_jpeg(cedula())
+    presupuesto = Presupuesto(max_bytes=len(datos) * 1.5)
+
+    async def leer_dos():
+        primero = await leer_documento_subido(UploadFile(io.BytesIO(datos)), presupuesto)
+        await leer_documento_subido(UploadFile(io.BytesIO(datos)), presupuesto)
+        return primero
+
+    with pytest.raises(DocumentoRechazado) as rechazo:
+        asyncio.run(leer_dos())
+    assert rechazo.value.estado == 413
+    assert presupuesto.bytes == pytest.approx(len(datos) * 0.5)
+
+
+def test_presupuesto_de_megapixeles():
+    presupuesto = Presupuesto(max_megapixeles=2)
+    presupuesto.consumir(100, 1.5)
+    with pytest.raises(DocumentoRechazado) as rechazo:
+        presupuesto.consumir(100, 1.0)
+    assert rechazo.value.estado == 413
+    assert presupuesto.megapixeles == pytest.approx(0.5)
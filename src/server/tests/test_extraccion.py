@@ -0,0 +1,45 @@
+import random
+import re
+from datetime import datetime
+
+from utils.extraccion import PALABRAS_CLAVE, PATRON_CEDULA, Automata, extraer
+
+
+def _busqueda_ingenua(palabras, texto: str) -> dict[str, list[int]]:
+    encontradas = {}
+    for palabra in palabras:
+        posiciones = [i for i in range(len(texto)) if texto.startswith(palabra, i)]
+        if posiciones:
+            encontradas[palabra] = posiciones
+    return encontradas
+
+
+def test_automata_igual_a_la_busqueda_ingenua():
+    azar = random.Random(7)
+    trozos = list(PALABRAS_CLAVE) + ["de", "la", " ", "123", "a", "s", "fondo de", "clase clas"]
+    for _ in range(200):
+        texto = "".join(azar.choice(trozos) for _ in range(azar.randint(0, 40)))
+        assert Automata(PALABRAS_CLAVE).buscar(texto) == _busqueda_ingenua(PALABRAS_CLAVE, texto)
+
+
+def test_automata_con_palabras_solapadas():
+    palabras = ("he", "she", "his", "hers", "a", "aa")
+    for texto in ("ushers", "ahishers", "aaaa", "shehe", ""):
+        assert Automata(palabras).buscar(texto) == _busqueda_ingenua(palabras, texto)
+
+
+def test_extraccion_igual_a_buscar_por_separado():
+    texto = (
+        "CONSTANCIA DE AFILIACIÓN  NIT 800.229.739-0\n"
+        "El señor HERNY SERRANO identificado con CC 1095926634 se encuentra ACTIVO.\n"
+        "Clase de riesgo: 3. Fecha de expedición 09/10/2026, afiliado desde 5 de mayo de 2024."
+    )
+    resultado = extraer(texto)
+    plano = resultado.texto
+
+    assert resultado.palabras == _busqueda_ingenua(PALABRAS_CLAVE, plano)
+    assert [f for f, _ in resultado.fechas] == [datetime(2026, 10, 9), datetime(2024, 5, 5)]
+    cedulas = [re.sub(r"\D", "", c) for c in PATRON_CEDULA.findall(plano)]
+    assert resultado.candidatos() == cedulas
+    assert "1095926634" in resultado.candidatos()
+    assert resultado.clase_riesgo() == 3
@@ -0,0 +1,7 @@
+from utils.metricas import Contador
+
+
+def test_etiquetas_se_escapan_en_la_exportacion():
+    contador = Contador("prueba_total", "Prueba")
+    contador.inc(tipo='a"b\\c\nd')
+    assert list(contador.lineas()) == ['prueba_total{tipo="a\\"b\\\\c\\nd"} 1']
@@ -0,0 +1,34 @@
+import sys
+import types
+
+from PIL import Image
+
+from utils.ocr_backend import BackendConRespaldo, BackendOCR, BackendTesserocr
+
+
+class Respaldo(BackendOCR):
+    nombre = "respaldo"
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def texto(self, imagen, lang="spa", config=""):
+        self.llamadas += 1
+        return "texto de respaldo"
+
+
+def test_motor_que_no_se_puede_crear_cae_al_respaldo(monkeypatch):
+    def api_rota(**kwargs):
+        raise RuntimeError("Failed to init API, possibly an invalid tessdata path")
+
+    monkeypatch.setitem(sys.modules, "tesserocr", types.SimpleNamespace(PyTessBaseAPI=api_rota))
+    principal = BackendTesserocr(motores_por_config=1, espera=1)
+    respaldo = Respaldo()
+    backend = BackendConRespaldo(principal, respaldo)
+    imagen = Image.new("L", (10, 10), 255)
+
+    # El segundo llamado antes se quedaba esperando en pool.get() para siempre
+    assert backend.texto(imagen, lang="xxx") == "texto de respaldo"
+    assert backend.texto(imagen, lang="xxx") == "texto de respaldo"
+    assert respaldo.llamadas == 2
+    assert principal._creados[("xxx", "")] == 0
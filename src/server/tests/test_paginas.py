@@ -0,0 +1,132 @@
+import asyncio
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pymupdf
+from PIL import Image
+
+from utils import ejecutor, pdf
+from utils.documento_ocr import CLAVE_PAGINAS, DocumentoOCR, leer_pdf
+from utils.entrada import inspeccionar
+from utils.ocr_backend import BackendOCR, obtener_backend, usar_backend
+from utils.paginas import campos_encontrados, contar_paginas, leer_paginas
+
+
+def _varios_cuadros(formato: str, **opciones) -> bytes:
+    blanca, negra = Image.new("RGB", (60, 40), "white"), Image.new("RGB", (60, 40), "black")
+    salida = io.BytesIO()
+    blanca.save(salida, formato, save_all=True, append_images=[negra], **opciones)
+    return salida.getvalue()
+
+
+def test_tiff_de_dos_paginas():
+    datos = _varios_cuadros("TIFF", compression="raw")
+    assert contar_paginas(datos) == 2
+    assert inspeccionar(datos)["paginas"] == 2
+
+
+def test_cuadros_de_un_jpeg_mpo_no_son_paginas():
+    datos = _varios_cuadros("MPO")
+    assert Image.open(io.BytesIO(datos)).n_frames == 2
+    assert contar_paginas(datos) == 1
+    assert inspeccionar(datos)["paginas"] == 1
+
+
+class Contador(BackendOCR):
+    nombre = "contador"
+
+    def __init__(self):
+        self.llamadas = 0
+
+    def texto(self, imagen, lang="spa", config=""):
+        self.llamadas += 1
+        return ""
+
+    def datos(self, imagen, lang="spa", config=""):
+        self.llamadas += 1
+        return {k: [] for k in ("block_num", "par_num", "line_num", "left", "top", "width", "height", "conf", "text")}
+
+
+def test_primera_pagina_ya_leida_no_se_vuelve_a_leer(monkeypatch):
+    monkeypatch.setattr(ejecutor, "_pool", ThreadPoolExecutor(max_workers=2))
+    anterior, contador = obtener_backend(), Contador()
+    usar_backend(contador)
+    primera = DocumentoOCR.desde_texto(
+        "Certificado de afiliación\nHERNY YULIAN FRANKLIN SERRANO CC 1095926634\nFecha de expedición 12/10/2026"
+    )
+    try:
+        fuente, resumen = asyncio.run(leer_paginas(
+            "documentoEPS", _varios_cuadros("TIFF", compression="raw"),
+            "Herny Yulian Franklin Serrano", "1095926634", primera=primera,
+        ))
+    finally:
+        usar_backend(anterior)
+        ejecutor._pool.shutdown()
+
+    assert contador.llamadas == 0
+    assert resumen == {"leidas": [1], "total": 2}
+    assert fuente.documentos[CLAVE_PAGINAS] is primera
+
+
+def test_clase_de_riesgo_en_romanos_no_toma_el_digito_de_la_fecha():
+    romanos = DocumentoOCR.desde_texto("Clase de riesgo: IV 12/13/2024")
+    assert campos_encontrados(romanos, ("riesgo",), None, None)
+    # Sin valor después de la etiqueta no hay clase, aunque la fecha tenga dígitos 1-5
+    sin_valor = DocumentoOCR.desde_texto("Clase de riesgo\nFecha 12/10/2026")
+    assert not campos_encontrados(sin_valor, ("riesgo",), None, None)
+
+
+def _pdf_mixto() -> bytes:
+    """Tres páginas: texto embebido, escaneada (sin texto) y texto embebido."""
+    documento = pymupdf.open()
+    for texto in ("Certificado de afiliación HERNY YULIAN FRANKLIN SERRANO", None, "Documento CC 1095926634"):
+        pagina = documento.new_page()
+        if texto:
+            pagina.insert_text((72, 72), texto)
+    return documento.tobytes()
+
+
+def _contar_aperturas(monkeypatch) -> list:
+    aperturas = []
+    abrir = pdf._abrir
+
+    def contar(datos):
+        aperturas.append(1)
+        return abrir(datos)
+
+    monkeypatch.setattr(pdf, "_abrir", contar)
+    return aperturas
+
+
+def test_pdf_se_abre_una_vez_y_solo_la_pagina_escaneada_va_al_pool(monkeypatch):
+    monkeypatch.setattr(ejecutor, "_pool", ThreadPoolExecutor(max_workers=2))
+    anterior, contador = obtener_backend(), Contador()
+    usar_backend(contador)
+    aperturas = _contar_aperturas(monkeypatch)
+    try:
+        fuente, resumen = asyncio.run(leer_paginas(
+            "documentoEPS", _pdf_mixto(), "Herny Yulian Franklin Serrano", "1095926634",
+        ))
+    finally:
+        usar_backend(anterior)
+        ejecutor._pool.shutdown()
+
+    # Capa de texto de todas las páginas + rasterizar la escaneada
+    assert len(aperturas) == 2
+    assert contador.llamadas == 1
+    assert resumen == {"leidas": [1, 2, 3], "total": 3}
+    assert "1095926634" in fuente.documentos[CLAVE_PAGINAS].texto
+
+
+def test_leer_pdf_sin_ocr_omite_las_paginas_escaneadas(monkeypatch):
+    anterior, contador = obtener_backend(), Contador()
+    usar_backend(contador)
+    aperturas = _contar_aperturas(monkeypatch)
+    try:
+        documento = leer_pdf(_pdf_mixto(), ocr_sin_texto=False)
+    finally:
+        usar_backend(anterior)
+
+    assert len(aperturas) == 1
+    assert contador.llamadas == 0
+    assert "SERRANO" in documento.texto and "1095926634" in documento.texto
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import httpx
+
+import main
+from routes import trabajos as rutas
+from utils import respuesta
+from utils.respuesta import FormaRespuesta
+from utils.trabajos import COMPLETADO, AlmacenMemoria, ColaTrabajos
+
+RESULTADO = {
+    "coincidencias": {"cedula": True, "nombre": True},
+    "metricas": {"confianzaOCR": 91.5},
+    "textoCedula": "REPUBLICA DE COLOMBIA " * 60,
+    "debug": {"numerosEncontrados": ["1095926634"]},
+}
+
+
+def test_verbosidades_y_campos():
+    assert FormaRespuesta("completa").documento(RESULTADO) == RESULTADO
+
+    normal = FormaRespuesta("normal", max_texto=10).documento(RESULTADO)
+    assert normal["textoCedula"] == "REPUBLICA "
+    assert "debug" not in normal and normal["metricas"] == RESULTADO["metricas"]
+
+    assert FormaRespuesta("minima").documento(RESULTADO) == {
+        "coincidencias": RESULTADO["coincidencias"], "metricas": RESULTADO["metricas"],
+    }
+    assert FormaRespuesta("completa", campos=["coincidencias"]).documento({**RESULTADO, "error": "x"}) == {
+        "coincidencias": RESULTADO["coincidencias"], "error": "x",
+    }
+
+
+def _consultar(monkeypatch, consulta: str) -> httpx.Response:
+    almacen = AlmacenMemoria()
+    almacen.crear("t1", {}, {}, time.time())
+    almacen.actualizar("t1", estado=COMPLETADO, terminado=time.time(), resultados={"cedula": RESULTADO})
+    monkeypatch.setattr(rutas, "cola_trabajos", ColaTrabajos(almacen, workers=0))
+
+    async def pedir():
+        transporte = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transporte, base_url="http://prueba") as cliente:
+            return await cliente.get("/trabajos/t1" + consulta, headers={"Accept-Encoding": "gzip"})
+
+    return asyncio.run(pedir())
+
+
+def test_consulta_aplica_la_forma_y_comprime_desde_el_minimo(monkeypatch):
+    grande = _consultar(monkeypatch, "")
+    assert len(grande.content) >= respuesta.RESPUESTA_GZIP_MINIMO
+    assert grande.headers["content-encoding"] == "gzip"
+    assert grande.json()["resultados"]["cedula"] == RESULTADO
+
+    chica = _consultar(monkeypatch, "?verbosidad=minima&campos=coincidencias")
+    assert len(chica.content) < respuesta.RESPUESTA_GZIP_MINIMO
+    assert "content-encoding" not in chica.headers
+    assert chica.json()["resultados"]["cedula"] == {"coincidencias": RESULTADO["coincidencias"]}
@@ -0,0 +1,48 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.ocr_falso import BackendFalso
+from utils import ejecutor
+from utils.ocr_backend import BackendOCR, obtener_backend, usar_backend
+
+
+class SinIdiomas(BackendOCR):
+    nombre = "sin_idiomas"
+
+    def texto(self, imagen, lang="spa", config=""):
+        raise RuntimeError("Failed loading language 'spa'")
+
+
+def test_pool_que_no_calienta_no_queda_listo(monkeypatch):
+    monkeypatch.setattr(ejecutor, "estado_servidor", dict(ejecutor.estado_servidor))
+    monkeypatch.setattr(ejecutor, "OCR_WORKERS", 1)
+    # Hilos: el backend de prueba tiene que ser el mismo que ven los workers
+    monkeypatch.setattr(ejecutor, "_pool", ThreadPoolExecutor(max_workers=1))
+    anterior = obtener_backend()
+    usar_backend(SinIdiomas())
+    try:
+        asyncio.run(ejecutor.calentar_pool())
+    finally:
+        usar_backend(anterior)
+        ejecutor._pool.shutdown()
+
+    assert ejecutor.estado_servidor["calentado"] is False
+    assert ejecutor.estado_servidor["workersCalentados"] == 0
+    assert "spa" in ejecutor.estado_servidor["error"]
+
+
+def test_pool_con_menos_workers_que_los_esperados_no_queda_listo(monkeypatch):
+    monkeypatch.setattr(ejecutor, "estado_servidor", dict(ejecutor.estado_servidor))
+    monkeypatch.setattr(ejecutor, "OCR_WORKERS", 3)
+    monkeypatch.setattr(ejecutor, "_pool", ThreadPoolExecutor(max_workers=2))
+    anterior = obtener_backend()
+    usar_backend(BackendFalso(demora_ms=0))
+    try:
+        asyncio.run(ejecutor.calentar_pool())
+    finally:
+        usar_backend(anterior)
+        ejecutor._pool.shutdown()
+
+    assert ejecutor.estado_servidor["calentado"] is False
+    assert ejecutor.estado_servidor["workersCalentados"] <= 2
+    assert "de 3 workers" in ejecutor.estado_servidor["error"]
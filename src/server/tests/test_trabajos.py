@@ -0,0 +1,31 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from routes import trabajos as rutas
+from utils.trabajos import AlmacenMemoria, ColaTrabajos
+
+
+def test_cola_llena_responde_429_con_retry_after(monkeypatch):
+    # Sin workers nada drena la cola: el segundo envío ya no cabe
+    cola = ColaTrabajos(AlmacenMemoria(), max_cola=1, workers=0)
+    monkeypatch.setattr(rutas, "cola_trabajos", cola)
+    app = FastAPI()
+    app.include_router(rutas.router)
+    formulario = {"cedula": "1095926634", "nombreConductor": "Herny Yulian Franklin Serrano"}
+
+    async def enviar_dos():
+        await cola.iniciar()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://prueba") as cliente:
+                return [await cliente.post("/trabajos", data=formulario) for _ in range(2)]
+        finally:
+            await cola.detener()
+
+    aceptado, rechazado = asyncio.run(enviar_dos())
+
+    assert aceptado.status_code == 202
+    assert aceptado.json()["enCola"] == 1
+    assert rechazado.status_code == 429
+    assert int(rechazado.headers["Retry-After"]) == cola.reintentar_en() >= 1
@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from routes import uploads, verificaciones as rutas
+from utils import auditoria, verificaciones
+from utils.verificaciones import AlmacenVerificaciones
+
+RESULTADO = {
+    "coincidencias": {"cedula": True, "nombre": True},
+    "textoCedula": "REPUBLICA DE COLOMBIA NUMERO 1.095.926.634",
+    "debug": {"numerosEncontrados": ["1095926634"]},
+}
+
+
+def test_solo_se_guarda_el_veredicto_y_de_la_misma_version(tmp_path):
+    almacen = AlmacenVerificaciones(str(tmp_path / "v.sqlite3"), version="a")
+    assert almacen.guardar("1095926634", "cedula", "h" * 64, ["1095926634"], RESULTADO)
+
+    assert almacen.buscar("1095926634", "cedula", "h" * 64, ["1095926634"]) == {
+        "coincidencias": {"cedula": True, "nombre": True}
+    }
+    otra_version = AlmacenVerificaciones(str(tmp_path / "v.sqlite3"), version="b")
+    assert otra_version.buscar("1095926634", "cedula", "h" * 64, ["1095926634"]) is None
+
+
+def _pedir(ruta: str, **cabeceras) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(rutas.router)
+    app.include_router(uploads.router)
+
+    async def pedir():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://prueba") as cliente:
+            return await cliente.get(ruta, headers=cabeceras)
+
+    return asyncio.run(pedir())
+
+
+def test_rutas_de_auditoria_piden_token(tmp_path, monkeypatch):
+    almacen = AlmacenVerificaciones(str(tmp_path / "v.sqlite3"))
+    almacen.guardar("1095926634", "cedula", "h" * 64, ["1095926634"], RESULTADO)
+    monkeypatch.setattr(verificaciones, "_almacen", almacen)
+
+    monkeypatch.setattr(auditoria, "AUDITORIA_TOKEN", "")
+    assert _pedir("/verificaciones/1095926634").status_code == 404
+    assert _pedir("/uploads/" + "a" * 64).status_code == 404
+
+    monkeypatch.setattr(auditoria, "AUDITORIA_TOKEN", "secreto")
+    assert _pedir("/verificaciones/1095926634").status_code == 401
+    assert _pedir("/verificaciones/1095926634", Authorization="Bearer otro").status_code == 401
+    assert _pedir("/uploads/" + "a" * 64).status_code == 401
+
+    respuesta = _pedir("/verificaciones/1095926634", Authorization="Bearer secreto")
+    assert respuesta.status_code == 200
+    guardado = respuesta.json()["documentos"]["cedula"]["resultado"]
+    assert "textoCedula" not in guardado and "debug" not in guardado
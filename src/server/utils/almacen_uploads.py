@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import time
+
+from utils import metricas
+
+# ==============================
+# Copias de los documentos subidos
+# ==============================
+#
+# Con GUARDAR_UPLOADS=1 cada documento aceptado se guarda para auditoría
+# con el sha256 de su contenido como nombre, repartido en subcarpetas por
+# los primeros caracteres (uploads/ab/cd/abcd...): ningún directorio crece
+# sin control y el mismo documento subido dos veces ocupa un solo archivo
+# (solo se le renueva la fecha). La escritura va a un temporal en la misma
+# carpeta y se publica con os.replace, así nunca queda un archivo a medias.
+# Un limpiador en segundo plano borra lo que pasó de UPLOADS_TTL y, si el
+# total supera UPLOADS_MAX_MB, los más antiguos hasta volver a la cuota.
+
+GUARDAR_UPLOADS = os.getenv("GUARDAR_UPLOADS", "0") == "1"
+UPLOADS_DIR = os.getenv("UPLOADS_DIR", "./uploads")
+UPLOADS_TTL = int(os.getenv("UPLOADS_TTL", str(30 * 24 * 3600)))  # segundos
+UPLOADS_MAX_MB = float(os.getenv("UPLOADS_MAX_MB", "2048"))
+UPLOADS_LIMPIEZA_INTERVALO = int(os.getenv("UPLOADS_LIMPIEZA_INTERVALO", "600"))  # segundos
+
+_HUELLA = re.compile(r"[0-9a-f]{64}")
+_SUFIJO_TEMPORAL = ".tmp"
+# Un temporal más viejo que esto quedó de un proceso que murió escribiendo
+_TEMPORAL_ABANDONADO = 3600
+
+
+def es_huella(texto: str) -> bool:
+    return bool(_HUELLA.fullmatch(texto or ""))
+
+
+class AlmacenUploads:
+    """Documentos por sha256 en carpetas repartidas, con vencimiento y cuota."""
+
+    def __init__(self, directorio: str, ttl: int = UPLOADS_TTL, max_mb: float = UPLOADS_MAX_MB):
+        self.directorio = os.path.abspath(directorio)
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        os.makedirs(self.directorio, exist_ok=True)
+
+    def ruta(self, huella: str) -> str:
+        return os.path.join(self.directorio, huella[:2], huella[2:4], huella)
+
+    def guardar(self, datos: bytes, huella: str) -> bool:
+        """Guarda el documento; False si ya estaba (solo se renueva su fecha)."""
+        destino = self.ruta(huella)
+        try:
+            os.utime(destino)
+            metricas.registrar(metricas.UPLOADS_GUARDADOS.nombre, "inc", resultado="duplicado")
+            return False
+        except FileNotFoundError:
+            pass
+        carpeta = os.path.dirname(destino)
+        os.makedirs(carpeta, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(dir=carpeta, prefix=huella[:8], suffix=_SUFIJO_TEMPORAL)
+        try:
+            with os.fdopen(descriptor, "wb") as archivo:
+                archivo.write(datos)
+            os.replace(temporal, destino)
+        except BaseException:
+            try:
+                os.remove(temporal)
+            except OSError:
+                pass
+            raise
+        metricas.registrar(metricas.UPLOADS_GUARDADOS.nombre, "inc", resultado="nuevo")
+        return True
+
+    def buscar(self, huella: str) -> str | None:
+        """Ruta del documento guardado con esa huella, o None."""
+        if not es_huella(huella):
+            return None
+        destino = self.ruta(huella)
+        return destino if os.path.isfile(destino) else None
+
+    def _archivos(self):
+        """(ruta, tamaño, fecha) de cada archivo de las carpetas repartidas."""
+        for primero in os.scandir(self.directorio):
+            if not primero.is_dir():
+                continue
+            for segundo in os.scandir(primero.path):
+                if not segundo.is_dir():
+                    continue
+                for entrada in os.scandir(segundo.path):
+                    try:
+                        info = entrada.stat()
+                    except FileNotFoundError:
+                        continue  # lo borró otro proceso
+                    yield entrada.path, info.st_size, info.st_mtime
+
+    def limpiar(self, ahora: float | None = None) -> dict:
+        """Borra vencidos y temporales abandonados; luego los más antiguos si se pasa de la cuota."""
+        ahora = ahora or time.time()
+        borrados = {"ttl": 0, "cuota": 0, "temporal": 0}
+        vigentes = []
+        for ruta, tamano, fecha in self._archivos():
+            if ruta.endswith(_SUFIJO_TEMPORAL):
+                motivo = "temporal" if fecha < ahora - _TEMPORAL_ABANDONADO else None
+            else:
+                motivo = "ttl" if fecha < ahora - self.ttl else None
+            if motivo is None:
+                vigentes.append((fecha, tamano, ruta))
+            elif _borrar(ruta):
+                borrados[motivo] += 1
+
+        total = sum(tamano for _, tamano, _ in vigentes)
+        if total > self.max_bytes:
+            vigentes.sort()
+            for fecha, tamano, ruta in vigentes:
+                if total <= self.max_bytes:
+                    break
+                if not ruta.endswith(_SUFIJO_TEMPORAL) and _borrar(ruta):
+                    borrados["cuota"] += 1
+                    total -= tamano
+
+        for motivo, cantidad in borrados.items():
+            if cantidad:
+                metricas.registrar(metricas.UPLOADS_ELIMINADOS.nombre, "inc", cantidad, motivo=motivo)
+        metricas.registrar(metricas.UPLOADS_BYTES.nombre, "fijar", total)
+        return {"bytes": total, "borrados": borrados}
+
+    def migrar_planos(self) -> int:
+        """Pasa a las carpetas repartidas los archivos sueltos del formato anterior (uploads/<nombre>)."""
+        movidos = 0
+        for entrada in os.scandir(self.directorio):
+            if not entrada.is_file() or entrada.name.endswith(_SUFIJO_TEMPORAL):
+                continue
+            with open(entrada.path, "rb") as archivo:
+                huella = hashlib.sha256(archivo.read()).hexdigest()
+            destino = self.ruta(huella)
+            if os.path.exists(destino):
+                _borrar(entrada.path)
+            else:
+                os.makedirs(os.path.dirname(destino), exist_ok=True)
+                os.replace(entrada.path, destino)
+            movidos += 1
+        return movidos
+
+    async def limpiar_periodicamente(self, intervalo: int = UPLOADS_LIMPIEZA_INTERVALO):
+        try:
+            movidos = await asyncio.to_thread(self.migrar_planos)
+            if movidos:
+                print(f"📦 {movidos} uploads del formato anterior movidos a {self.directorio}")
+        except OSError as e:
+            print(f"⚠️ No se pudieron migrar los uploads de {self.directorio}: {e}")
+        while True:
+            try:
+                await asyncio.to_thread(self.limpiar)
+            except OSError as e:
+                print(f"⚠️ No se pudo limpiar {self.directorio}: {e}")
+            await asyncio.sleep(intervalo)
+
+
+def _borrar(ruta: str) -> bool:
+    try:
+        os.remove(ruta)
+        return True
+    except FileNotFoundError:
+        return False  # otro worker HTTP lo borró primero
+
+
+_almacen: AlmacenUploads | None = None
+
+
+def obtener_almacen_uploads() -> AlmacenUploads | None:
+    """Almacén de copias del proceso; None si GUARDAR_UPLOADS está apagado."""
+    global _almacen
+    if _almacen is None and GUARDAR_UPLOADS:
+        _almacen = AlmacenUploads(UPLOADS_DIR)
+    return _almacen
+
+
+async def guardar_copia(datos: bytes):
+    """Copia para auditoría si GUARDAR_UPLOADS está activo; los documentos se validan en memoria."""
+    almacen = obtener_almacen_uploads()
+    if almacen is not None:
+        await asyncio.to_thread(almacen.guardar, datos, hashlib.sha256(datos).hexdigest())
@@ -0,0 +1,25 @@
+import hmac
+import os
+
+from fastapi import Header, HTTPException
+
+# ==============================
+# Acceso a las rutas de auditoría
+# ==============================
+#
+# /verificaciones y /uploads devuelven veredictos y documentos de conductores
+# identificados por cédula o por huella, así que no quedan abiertos como
+# /validar: piden "Authorization: Bearer <AUDITORIA_TOKEN>". Sin el token
+# configurado las rutas responden 404, como si no existieran.
+
+AUDITORIA_TOKEN = os.getenv("AUDITORIA_TOKEN", "")
+
+
+def requiere_auditoria(authorization: str | None = Header(None)):
+    """Dependencia de las rutas de auditoría: 404 sin token configurado, 401 con uno inválido."""
+    if not AUDITORIA_TOKEN:
+        raise HTTPException(status_code=404, detail="Las rutas de auditoría están desactivadas (AUDITORIA_TOKEN)")
+    esquema, _, token = (authorization or "").partition(" ")
+    if esquema.lower() != "bearer" or not hmac.compare_digest(token.strip().encode(), AUDITORIA_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Token de auditoría inválido",
+                            headers={"WWW-Authenticate": "Bearer"})
@@ -0,0 +1,120 @@
+import os
+import re
+
+from utils import metricas
+from utils.documento_ocr import DocumentoOCR, leer_pdf
+from utils.extraccion import normalizar_para_busqueda
+from utils.niveles import CLAVE_RAPIDA, leer_rapido
+from utils.ocr import preparar_fuente
+
+# ==============================
+# Clasificación de documentos sin etiqueta
+# ==============================
+#
+# /validar/auto recibe archivos sueltos, sin decir cuál es la cédula y cuál
+# el certificado. El tipo se decide con palabras clave sobre la misma
+# lectura barata que usan los validadores (capa de texto del PDF o página
+# reducida a OCR_LADO_RAPIDO) más una pista de forma: la cédula es una
+# tarjeta apaisada con poco texto. Ese documento viaja con la Fuente al
+# validador, así que el archivo se lee una sola vez.
+
+# Puntaje mínimo del mejor tipo; por debajo el documento queda sin clasificar
+CLASIFICADOR_MINIMO = float(os.getenv("CLASIFICADOR_MINIMO", "3"))
+
+# tipo -> (frase normalizada, peso); las frases largas pesan más que una sigla suelta
+PALABRAS_CLAVE = {
+    "cedula": (
+        ("cedula de ciudadania", 3), ("identificacion personal", 3), ("republica de colombia", 2),
+        ("registraduria", 2), ("nuip", 2), ("apellidos", 1), ("nombres", 1),
+        ("fecha de nacimiento", 1), ("lugar de nacimiento", 1), ("estatura", 1), ("sexo", 1),
+    ),
+    "eps": (
+        ("eps", 3), ("entidad promotora de salud", 3), ("sistema general de seguridad social en salud", 2),
+        ("regimen contributivo", 2), ("adres", 2), ("salud", 1), ("cotizante", 1), ("beneficiario", 1),
+    ),
+    "arl": (
+        ("arl", 3), ("riesgos laborales", 3), ("riesgos profesionales", 3), ("clase de riesgo", 3),
+        ("administradora de riesgos", 2), ("positiva", 1), ("colmena", 1), ("riesgo", 1),
+    ),
+    "pension": (
+        ("pensiones", 3), ("pension", 3), ("colpensiones", 3), ("porvenir", 2), ("colfondos", 2),
+        ("skandia", 2), ("fondo de pensiones", 2), ("afp", 1),
+    ),
+    "proteccion": (
+        ("proteccion", 3), ("fondo de pensiones obligatorias", 3), ("proteccion s a", 2),
+    ),
+    "formato": (
+        ("formato de creacion", 4), ("codigo transportador", 3), ("transportador", 2),
+        ("creacion de conductor", 3), ("conductor", 1),
+    ),
+}
+
+# tipo clasificado -> campo del formulario cuyo validador lo revisa
+CAMPO_POR_TIPO = {
+    "cedula": "documento",
+    "eps": "certificadoEPS",
+    "arl": "certificadoARL",
+    "pension": "certificadoPension",
+    "proteccion": "certificadoPension",
+    "formato": "formatoCreacion",
+}
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]+")
+# Una tarjeta (cédula) tiene proporción cercana a 1.58 y pocas palabras
+_PROPORCION_TARJETA = (1.3, 1.9)
+_PALABRAS_TARJETA = 60
+
+
+def puntajes(texto: str, tamano: tuple[int, int] | None = None, num_palabras: int | None = None) -> dict[str, float]:
+    """tipo -> puntaje por palabras clave (y forma, si se conoce el tamaño)."""
+    plano = f" {_NO_ALFANUMERICO.sub(' ', normalizar_para_busqueda(texto)).strip()} "
+    resultado = {
+        tipo: sum(peso for frase, peso in frases if f" {frase} " in plano)
+        for tipo, frases in PALABRAS_CLAVE.items()
+    }
+    # Protección también es un fondo de pensiones: no debe ganar "pension" por sus mismas palabras
+    if resultado["proteccion"]:
+        resultado["proteccion"] += resultado["pension"]
+    if tamano and num_palabras is not None:
+        ancho, alto = tamano
+        if _PROPORCION_TARJETA[0] <= ancho / alto <= _PROPORCION_TARJETA[1] and num_palabras <= _PALABRAS_TARJETA:
+            resultado["cedula"] += 2
+    return resultado
+
+
+def clasificar(documento: DocumentoOCR, tamano: tuple[int, int] | None = None) -> dict:
+    """{"tipo", "puntaje", "confianza", "puntajes"}; tipo None si ningún tipo alcanza el mínimo."""
+    with metricas.etapa("clasificacion"):
+        por_tipo = puntajes(documento.texto, tamano, len(documento.palabras))
+        orden = sorted(por_tipo.items(), key=lambda par: par[1], reverse=True)
+        (tipo, mejor), (_, segundo) = orden[0], orden[1]
+    return {
+        "tipo": tipo if mejor >= CLASIFICADOR_MINIMO else None,
+        "puntaje": mejor,
+        # Qué tanto se separa del segundo: 1 = ningún otro tipo tuvo puntos
+        "confianza": round((mejor - segundo) / mejor, 2) if mejor else 0.0,
+        "puntajes": {t: p for t, p in orden if p},
+    }
+
+
+def clasificar_documento(datos: bytes) -> tuple[dict, dict]:
+    """Corre en el pool: (clasificación, documentos ya leídos para la Fuente del validador)."""
+    fuente = preparar_fuente(datos)
+    # Las páginas escaneadas de un PDF no se leen para clasificar: alcanza con las que tienen texto
+    documento = leer_pdf(fuente, ocr_sin_texto=False) if fuente.es_pdf else None
+    tamano = None
+    if documento is None:
+        documento = leer_rapido(fuente)
+        tamano = fuente.imagen_ocr().size
+    # Solo se devuelven los DocumentoOCR (sin las imágenes decodificadas)
+    documentos = {
+        clave: fuente.documentos[clave] for clave in (CLAVE_RAPIDA, ("pdf", "spa")) if clave in fuente.documentos
+    }
+    return clasificar(documento, tamano), documentos
+
+
+def medir_clasificacion(datos: bytes):
+    """Corre en el pool: (clasificación, documentos, muestras de métricas)."""
+    with metricas.recolectar("clasificacion") as muestras:
+        clasificacion, documentos = clasificar_documento(datos)
+    return clasificacion, documentos, muestras
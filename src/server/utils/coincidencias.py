@@ -0,0 +1,114 @@
+from difflib import SequenceMatcher
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from utils.metricas import etapa
+
+# ==============================
+# Búsqueda aproximada de nombres en texto OCR
+# ==============================
+#
+# Los validadores comparan un nombre esperado contra ventanas de 2-5 palabras
+# del texto. En lugar de armar todas las ventanas y compararlas una por una,
+# aquí se descartan antes las que por longitud no pueden llegar al umbral y
+# el resto se puntúa en lote con rapidfuzz. La poda no cambia el resultado:
+# si ninguna ventana llega al umbral se puntúan todas, para reportar la
+# misma similitud que la búsqueda completa.
+
+
+def tokenizar(texto: str) -> list[str]:
+    return texto.split()
+
+
+def _rango_longitud(longitud: int, corte: float) -> tuple[float, float]:
+    """Longitudes de candidato con las que fuzz.ratio todavía puede llegar a `corte` (0-1).
+
+    ratio = 2·M / (la + lb) <= 2·min(la, lb) / (la + lb), así que fuera de
+    este rango el puntaje es menor que el corte sin necesidad de calcularlo.
+    """
+    if corte <= 0:
+        return 0, float("inf")
+    return longitud * corte / (2 - corte), longitud * (2 - corte) / corte
+
+
+def ventanas(tokens: list[str], min_palabras: int = 2, max_palabras: int = 5,
+             objetivo: str | None = None, corte: float = 0.0) -> list[str]:
+    """Ventanas de `min_palabras` a `max_palabras` tokens consecutivos.
+
+    Con `objetivo` y `corte` se omiten las ventanas cuya longitud hace
+    imposible alcanzar el corte.
+    """
+    n = len(tokens)
+    if n == 0:
+        return []
+    largos = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=n)
+    acumulado = np.concatenate(([0], np.cumsum(largos)))
+
+    minimo, maximo = 0, float("inf")
+    if objetivo:
+        minimo, maximo = _rango_longitud(len(objetivo), corte)
+
+    resultado = []
+    for i in range(n):
+        for tamano in range(min_palabras, max_palabras + 1):
+            fin = i + tamano
+            if fin > n:
+                break
+            largo = acumulado[fin] - acumulado[i] + tamano - 1
+            if largo > maximo:
+                break  # las ventanas más grandes solo son más largas
+            if largo >= minimo:
+                resultado.append(" ".join(tokens[i:fin]))
+    return resultado
+
+
+@etapa("coincidencia")
+def mejor_ventana(objetivo: str, tokens: list[str], min_palabras: int = 2, max_palabras: int = 5,
+                  corte: float = 0.0) -> tuple[str | None, float]:
+    """La ventana más parecida al objetivo y su similitud (0-1), aunque quede bajo `corte`.
+
+    `corte` solo sirve para podar: si la mejor ventana de las que quedan lo
+    alcanza, ninguna de las descartadas podía superarla.
+    """
+    if not objetivo:
+        return None, 0.0
+    candidatos = ventanas(tokens, min_palabras, max_palabras, objetivo, corte)
+    mejor = process.extractOne(objetivo, candidatos, scorer=fuzz.ratio) if candidatos else None
+    if corte > 0 and (mejor is None or mejor[1] < corte * 100):
+        # Nada llega al corte: la similitud que se reporta es la de todas las ventanas
+        candidatos = ventanas(tokens, min_palabras, max_palabras)
+        mejor = process.extractOne(objetivo, candidatos, scorer=fuzz.ratio) if candidatos else None
+    if mejor is None:
+        return None, 0.0
+    return mejor[0], mejor[1] / 100
+
+
+@etapa("coincidencia")
+def primera_ventana(objetivo: str, tokens: list[str], tamano: int, umbral: float):
+    """Primera ventana de `tamano` palabras (en orden del texto) con SequenceMatcher.ratio >= umbral.
+
+    Es la métrica de siempre del formato (difflib). fuzz.ratio cuenta la
+    subsecuencia común más larga, que nunca es menor que los bloques de
+    SequenceMatcher, así que se usa en lote como cota: solo las ventanas
+    que la pasan se puntúan con difflib, en orden, y el resultado es el mismo.
+    """
+    if not objetivo or not tokens:
+        return None
+    candidatos = [" ".join(tokens[i:i + tamano]) for i in range(len(tokens))]
+    cotas = process.cdist([objetivo], candidatos, scorer=fuzz.ratio, dtype=np.float64, workers=1)[0]
+    for i in np.flatnonzero(cotas >= umbral * 100 - 1e-9):
+        puntaje = SequenceMatcher(None, candidatos[i], objetivo).ratio()
+        if puntaje >= umbral:
+            return {"match": candidatos[i], "score": puntaje}
+    return None
+
+
+@etapa("coincidencia")
+def mejores_por_palabra(palabras: list[str], tokens: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Para cada palabra, la similitud (0-1) con el token más parecido y su índice."""
+    if not palabras or not tokens:
+        return np.zeros(len(palabras)), np.full(len(palabras), -1)
+    matriz = process.cdist(palabras, tokens, scorer=fuzz.ratio, dtype=np.float64, workers=1)
+    indices = matriz.argmax(axis=1)
+    return matriz[np.arange(len(palabras)), indices] / 100, indices
@@ -0,0 +1,208 @@
+import re
+from typing import NamedTuple
+
+from utils.extraccion import normalizar_para_busqueda
+from utils import metricas
+from utils.ocr import extraer_datos, preparar_fuente
+from utils.pdf import capa_texto
+
+# ==============================
+# Documento OCR por palabras
+# ==============================
+#
+# Se arma una vez por documento desde image_to_data: cada palabra con su
+# caja, su renglón y su confianza, más un índice por token normalizado. Los
+# validadores piden "el valor a la derecha de / debajo de la etiqueta X" en
+# lugar de recorrer todo el texto con ventanas o expresiones regulares.
+
+_NO_ALFANUMERICO = re.compile(r"[^a-z0-9]")
+# Fuente.documentos[CLAVE_PAGINAS]: documento de varias páginas ya leído en paralelo (utils.paginas)
+CLAVE_PAGINAS = ("paginas",)
+
+
+def normalizar_token(palabra: str) -> str:
+    """Minúsculas, sin tildes ni puntuación: "Señor(a):" -> "senora"."""
+    return _NO_ALFANUMERICO.sub("", normalizar_para_busqueda(palabra))
+
+
+class Palabra(NamedTuple):
+    texto: str
+    token: str
+    conf: float | None      # 0-100; None si viene de texto plano
+    caja: tuple             # (x0, y0, x1, y1) en píxeles, o (columna, renglón) si viene de texto
+    linea: int              # índice en DocumentoOCR.lineas
+    orden: int              # posición en orden de lectura
+
+
+class DocumentoOCR:
+    def __init__(self, lineas_palabras: list[list[tuple[str, float | None, tuple]]]):
+        """`lineas_palabras`: renglones en orden de lectura, cada uno con (texto, conf, caja)."""
+        self.palabras: list[Palabra] = []
+        self.lineas: list[list[int]] = []
+        self.indice: dict[str, list[int]] = {}
+        for renglon in lineas_palabras:
+            indices = []
+            for texto, conf, caja in renglon:
+                token = normalizar_token(texto)
+                if not token:
+                    continue
+                palabra = Palabra(texto, token, conf, caja, len(self.lineas), len(self.palabras))
+                self.indice.setdefault(token, []).append(palabra.orden)
+                self.palabras.append(palabra)
+                indices.append(palabra.orden)
+            if indices:
+                self.lineas.append(indices)
+        self.texto = "\n".join(" ".join(self.palabras[i].texto for i in linea) for linea in self.lineas)
+
+    @classmethod
+    def desde_datos(cls, datos: dict) -> "DocumentoOCR":
+        """Desde el dict de image_to_data (un renglón por block/par/line)."""
+        renglones: dict[tuple, list] = {}
+        for i, texto in enumerate(datos.get("text", [])):
+            if not texto or not texto.strip() or float(datos["conf"][i]) < 0:
+                continue
+            clave = (datos["block_num"][i], datos["par_num"][i], datos["line_num"][i])
+            x, y = int(datos["left"][i]), int(datos["top"][i])
+            caja = (x, y, x + int(datos["width"][i]), y + int(datos["height"][i]))
+            renglones.setdefault(clave, []).append((texto.strip(), float(datos["conf"][i]), caja))
+        return cls(list(renglones.values()))
+
+    @classmethod
+    def desde_texto(cls, texto: str) -> "DocumentoOCR":
+        """Desde texto plano: la caja es (columna, renglón), sin confianza."""
+        renglones = []
+        for n, linea in enumerate((texto or "").splitlines()):
+            renglones.append([
+                (m.group(), None, (m.start(), n, m.end(), n + 1)) for m in re.finditer(r"\S+", linea)
+            ])
+        return cls(renglones)
+
+    @classmethod
+    def unir(cls, documentos: list["DocumentoOCR"]) -> "DocumentoOCR":
+        """Un documento con los renglones de varios (páginas) uno detrás del otro."""
+        renglones = []
+        for documento in documentos:
+            for linea in documento.lineas:
+                renglones.append([(p.texto, p.conf, p.caja) for p in (documento.palabras[i] for i in linea)])
+        return cls(renglones)
+
+    # ---------- Búsqueda de etiquetas
+
+    def buscar(self, frase: str) -> list[tuple[int, int]]:
+        """(primera, última) palabra de cada aparición de la frase en un mismo renglón."""
+        tokens = [normalizar_token(t) for t in frase.split()]
+        tokens = [t for t in tokens if t]
+        if not tokens:
+            return []
+        apariciones = []
+        for inicio in self.indice.get(tokens[0], []):
+            fin = inicio + len(tokens) - 1
+            if fin >= len(self.palabras) or self.palabras[fin].linea != self.palabras[inicio].linea:
+                continue
+            if all(self.palabras[inicio + k].token == t for k, t in enumerate(tokens)):
+                apariciones.append((inicio, fin))
+        return apariciones
+
+    def _etiqueta(self, etiquetas) -> tuple[int, int] | None:
+        for frase in (etiquetas,) if isinstance(etiquetas, str) else etiquetas:
+            apariciones = self.buscar(frase)
+            if apariciones:
+                return apariciones[0]
+        return None
+
+    def tiene(self, etiquetas) -> bool:
+        return self._etiqueta(etiquetas) is not None
+
+    # ---------- Consultas espaciales
+
+    def derecha_de(self, etiquetas, max_palabras: int = 6) -> list[Palabra]:
+        """Palabras del mismo renglón a la derecha de la etiqueta."""
+        span = self._etiqueta(etiquetas)
+        if span is None:
+            return []
+        linea = self.lineas[self.palabras[span[1]].linea]
+        posicion = linea.index(span[1])
+        return [self.palabras[i] for i in linea[posicion + 1:posicion + 1 + max_palabras]]
+
+    def debajo_de(self, etiquetas, max_palabras: int = 6) -> list[Palabra]:
+        """Palabras del renglón siguiente que se superponen en horizontal con la etiqueta.
+
+        Si ninguna se superpone (valor corrido a la izquierda o a la
+        derecha), se devuelve el renglón siguiente completo.
+        """
+        span = self._etiqueta(etiquetas)
+        if span is None:
+            return []
+        n = self.palabras[span[1]].linea + 1
+        if n >= len(self.lineas):
+            return []
+        x0, x1 = self.palabras[span[0]].caja[0], self.palabras[span[1]].caja[2]
+        siguiente = [self.palabras[i] for i in self.lineas[n]]
+        debajo = [p for p in siguiente if p.caja[0] < x1 and p.caja[2] > x0]
+        return (debajo or siguiente)[:max_palabras]
+
+    def despues_de(self, etiquetas, max_palabras: int = 8) -> list[Palabra]:
+        """Palabras que siguen a la etiqueta en orden de lectura (puede pasar de renglón)."""
+        span = self._etiqueta(etiquetas)
+        if span is None:
+            return []
+        return self.palabras[span[1] + 1:span[1] + 1 + max_palabras]
+
+    def valor(self, etiquetas, patron: re.Pattern, max_palabras: int = 4) -> Palabra | None:
+        """Primera palabra cuyo token cumple `patron`: a la derecha de la etiqueta o, si no, debajo."""
+        for palabras in (self.derecha_de(etiquetas, max_palabras), self.debajo_de(etiquetas, max_palabras)):
+            for palabra in palabras:
+                if patron.fullmatch(palabra.token):
+                    return palabra
+        return None
+
+    @staticmethod
+    def confianza(palabras) -> float | None:
+        """Confianza media (0-1) de las palabras, o None si no hay confianzas."""
+        confs = [p.conf for p in palabras if p.conf is not None]
+        return sum(confs) / len(confs) / 100 if confs else None
+
+
+def leer_documento(origen, lang: str = "spa", config: str = "", lado_maximo: int | None = None) -> DocumentoOCR:
+    """DocumentoOCR de la fuente; se arma una vez por fuente y configuración."""
+    fuente = preparar_fuente(origen)
+    clave = (lang, config, lado_maximo)
+    documento = fuente.documentos.get(clave)
+    if documento is None:
+        datos = extraer_datos(fuente, lang=lang, config=config, lado_maximo=lado_maximo)
+        documento = fuente.documentos[clave] = DocumentoOCR.desde_datos(datos)
+    return documento
+
+
+def leer_pdf(origen, lang: str = "spa", ocr_sin_texto: bool = True) -> DocumentoOCR | None:
+    """DocumentoOCR de un PDF desde su capa de texto, o None si ninguna página la tiene.
+
+    El PDF se abre una sola vez para todas las páginas. Las que no tienen
+    texto embebido (escaneos dentro del PDF) se rasterizan y se leen aquí
+    mismo solo si `ocr_sin_texto`: un PDF de varias páginas llega al
+    validador ya leído por utils.paginas, que manda esas páginas al pool
+    por separado, así que esto queda para OCR_MULTIPAGINA=0. Sin
+    `ocr_sin_texto` (al clasificar) se omiten y el documento parcial no se
+    guarda en la fuente. Un PDF sin ninguna página con texto se deja a los
+    niveles de OCR de siempre.
+    """
+    fuente = preparar_fuente(origen)
+    clave = ("pdf", lang)
+    if clave in fuente.documentos:
+        return fuente.documentos[clave]
+    with metricas.etapa("capa_texto"):
+        paginas = capa_texto(fuente.datos)
+    if not any(paginas):
+        fuente.documentos[clave] = None
+        return None
+    if all(paginas) or ocr_sin_texto:
+        documentos = [
+            DocumentoOCR(renglones) if renglones else leer_documento(fuente.pagina(n), lang=lang)
+            for n, renglones in enumerate(paginas)
+        ]
+    else:
+        documentos = [DocumentoOCR(renglones) for renglones in paginas if renglones]
+    documento = documentos[0] if len(documentos) == 1 else DocumentoOCR.unir(documentos)
+    if len(documentos) == len(paginas):
+        fuente.documentos[clave] = documento
+    return documento
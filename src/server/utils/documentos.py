@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+
+from validators.formato_validator import validar_formato_transportador
+from validators.cedula_validator import validar_cedula
+from validators.eps_validator import validar_eps
+# from validators.license_validator import validar_licencia
+from validators.arl_validator import validar_arl
+from validators.pension_validator import validar_documento_pension
+
+from utils.clasificador import CAMPO_POR_TIPO, medir_clasificacion
+from utils.ejecutor import ejecutar
+from utils.niveles import CLAVE_RAPIDA
+from utils.ocr import Fuente
+from utils.paginas import leer_paginas
+from utils.verificaciones import limpiar_cedula, obtener_almacen
+from utils import metricas
+
+# ==============================
+# Tipos de documento del formulario
+# ==============================
+
+# campo del formulario -> (clave en "resultados", validador, datos del formulario que recibe)
+CAMPOS_DOCUMENTO = {
+    "formatoCreacion": (
+        "documentoFormato",
+        validar_formato_transportador,
+        ("codigoTransportador", "nombreTransportador", "cedula", "nombreConductor"),
+    ),
+    "documento": ("cedula", validar_cedula, ("cedula", "nombreConductor")),
+    # "licenciaConduccion": ("licencia", validar_licencia, ("cedula", "nombreConductor")),
+    "certificadoEPS": ("documentoEPS", validar_eps, ("nombreConductor", "cedula")),
+    "certificadoARL": ("documentoARL", validar_arl, ("nombreConductor", "cedula")),
+    "certificadoPension": ("documentoPension", validar_documento_pension, ("nombreConductor", "cedula")),
+}
+
+CAMPOS_FORMULARIO = ("codigoTransportador", "nombreTransportador", "cedula", "nombreConductor")
+
+
+def clave_resultado(campo: str) -> str:
+    return CAMPOS_DOCUMENTO[campo][0]
+
+
+# ==============================
+# Validaciones en curso (single-flight)
+# ==============================
+#
+# Un reintento del frontend o un doble envío mandan los mismos bytes con los
+# mismos datos mientras la primera validación sigue en el pool. En lugar de
+# volver a hacer el OCR, las copias esperan la tarea que ya está corriendo y
+# reciben el mismo resultado (que no se modifica después de devolverlo).
+
+# (campo, sha256 del documento, datos esperados) -> tarea en curso
+_en_curso: dict[tuple, asyncio.Task] = {}
+
+
+async def validar_documento(campo: str, datos: bytes, formulario: dict, documentos: dict | None = None):
+    """Valida un documento del formulario.
+
+    Primero busca un veredicto vigente del mismo documento para el mismo
+    conductor (utils.verificaciones); si no hay, las validaciones idénticas
+    simultáneas comparten una sola tarea. `documentos` son DocumentoOCR ya
+    leídos del archivo (al clasificarlo) que el validador reutiliza.
+    """
+    tipo, _, argumentos = CAMPOS_DOCUMENTO[campo]
+    huella = hashlib.sha256(datos).hexdigest()
+    esperados = [formulario.get(a) for a in argumentos]
+    cedula = limpiar_cedula(formulario.get("cedula"))
+    almacen = obtener_almacen() if cedula else None
+    if almacen is not None:
+        guardado = await asyncio.to_thread(almacen.buscar, cedula, tipo, huella, esperados)
+        metricas.registrar(metricas.VERIFICACIONES.nombre, "inc", tipo=tipo,
+                           resultado="miss" if guardado is None else "hit")
+        if guardado is not None:
+            guardado["verificacionGuardada"] = True
+            return guardado
+
+    clave = (campo, huella, tuple(esperados))
+    tarea = _en_curso.get(clave)
+    if tarea is None:
+        tarea = asyncio.ensure_future(_validar_documento(campo, datos, formulario, huella, documentos))
+        _en_curso[clave] = tarea
+        tarea.add_done_callback(lambda _: _en_curso.pop(clave, None))
+    else:
+        metricas.registrar(metricas.COALESCIDOS.nombre, "inc", tipo=tipo)
+    # shield: si el cliente que la inició se desconecta, la tarea sigue para los demás
+    return await asyncio.shield(tarea)
+
+
+async def esperar_en_curso(limite: float) -> int:
+    """Espera hasta `limite` segundos a que terminen las validaciones en curso; devuelve las que quedaron."""
+    pendientes = list(_en_curso.values())
+    if pendientes:
+        await asyncio.wait(pendientes, timeout=limite)
+    return sum(not t.done() for t in pendientes)
+
+
+async def _validar_documento(campo: str, datos: bytes, formulario: dict, huella: str,
+                             documentos: dict | None = None):
+    """Valida un documento del formulario en el pool de OCR y guarda el veredicto."""
+    tipo, validador, argumentos = CAMPOS_DOCUMENTO[campo]
+    metricas.registrar(metricas.EN_CURSO.nombre, "inc", tipo=tipo)
+    paginas = None
+    try:
+        # PDF o TIFF de varias páginas: se leen en paralelo y el validador recibe el documento unido.
+        # Si el clasificador ya leyó la primera página, esa no se vuelve a leer
+        multipagina = await leer_paginas(
+            tipo, datos, formulario.get("nombreConductor"), formulario.get("cedula"),
+            primera=(documentos or {}).get(CLAVE_RAPIDA),
+        )
+        fuente = datos
+        if multipagina is not None:
+            fuente, paginas = multipagina
+        elif documentos:
+            fuente = Fuente(datos)
+            fuente.documentos.update(documentos)
+        resultado, muestras = await ejecutar(
+            metricas.medir_validador, tipo, validador, fuente, *(formulario.get(a) for a in argumentos)
+        )
+    except Exception:
+        metricas.registrar(metricas.DOCUMENTOS.nombre, "inc", tipo=tipo, resultado="error")
+        raise
+    finally:
+        metricas.registrar(metricas.EN_CURSO.nombre, "dec", tipo=tipo)
+    # Las muestras se tomaron en el worker; aquí se suman al registro y al Server-Timing
+    metricas.aplicar_muestras(muestras)
+    metricas.registrar(metricas.DOCUMENTOS.nombre, "inc", tipo=tipo, resultado="ok")
+    if paginas is not None and isinstance(resultado, dict):
+        resultado["paginas"] = paginas
+
+    almacen = obtener_almacen()
+    cedula = limpiar_cedula(formulario.get("cedula"))
+    if almacen is not None and cedula:
+        await asyncio.to_thread(
+            almacen.guardar, cedula, tipo, huella, [formulario.get(a) for a in argumentos], resultado
+        )
+    return resultado
+
+
+async def validar_formulario(documentos: dict, formulario: dict) -> dict:
+    """Valida todos los documentos de un formulario en paralelo.
+
+    Devuelve el mismo dict "resultados" que /validar, en el orden de los campos.
+    """
+    tareas = {
+        clave_resultado(campo): validar_documento(campo, datos, formulario)
+        for campo, datos in documentos.items()
+    }
+    valores = await asyncio.gather(*tareas.values())
+    return dict(zip(tareas.keys(), valores))
+
+
+# ==============================
+# Documentos sin etiqueta (/validar/auto)
+# ==============================
+
+async def validar_sin_etiqueta(datos: bytes, formulario: dict) -> dict:
+    """Clasifica el archivo con una lectura barata y lo valida con el validador de su tipo.
+
+    Devuelve {"clasificacion", "tipo" (clave en "resultados" o None),
+    "resultado"}. La lectura de la clasificación pasa al validador, así que
+    el OCR no se repite.
+    """
+    clasificacion, documentos, muestras = await ejecutar(medir_clasificacion, datos)
+    metricas.aplicar_muestras(muestras)
+    tipo_documento = clasificacion["tipo"]
+    metricas.registrar(metricas.CLASIFICADOS.nombre, "inc", tipo=tipo_documento or "desconocido")
+    if tipo_documento is None:
+        return {"clasificacion": clasificacion, "tipo": None, "resultado": None}
+    campo = CAMPO_POR_TIPO[tipo_documento]
+    try:
+        resultado = await validar_documento(campo, datos, formulario, documentos)
+    except Exception as e:
+        # Ya se sabe el tipo: se reporta con él, con el error dentro del resultado
+        resultado = resultado_error(e)
+    return {"clasificacion": clasificacion, "tipo": clave_resultado(campo), "resultado": resultado}
+
+
+def resultado_error(error: Exception) -> dict:
+    """Resultado de un documento que no se pudo validar: {"error"} como el de los validadores.
+
+    Algunas excepciones (un TimeoutError del pool, un KeyError) no traen
+    mensaje; entonces se usa su tipo para que el error nunca quede vacío.
+    """
+    return {"error": str(error) or type(error).__name__}
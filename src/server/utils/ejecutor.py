@@ -0,0 +1,122 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+# ==============================
+# Configuración del pool
+# ==============================
+
+# OCR_EJECUTOR: "procesos" (por defecto, un proceso por núcleo) o "hilos"
+# (útil en desarrollo o cuando el backend OCR ya libera el GIL). Con hilos y
+# tesserocr conviene OCR_MOTORES_POR_CONFIG=OCR_WORKERS para no serializar.
+OCR_EJECUTOR = os.getenv("OCR_EJECUTOR", "procesos").lower()
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0")) or (os.cpu_count() or 1)
+
+_pool: Executor | None = None
+
+
+def _iniciar_worker():
+    # Cada proceso deja el motor OCR y los idiomas cargados antes de recibir documentos
+    from utils.ocr_backend import precalentar
+    precalentar()
+
+
+def obtener_pool() -> Executor:
+    global _pool
+    if _pool is None:
+        if OCR_EJECUTOR == "hilos":
+            _pool = ThreadPoolExecutor(
+                max_workers=OCR_WORKERS, thread_name_prefix="ocr", initializer=_iniciar_worker
+            )
+        else:
+            _pool = ProcessPoolExecutor(max_workers=OCR_WORKERS, initializer=_iniciar_worker)
+    return _pool
+
+
+def cerrar_pool(esperar: bool = True):
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=esperar, cancel_futures=not esperar)
+        _pool = None
+
+
+# ==============================
+# Ejecución fuera del event loop
+# ==============================
+
+async def ejecutar(fn, *args):
+    """Ejecuta un validador bloqueante en el pool sin frenar el event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(obtener_pool(), fn, *args)
+
+
+# ==============================
+# Arranque en caliente y drenado
+# ==============================
+
+# Lo que reportan /salud/listo y /salud/vivo
+estado_servidor = {"calentado": False, "drenando": False, "workersCalentados": 0, "error": None}
+
+
+# Rondas de calentamiento hasta ver a cada worker: un worker rápido puede
+# tomar dos trabajos de la misma ronda y dejar a otro sin calentar
+CALENTAR_RONDAS = 5
+
+
+def _calentar_worker():
+    """Corre en cada worker: validadores importados y un OCR mínimo por idioma.
+
+    Devuelve (worker, error): el worker es (pid, hilo) para distinguir tanto
+    procesos como hilos del pool.
+    """
+    import utils.documentos  # noqa: F401  (validadores y sus dependencias)
+    from PIL import Image
+    from utils.ocr_backend import OCR_IDIOMAS, obtener_backend
+
+    worker = (os.getpid(), threading.get_ident())
+    blanco = Image.new("L", (64, 32), 255)
+    for lang in OCR_IDIOMAS:
+        try:
+            # Deja los datos del idioma en memoria (o en el page cache con pytesseract)
+            obtener_backend().texto(blanco, lang=lang)
+        except Exception as e:
+            return worker, f"{lang}: {e}"
+    return worker, None
+
+
+async def calentar_pool():
+    """Arranca todos los workers del pool antes de aceptar tráfico.
+
+    Solo queda "calentado" si respondieron OCR_WORKERS workers distintos y
+    ninguno falló.
+    """
+    loop = asyncio.get_running_loop()
+    pool = obtener_pool()
+    calentados, fallidos = set(), []
+    for _ in range(CALENTAR_RONDAS):
+        resultados = await asyncio.gather(
+            *(loop.run_in_executor(pool, _calentar_worker) for _ in range(OCR_WORKERS)),
+            return_exceptions=True,
+        )
+        for resultado in resultados:
+            if isinstance(resultado, BaseException):
+                fallidos.append(str(resultado) or type(resultado).__name__)
+            elif resultado[1] is not None:
+                fallidos.append(resultado[1])
+            else:
+                calentados.add(resultado[0])
+        if fallidos or len(calentados) >= OCR_WORKERS:
+            break
+
+    estado_servidor["workersCalentados"] = len(calentados)
+    if fallidos:
+        # Sin "calentado", /salud/listo sigue en 503: un OCR que no arranca no debe recibir tráfico
+        estado_servidor["error"] = fallidos[0]
+        print(f"⚠️ No se pudo calentar el OCR en {OCR_WORKERS - len(calentados)} de {OCR_WORKERS} workers: {fallidos[0]}")
+    elif len(calentados) < OCR_WORKERS:
+        estado_servidor["error"] = f"Solo {len(calentados)} de {OCR_WORKERS} workers respondieron al calentamiento"
+        print(f"⚠️ {estado_servidor['error']}")
+    else:
+        estado_servidor["error"] = None
+    estado_servidor["calentado"] = not fallidos and len(calentados) >= OCR_WORKERS
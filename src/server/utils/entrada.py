@@ -0,0 +1,246 @@
+import asyncio
+import io
+import os
+
+from PIL import Image
+from starlette.exceptions import HTTPException
+
+from utils.file_normalizer import MAX_MEGAPIXELES, OCR_LADO_MAXIMO
+from utils.paginas import OCR_PAGINAS_MAXIMAS
+from utils.pdf import megapixeles_pagina, paginas_pdf
+
+# ==============================
+# Entrada de documentos
+# ==============================
+#
+# Antes de que un documento llegue al pool se revisa lo barato: los primeros
+# bytes (formato real, no la extensión), el encabezado de la imagen
+# (dimensiones, páginas) y los presupuestos de bytes y píxeles por archivo y
+# por petición. Un archivo basura o gigante se rechaza sin decodificarlo ni
+# ocupar un worker de OCR. El cuerpo completo de la petición también tiene
+# tope (LimiteCuerpo), así que un upload enorme se corta mientras llega.
+
+SUBIDA_MAX_MB_ARCHIVO = float(os.getenv("SUBIDA_MAX_MB_ARCHIVO", "15"))
+SUBIDA_MAX_MB_PETICION = float(os.getenv("SUBIDA_MAX_MB_PETICION", "60"))
+SUBIDA_MAX_MB_LOTE = float(os.getenv("SUBIDA_MAX_MB_LOTE", "500"))
+# Dimensiones declaradas en el encabezado de una página (tope contra bombas de descompresión)
+SUBIDA_MAX_MEGAPIXELES = MAX_MEGAPIXELES
+# Píxeles que de verdad se decodifican entre todos los documentos de una petición
+SUBIDA_MAX_MEGAPIXELES_PETICION = float(os.getenv("SUBIDA_MAX_MEGAPIXELES_PETICION", "150"))
+SUBIDA_MAX_PAGINAS = int(os.getenv("SUBIDA_MAX_PAGINAS", "50"))
+
+MB = 1024 * 1024
+BLOQUE_LECTURA = 64 * 1024
+
+# Firma (primeros bytes) -> formato
+FIRMAS = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+    (b"BM", "bmp"),
+)
+
+
+class DocumentoRechazado(Exception):
+    """El documento no pasa la revisión de entrada; `estado` es el código HTTP sugerido."""
+
+    def __init__(self, mensaje: str, estado: int = 422):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def detectar_formato(cabecera: bytes) -> str | None:
+    if b"%PDF-" in cabecera[:1024]:
+        return "pdf"
+    if cabecera[:4] == b"RIFF" and cabecera[8:12] == b"WEBP":
+        return "webp"
+    for firma, formato in FIRMAS:
+        if cabecera.startswith(firma):
+            return formato
+    return None
+
+
+def megapixeles_decodificados(formato: str, ancho: int, alto: int) -> float:
+    """Megapíxeles que de verdad se decodifican: un JPEG se abre reducido (draft) al lado máximo."""
+    escala = 1
+    if formato == "jpeg":
+        factor = max(ancho, alto) / OCR_LADO_MAXIMO
+        while escala < 8 and escala * 2 <= factor:
+            escala *= 2
+    return (ancho // escala) * (alto // escala) / 1_000_000
+
+
+def _revisar_dimensiones(ancho: int, alto: int):
+    if ancho * alto > SUBIDA_MAX_MEGAPIXELES * 1_000_000:
+        raise DocumentoRechazado(
+            f"Imagen de {ancho}x{alto}: supera {SUBIDA_MAX_MEGAPIXELES:g} megapíxeles", 413
+        )
+
+
+def dimensiones_cabecera(cabecera: bytes) -> tuple[int, int] | None:
+    """(ancho, alto) leídos solo del encabezado, o None si no alcanza con estos bytes."""
+    try:
+        with Image.open(io.BytesIO(cabecera)) as imagen:
+            return imagen.size
+    except Image.DecompressionBombError:
+        raise DocumentoRechazado(f"La imagen supera {SUBIDA_MAX_MEGAPIXELES:g} megapíxeles", 413)
+    except Exception:
+        return None
+
+
+def inspeccionar(datos: bytes) -> dict:
+    """Formato, páginas y megapíxeles a decodificar; DocumentoRechazado si no se debe procesar."""
+    formato = detectar_formato(datos)
+    if formato is None:
+        raise DocumentoRechazado("Formato no soportado: se aceptan JPEG, PNG, TIFF, BMP, WebP y PDF", 415)
+    if len(datos) > SUBIDA_MAX_MB_ARCHIVO * MB:
+        raise DocumentoRechazado(f"El archivo supera {SUBIDA_MAX_MB_ARCHIVO:g} MB", 413)
+
+    if formato == "pdf":
+        try:
+            paginas = paginas_pdf(datos)
+        except RuntimeError as e:
+            raise DocumentoRechazado(str(e), 415)  # sin PyMuPDF
+        except Exception:
+            raise DocumentoRechazado("El PDF está dañado o protegido")
+        if not paginas:
+            raise DocumentoRechazado("El PDF no tiene páginas")
+        if len(paginas) > SUBIDA_MAX_PAGINAS:
+            raise DocumentoRechazado(f"El documento tiene más de {SUBIDA_MAX_PAGINAS} páginas", 413)
+        # Solo se rasterizan las primeras OCR_PAGINAS_MAXIMAS, con el DPI ya limitado
+        megapixeles = sum(megapixeles_pagina(ancho, alto) for ancho, alto in paginas[:OCR_PAGINAS_MAXIMAS])
+        return {"formato": formato, "paginas": len(paginas), "megapixeles": megapixeles}
+
+    try:
+        with Image.open(io.BytesIO(datos)) as imagen:
+            ancho, alto = imagen.size
+            _revisar_dimensiones(ancho, alto)
+            # Solo un TIFF trae páginas; los cuadros de un JPEG MPO o un PNG animado no lo son
+            paginas = getattr(imagen, "n_frames", 1) if formato == "tiff" else 1
+    except DocumentoRechazado:
+        raise
+    except Image.DecompressionBombError:
+        raise DocumentoRechazado(f"La imagen supera {SUBIDA_MAX_MEGAPIXELES:g} megapíxeles", 413)
+    except Exception:
+        raise DocumentoRechazado(f"La imagen {formato.upper()} está dañada o incompleta")
+    if paginas > SUBIDA_MAX_PAGINAS:
+        raise DocumentoRechazado(f"El documento tiene más de {SUBIDA_MAX_PAGINAS} páginas", 413)
+    megapixeles = megapixeles_decodificados(formato, ancho, alto) * min(paginas, OCR_PAGINAS_MAXIMAS)
+    return {"formato": formato, "paginas": paginas, "megapixeles": megapixeles}
+
+
+class Presupuesto:
+    """Bytes y megapíxeles que todavía puede consumir una petición."""
+
+    def __init__(self, max_bytes: float = SUBIDA_MAX_MB_PETICION * MB,
+                 max_megapixeles: float = SUBIDA_MAX_MEGAPIXELES_PETICION):
+        self.bytes = max_bytes
+        self.megapixeles = max_megapixeles
+
+    def consumir(self, num_bytes: int, megapixeles: float = 0.0):
+        if num_bytes > self.bytes:
+            raise DocumentoRechazado("Los documentos de la petición superan el tamaño total permitido", 413)
+        if megapixeles > self.megapixeles:
+            raise DocumentoRechazado(
+                f"Los documentos de la petición superan {SUBIDA_MAX_MEGAPIXELES_PETICION:g} megapíxeles", 413
+            )
+        self.bytes -= num_bytes
+        self.megapixeles -= megapixeles
+
+
+async def leer_documento_subido(upload, presupuesto: Presupuesto | None = None) -> bytes:
+    """Lee un UploadFile por bloques, cortando apenas el primer bloque o el tamaño lo descartan."""
+    limite = SUBIDA_MAX_MB_ARCHIVO * MB
+    if upload.size is not None and upload.size > limite:
+        raise DocumentoRechazado(f"El archivo supera {SUBIDA_MAX_MB_ARCHIVO:g} MB", 413)
+
+    primero = await upload.read(BLOQUE_LECTURA)
+    formato = detectar_formato(primero)
+    if formato is None:
+        raise DocumentoRechazado("Formato no soportado: se aceptan JPEG, PNG, TIFF, BMP, WebP y PDF", 415)
+    if formato != "pdf":
+        dimensiones = dimensiones_cabecera(primero)
+        if dimensiones is not None:
+            _revisar_dimensiones(*dimensiones)
+
+    partes, leidos = [primero], len(primero)
+    while bloque := await upload.read(BLOQUE_LECTURA):
+        leidos += len(bloque)
+        if leidos > limite:
+            raise DocumentoRechazado(f"El archivo supera {SUBIDA_MAX_MB_ARCHIVO:g} MB", 413)
+        if presupuesto is not None and leidos > presupuesto.bytes:
+            raise DocumentoRechazado("Los documentos de la petición superan el tamaño total permitido", 413)
+        partes.append(bloque)
+    datos = b"".join(partes)
+
+    # Abrir el PDF o el encabezado de la imagen toca todo el archivo: fuera del event loop
+    info = await asyncio.to_thread(inspeccionar, datos)
+    if presupuesto is not None:
+        presupuesto.consumir(len(datos), info["megapixeles"])
+    return datos
+
+
+# ==============================
+# Tope del cuerpo de la petición
+# ==============================
+
+class CuerpoDemasiadoGrande(HTTPException):
+    # HTTPException: FastAPI la deja pasar tal cual si salta mientras lee el formulario
+    def __init__(self, limite: int):
+        super().__init__(status_code=413, detail=f"La petición supera {limite / MB:g} MB")
+
+
+class LimiteCuerpo:
+    """Middleware ASGI: corta la petición con 413 si el cuerpo supera el tope de su ruta.
+
+    Mira Content-Length antes de leer nada y, si no viene o miente, cuenta los
+    bytes a medida que llegan; el multipart nunca termina de guardarse.
+    """
+
+    def __init__(self, app, limite_mb: float = SUBIDA_MAX_MB_PETICION, limites_mb: dict[str, float] | None = None):
+        self.app = app
+        self.limite = int(limite_mb * MB)
+        self.limites = {ruta: int(mb * MB) for ruta, mb in (limites_mb or {}).items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        limite = self.limites.get(scope["path"], self.limite)
+        largo = dict(scope["headers"]).get(b"content-length")
+        if largo is not None and largo.isdigit() and int(largo) > limite:
+            return await self._rechazar(send, limite)
+
+        recibidos = 0
+        respuesta_iniciada = False
+
+        async def recibir():
+            nonlocal recibidos
+            mensaje = await receive()
+            if mensaje["type"] == "http.request":
+                recibidos += len(mensaje.get("body", b""))
+                if recibidos > limite:
+                    raise CuerpoDemasiadoGrande(limite)
+            return mensaje
+
+        async def enviar(mensaje):
+            nonlocal respuesta_iniciada
+            respuesta_iniciada = respuesta_iniciada or mensaje["type"] == "http.response.start"
+            await send(mensaje)
+
+        try:
+            await self.app(scope, recibir, enviar)
+        except CuerpoDemasiadoGrande:
+            if respuesta_iniciada:
+                raise
+            await self._rechazar(send, limite)
+
+    @staticmethod
+    async def _rechazar(send, limite: int):
+        cuerpo = f'{{"detail":"La petición supera {limite / MB:g} MB"}}'.encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(cuerpo)).encode())],
+        })
+        await send({"type": "http.response.body", "body": cuerpo})
@@ -0,0 +1,191 @@
+import re
+from collections import deque
+from datetime import datetime
+
+from utils.metricas import etapa
+
+# ==============================
+# Extracción de campos en una sola pasada
+# ==============================
+#
+# Cada validador necesitaba números, fechas y palabras clave del texto OCR y
+# los buscaba con su propio re.findall / `in` por separado. `extraer` recorre
+# el texto una vez con un patrón combinado (fechas + números) y una vez con un
+# autómata Aho-Corasick para todas las palabras clave, y guarda las posiciones.
+
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+    "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+    "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
+}
+
+# Fechas y números en un solo patrón; las fechas van primero para que
+# "09/10/2024" no se parta en números sueltos.
+_PATRON_CAMPOS = re.compile(
+    r"(?P<fecha>\d{1,2}[/-]\d{1,2}[/-]\d{2,4})"
+    r"|(?P<fecha_texto>(?P<dia>\d{1,2})\s*de\s*(?P<mes>" + "|".join(MESES) + r")\s*de\s*(?P<anio>\d{2,4}))"
+    r"|(?P<numero>\d[\d.,'\-]*)"
+)
+_PARTES_FECHA = re.compile(r"(\d{1,2})[/-](\d{1,2})[/-](\d{2,4})")
+
+# Días desde la expedición en que un certificado se acepta como vigente
+DIAS_VIGENCIA = 30
+
+# Patrones de cada validador, aplicados solo sobre los números ya extraídos
+PATRON_NUMERO_PUNTEADO = re.compile(r"[\d\.\,]+")
+PATRON_CEDULA = re.compile(r"\d{1,3}(?:\.\d{3}){1,2}|\d{7,12}")
+PATRON_CEDULA_SIN_PUNTOS = re.compile(r"\d{7,12}")
+PATRON_CEDULA_FORMATO = re.compile(r"\d[\d'.-]{6,15}\d")
+
+# El dígito 1-5 justo después de la etiqueta: en "clase de riesgo: IV 12/13/2024"
+# no hay dígito y no se toma el "1" de la fecha
+PATRON_CLASE_RIESGO = re.compile(r"clase\s*(?:de\s*)?riesgo[\s:.\-]*([1-5])(?!\d)")
+PATRON_ESTADO_AFILIACION = re.compile(r"estado\s+de\s+la\s+afiliacion[:\s]+([a-z]+)")
+
+PALABRAS_CLAVE = (
+    "afiliado", "afiliada", "activo", "vinculado", "habilitado", "vigente", "registra",
+    "proteccion", "fondo", "pensiones", "obligatorias", "fondo de pensiones obligatorias",
+    "constancia", "nit", "expedicion", "expide", "clase", "estado",
+)
+
+# Misma longitud que el original: las posiciones valen para ambos textos
+_SIN_TILDES = str.maketrans("áéíóúüñàèìòù\u00a0", "aeiouunaeiou ")
+
+
+def normalizar_para_busqueda(texto: str) -> str:
+    return (texto or "").lower().translate(_SIN_TILDES)
+
+
+def _digitos(s: str) -> str:
+    return re.sub(r"\D", "", s)
+
+
+# ==============================
+# Aho-Corasick
+# ==============================
+
+class Automata:
+    """Autómata Aho-Corasick: encuentra todas las palabras clave en una pasada."""
+
+    def __init__(self, palabras):
+        self._siguiente: list[dict[str, int]] = [{}]
+        self._falla: list[int] = [0]
+        self._salida: list[list[str]] = [[]]
+        for palabra in palabras:
+            estado = 0
+            for c in palabra:
+                if c not in self._siguiente[estado]:
+                    self._siguiente.append({})
+                    self._falla.append(0)
+                    self._salida.append([])
+                    self._siguiente[estado][c] = len(self._siguiente) - 1
+                estado = self._siguiente[estado][c]
+            self._salida[estado].append(palabra)
+
+        # Enlaces de falla por BFS (los hijos de la raíz fallan a la raíz)
+        cola = deque(self._siguiente[0].values())
+        while cola:
+            estado = cola.popleft()
+            for c, hijo in self._siguiente[estado].items():
+                cola.append(hijo)
+                f = self._falla[estado]
+                while f and c not in self._siguiente[f]:
+                    f = self._falla[f]
+                destino = self._siguiente[f].get(c, 0)
+                self._falla[hijo] = destino if destino != hijo else 0
+                self._salida[hijo] = self._salida[hijo] + self._salida[self._falla[hijo]]
+
+    def buscar(self, texto: str) -> dict[str, list[int]]:
+        """Palabra -> posiciones de inicio de cada aparición."""
+        encontradas: dict[str, list[int]] = {}
+        estado = 0
+        siguiente, falla, salida = self._siguiente, self._falla, self._salida
+        for i, c in enumerate(texto):
+            while estado and c not in siguiente[estado]:
+                estado = falla[estado]
+            estado = siguiente[estado].get(c, 0)
+            for palabra in salida[estado]:
+                encontradas.setdefault(palabra, []).append(i - len(palabra) + 1)
+        return encontradas
+
+
+_automata = Automata(PALABRAS_CLAVE)
+
+
+# ==============================
+# Resultado de la extracción
+# ==============================
+
+class Extraccion:
+    """Números, fechas y palabras clave de un texto OCR, con sus posiciones."""
+
+    def __init__(self, texto: str):
+        self.texto = normalizar_para_busqueda(texto)
+        self.numeros: list[tuple[str, int]] = []
+        self.fechas: list[tuple[datetime, int]] = []
+
+        fechas_texto = []
+        for m in _PATRON_CAMPOS.finditer(self.texto):
+            if m.group("numero"):
+                self.numeros.append((m.group("numero").rstrip(".,'-"), m.start()))
+            elif m.group("fecha"):
+                d, mes, y = (int(x) for x in _PARTES_FECHA.fullmatch(m.group("fecha")).groups())
+                self._agregar_fecha(self.fechas, d, mes, y, m.start())
+                # Los dígitos de la fecha también cuentan como números sueltos
+                self.numeros.append((m.group("fecha"), m.start()))
+            else:
+                self._agregar_fecha(fechas_texto, int(m.group("dia")), MESES[m.group("mes")],
+                                    int(m.group("anio")), m.start())
+        # Las fechas numéricas tienen prioridad sobre las escritas ("5 de mayo de 2024")
+        self.fechas.extend(fechas_texto)
+
+        self.palabras = _automata.buscar(self.texto)
+
+    @staticmethod
+    def _agregar_fecha(destino, d, m, y, posicion):
+        if y < 100:
+            y += 2000
+        try:
+            destino.append((datetime(y, m, d), posicion))
+        except ValueError:
+            pass
+
+    def tiene(self, *palabras: str) -> bool:
+        """True si aparece cualquiera de las palabras clave."""
+        return any(p in self.palabras for p in palabras)
+
+    def posicion(self, palabra: str) -> int | None:
+        posiciones = self.palabras.get(palabra)
+        return posiciones[0] if posiciones else None
+
+    def candidatos(self, patron: re.Pattern = PATRON_CEDULA) -> list[str]:
+        """Dígitos de cada coincidencia de `patron` dentro de los números extraídos."""
+        return [_digitos(c) for numero, _ in self.numeros for c in patron.findall(numero) if c]
+
+    def clase_riesgo(self) -> int | None:
+        inicio = self.posicion("clase")
+        if inicio is None:
+            return None
+        m = PATRON_CLASE_RIESGO.search(self.texto, inicio)
+        return int(m.group(1)) if m else None
+
+    def estado_afiliacion(self) -> str | None:
+        inicio = self.posicion("estado")
+        if inicio is None:
+            return None
+        m = PATRON_ESTADO_AFILIACION.search(self.texto, inicio)
+        return m.group(1).upper() if m else None
+
+    def fecha_expedicion(self, dias_vigencia: int = DIAS_VIGENCIA):
+        """(fecha dd/mm/aaaa, vigente, días transcurridos) de la primera fecha válida."""
+        if not self.fechas:
+            return None, False, None
+        fecha_doc = self.fechas[0][0]
+        hoy = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+        diff_dias = (hoy - fecha_doc).days
+        return fecha_doc.strftime("%d/%m/%Y"), 0 <= diff_dias <= dias_vigencia, diff_dias
+
+
+def extraer(texto: str) -> Extraccion:
+    with etapa("extraccion"):
+        return Extraccion(texto)
@@ -0,0 +1,258 @@
+import io
+import os
+
+import numpy as np
+from PIL import Image, ImageOps
+
+try:
+    import cv2
+except ImportError:  # OpenCV es opcional: la binarización tiene versión en NumPy
+    cv2 = None
+
+# ==============================
+# Configuración
+# ==============================
+
+# Resolución pensada para texto: tesseract rinde mejor con ~300 DPI y no gana
+# nada con fotos de 12 MP; el lado mayor se limita a OCR_LADO_MAXIMO.
+OCR_DPI_OBJETIVO = int(os.getenv("OCR_DPI_OBJETIVO", "300"))
+OCR_LADO_MAXIMO = int(os.getenv("OCR_LADO_MAXIMO", "2200"))
+NORMALIZAR_BINARIZAR = os.getenv("NORMALIZAR_BINARIZAR", "1") == "1"
+NORMALIZAR_RECORTAR = os.getenv("NORMALIZAR_RECORTAR", "1") == "1"
+NORMALIZAR_ENDEREZAR = os.getenv("NORMALIZAR_ENDEREZAR", "1") == "1"
+# Detección de orientación con tesseract OSD (cuesta un pase extra)
+NORMALIZAR_OSD = os.getenv("NORMALIZAR_OSD", "0") == "1"
+
+# Tope de megapíxeles por imagen (lo revisa utils.entrada al recibir el
+# upload); como respaldo, PIL rechaza las del doble como bomba de descompresión
+MAX_MEGAPIXELES = float(os.getenv("SUBIDA_MAX_MEGAPIXELES", "50"))
+Image.MAX_IMAGE_PIXELS = int(MAX_MEGAPIXELES * 1_000_000)
+
+# Versión del pipeline: entra en la clave del cache OCR
+VERSION_NORMALIZADOR = "n2"
+
+
+# ==============================
+# Decodificación y escala
+# ==============================
+
+def decodificar(datos: bytes, lado_maximo: int = OCR_LADO_MAXIMO) -> Image.Image:
+    """Abre la imagen; si es JPEG la decodifica a escala reducida (draft)."""
+    img = Image.open(io.BytesIO(datos))
+    if img.format == "JPEG":
+        # draft elige la escala 1/2, 1/4 o 1/8 más pequeña que sigue cubriendo el tamaño pedido
+        ancho, alto = img.size
+        factor = max(ancho, alto) / lado_maximo
+        if factor > 1:
+            img.draft("L", (int(ancho / factor), int(alto / factor)))
+    img.load()
+    return img
+
+
+def redimensionar(img: Image.Image, lado_maximo: int = OCR_LADO_MAXIMO,
+                  dpi_objetivo: int = OCR_DPI_OBJETIVO) -> Image.Image:
+    """Reduce la imagen al DPI objetivo (si se conoce) y al lado máximo."""
+    escala = 1.0
+    dpi = img.info.get("dpi")
+    if dpi and dpi[0] and dpi[0] > dpi_objetivo:
+        escala = dpi_objetivo / float(dpi[0])
+    lado = max(img.size) * escala
+    if lado > lado_maximo:
+        escala *= lado_maximo / lado
+    if escala >= 1.0:
+        return img
+    nuevo = (max(1, round(img.width * escala)), max(1, round(img.height * escala)))
+    return img.resize(nuevo, Image.LANCZOS, reducing_gap=2.0)
+
+
+# ==============================
+# Binarización
+# ==============================
+
+def _sumas_ventana(gris: np.ndarray, ventana: int) -> tuple[np.ndarray, np.ndarray]:
+    """Suma y suma de cuadrados de cada ventana `ventana`x`ventana` (borde replicado).
+
+    Acumulados separables en uint32, restados en su lugar: el acumulado de
+    cuadrados desborda, pero la resta módulo 2**32 da la suma exacta de la
+    ventana (a lo sumo 31*31*255**2, muy por debajo de 2**32). Cada arreglo
+    ocupa 4 bytes por píxel, sin copias por índices.
+    """
+    r = ventana // 2
+    pad = np.pad(gris, r, mode="edge").astype(np.uint32)
+    sumas = []
+    for tabla in (pad, np.square(pad, out=pad.copy())):
+        for eje in (0, 1):
+            np.cumsum(tabla, axis=eje, dtype=np.uint32, out=tabla)
+            if eje == 0:
+                ventanas = tabla[ventana - 1:].copy()
+                ventanas[1:] -= tabla[:-ventana]
+            else:
+                ventanas = tabla[:, ventana - 1:].copy()
+                ventanas[:, 1:] -= tabla[:, :-ventana]
+            tabla = ventanas
+        sumas.append(tabla)
+    return sumas[0], sumas[1]
+
+
+def binarizar(gris: np.ndarray, ventana: int = 31, k: float = 0.2) -> np.ndarray:
+    """Umbral local de Sauvola.
+
+    Aguanta la iluminación despareja de las fotos de celular mejor que un
+    umbral global. Media y desviación por ventana en float32 (cv2.boxFilter
+    si OpenCV está instalado). Devuelve uint8 con texto en 0 y fondo en 255.
+    """
+    n = float(ventana * ventana)
+    if cv2 is not None:
+        g = gris.astype(np.float32)
+        media = cv2.boxFilter(g, cv2.CV_32F, (ventana, ventana), borderType=cv2.BORDER_REPLICATE)
+        umbral = cv2.sqrBoxFilter(g, cv2.CV_32F, (ventana, ventana), borderType=cv2.BORDER_REPLICATE)
+        del g
+    else:
+        suma, suma2 = _sumas_ventana(gris, ventana)
+        media = suma.astype(np.float32)
+        media /= n
+        del suma
+        umbral = suma2.astype(np.float32)
+        umbral /= n
+        del suma2
+    # umbral = media * (1 + k * (desviación / 128 - 1)), calculado en su lugar
+    umbral -= np.square(media)
+    np.maximum(umbral, 0, out=umbral)
+    np.sqrt(umbral, out=umbral)
+    umbral *= k / 128.0
+    umbral += 1 - k
+    umbral *= media
+    del media
+    return (gris > umbral).astype(np.uint8) * np.uint8(255)
+
+
+# ==============================
+# Recorte del borde
+# ==============================
+
+def caja_contenido(gris: np.ndarray, tolerancia: int = 35, margen: float = 0.01):
+    """Caja (izq, arriba, der, abajo) del documento dentro de la foto.
+
+    El fondo se estima con la mediana del borde de la imagen; filas y
+    columnas con suficientes píxeles distintos del fondo son contenido.
+    """
+    borde = np.concatenate([gris[0], gris[-1], gris[:, 0], gris[:, -1]])
+    fondo = np.median(borde)
+    mascara = np.abs(gris.astype(np.int16) - int(fondo)) > tolerancia
+
+    alto, ancho = gris.shape
+    filas = np.flatnonzero(mascara.mean(axis=1) > 0.02)
+    if filas.size == 0:
+        return 0, 0, ancho, alto
+    # Las columnas se miden solo en la franja con contenido: en una página
+    # con poco texto, el final de los renglones no llega al 2% de toda la altura
+    columnas = np.flatnonzero(mascara[filas[0]:filas[-1] + 1].mean(axis=0) > 0.02)
+    if columnas.size == 0:
+        return 0, 0, ancho, alto
+
+    mx, my = int(ancho * margen), int(alto * margen)
+    caja = (
+        max(0, int(columnas[0]) - mx),
+        max(0, int(filas[0]) - my),
+        min(ancho, int(columnas[-1]) + 1 + mx),
+        min(alto, int(filas[-1]) + 1 + my),
+    )
+    # Si casi no se recorta nada, no vale la pena
+    if (caja[2] - caja[0]) * (caja[3] - caja[1]) > 0.97 * ancho * alto:
+        return 0, 0, ancho, alto
+    return caja
+
+
+def fondo_oscuro(gris: np.ndarray, umbral: int = 128) -> bool:
+    """True si el borde es oscuro: foto de un documento sobre una mesa, no un escaneo."""
+    borde = np.concatenate([gris[0], gris[-1], gris[:, 0], gris[:, -1]])
+    return np.median(borde) < umbral
+
+
+# ==============================
+# Orientación y enderezado
+# ==============================
+
+def orientar(img: Image.Image) -> Image.Image:
+    """Rota 90/180/270 según tesseract OSD (solo si NORMALIZAR_OSD=1)."""
+    try:
+        import pytesseract
+        osd = pytesseract.image_to_osd(img, output_type=pytesseract.Output.DICT)
+        angulo = int(osd.get("rotate", 0))
+        if angulo:
+            return img.rotate(-angulo, expand=True, fillcolor=255)
+    except Exception:
+        pass
+    return img
+
+
+def angulo_inclinacion(binaria: np.ndarray, maximo: float = 5.0, paso: float = 0.5) -> float:
+    """Ángulo de inclinación por perfil de proyección sobre una miniatura.
+
+    Las líneas de texto derechas producen el perfil horizontal con mayor
+    varianza.
+    """
+    mini = Image.fromarray(255 - binaria)
+    mini.thumbnail((800, 800))
+    mejor_angulo, mejor_puntaje = 0.0, -1.0
+    for angulo in np.arange(-maximo, maximo + paso / 2, paso):
+        rotada = np.asarray(mini.rotate(float(angulo), resample=Image.NEAREST, fillcolor=0))
+        perfil = rotada.sum(axis=1, dtype=np.float64)
+        puntaje = float(np.var(perfil))
+        if puntaje > mejor_puntaje:
+            mejor_angulo, mejor_puntaje = float(angulo), puntaje
+    return mejor_angulo
+
+
+# ==============================
+# Pipeline completo
+# ==============================
+
+def normalizar_imagen(origen) -> tuple[Image.Image, dict]:
+    """Prepara una imagen para OCR: escala, grises, recorte, enderezado, binarizado.
+
+    `origen` puede ser bytes (permite decodificar JPEG en modo draft) o una
+    imagen PIL. Devuelve la imagen lista y un dict con lo que se aplicó,
+    incluida la caja del documento en coordenadas relativas (0-1).
+    """
+    if isinstance(origen, Image.Image):
+        img = origen
+    else:
+        img = decodificar(origen)
+    tamano_original = img.size
+
+    img = ImageOps.exif_transpose(img)
+    img = redimensionar(img)
+    img = img.convert("L")
+    if NORMALIZAR_OSD:
+        img = orientar(img)
+
+    gris = np.asarray(img)
+    info = {"tamanoOriginal": tamano_original, "caja": (0.0, 0.0, 1.0, 1.0),
+            "pagina": (0.0, 0.0, 1.0, 1.0), "angulo": 0.0}
+
+    if NORMALIZAR_RECORTAR:
+        izq, arr, der, aba = caja_contenido(gris)
+        alto, ancho = gris.shape
+        info["caja"] = (izq / ancho, arr / alto, der / ancho, aba / alto)
+        # En un escaneo la página es toda la imagen y el recorte solo quita
+        # margen blanco; en una foto el recorte es el borde del documento
+        if fondo_oscuro(gris):
+            info["pagina"] = info["caja"]
+        gris = gris[arr:aba, izq:der]
+
+    binaria = binarizar(gris) if NORMALIZAR_BINARIZAR else None
+
+    if NORMALIZAR_ENDEREZAR:
+        referencia = binaria if binaria is not None else binarizar(gris)
+        angulo = angulo_inclinacion(referencia)
+        if angulo:
+            info["angulo"] = angulo
+            salida = binaria if binaria is not None else gris
+            rotada = Image.fromarray(salida).rotate(angulo, resample=Image.BICUBIC, expand=True, fillcolor=255)
+            info["tamano"] = rotada.size
+            return rotada, info
+
+    resultado = Image.fromarray(binaria if binaria is not None else gris)
+    info["tamano"] = resultado.size
+    return resultado, info
@@ -0,0 +1,253 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# ==============================
+# Registro de métricas (formato Prometheus)
+# ==============================
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_LONGITUD = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def _clave(etiquetas: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in etiquetas.items()))
+
+
+def _escapar(valor) -> str:
+    """Valor de etiqueta para el formato de texto de Prometheus: barra invertida, comillas y saltos escapados."""
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear_etiquetas(clave: tuple, extra: tuple = ()) -> str:
+    pares = list(clave) + list(extra)
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+class Contador:
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str):
+        self.nombre, self.ayuda = nombre, ayuda
+        self._valores: dict[tuple, float] = {}
+
+    def inc(self, valor: float = 1, **etiquetas):
+        clave = _clave(etiquetas)
+        self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def lineas(self):
+        for clave, valor in self._valores.items():
+            yield f"{self.nombre}{_formatear_etiquetas(clave)} {valor}"
+
+
+class Medidor(Contador):
+    tipo = "gauge"
+
+    def dec(self, valor: float = 1, **etiquetas):
+        self.inc(-valor, **etiquetas)
+
+    def fijar(self, valor: float, **etiquetas):
+        self._valores[_clave(etiquetas)] = valor
+
+
+class Histograma:
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, buckets=BUCKETS_SEGUNDOS):
+        self.nombre, self.ayuda = nombre, ayuda
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}  # clave -> [conteos por bucket, suma, total]
+
+    def observar(self, valor: float, **etiquetas):
+        clave = _clave(etiquetas)
+        serie = self._series.get(clave)
+        if serie is None:
+            serie = self._series[clave] = [[0] * len(self.buckets), 0.0, 0]
+        i = bisect.bisect_left(self.buckets, valor)
+        if i < len(self.buckets):
+            serie[0][i] += 1
+        serie[1] += valor
+        serie[2] += 1
+
+    def lineas(self):
+        for clave, (conteos, suma, total) in self._series.items():
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, conteos):
+                acumulado += conteo
+                yield f"{self.nombre}_bucket{_formatear_etiquetas(clave, (('le', limite),))} {acumulado}"
+            yield f"{self.nombre}_bucket{_formatear_etiquetas(clave, (('le', '+Inf'),))} {total}"
+            yield f"{self.nombre}_sum{_formatear_etiquetas(clave)} {suma}"
+            yield f"{self.nombre}_count{_formatear_etiquetas(clave)} {total}"
+
+
+class Registro:
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, metrica):
+        self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def aplicar(self, muestras: list[tuple]):
+        """Vuelca muestras (nombre, operación, valor, etiquetas) recolectadas en un worker."""
+        with self._lock:
+            for nombre, operacion, valor, etiquetas in muestras:
+                metrica = self._metricas.get(nombre)
+                if metrica is not None:
+                    getattr(metrica, operacion)(valor, **etiquetas)
+
+    def exportar(self) -> str:
+        with self._lock:
+            salida = []
+            for m in self._metricas.values():
+                salida.append(f"# HELP {m.nombre} {m.ayuda}")
+                salida.append(f"# TYPE {m.nombre} {m.tipo}")
+                salida.extend(m.lineas())
+            return "\n".join(salida) + "\n"
+
+
+registro = Registro()
+
+ETAPA_SEGUNDOS = registro.registrar(Histograma(
+    "validacion_etapa_segundos", "Duración de cada etapa de validación por tipo de documento"))
+DOCUMENTO_SEGUNDOS = registro.registrar(Histograma(
+    "validacion_documento_segundos", "Duración total de la validación de un documento"))
+HTTP_SEGUNDOS = registro.registrar(Histograma(
+    "http_peticion_segundos", "Duración de las peticiones HTTP por ruta"))
+TEXTO_LONGITUD = registro.registrar(Histograma(
+    "ocr_texto_longitud_caracteres", "Longitud del texto OCR por tipo de documento", BUCKETS_LONGITUD))
+PASES_OCR = registro.registrar(Contador(
+    "ocr_pases_total", "Pases de tesseract ejecutados (incluye reintentos de idioma)"))
+REINTENTOS_OCR = registro.registrar(Contador(
+    "ocr_reintentos_total", "Pases de respaldo por idioma en la cédula"))
+CACHE_OCR = registro.registrar(Contador(
+    "ocr_cache_total", "Consultas al cache OCR por resultado"))
+NIVEL_OCR = registro.registrar(Contador(
+    "ocr_nivel_total", "Nivel de OCR que resolvió cada documento (paginas, pdf, rapido, regiones, pagina)"))
+DOCUMENTOS = registro.registrar(Contador(
+    "validacion_documentos_total", "Documentos validados por tipo"))
+VERIFICACIONES = registro.registrar(Contador(
+    "verificaciones_consultas_total", "Consultas al almacén de verificaciones por conductor (hit/miss)"))
+CLASIFICADOS = registro.registrar(Contador(
+    "clasificacion_documentos_total", "Documentos sin etiqueta de /validar/auto por tipo detectado"))
+COALESCIDOS = registro.registrar(Contador(
+    "validacion_coalescida_total", "Validaciones que esperaron el resultado de otra idéntica en curso"))
+UPLOADS_GUARDADOS = registro.registrar(Contador(
+    "uploads_guardados_total", "Copias de documentos subidos por resultado (nuevo/duplicado)"))
+UPLOADS_ELIMINADOS = registro.registrar(Contador(
+    "uploads_eliminados_total", "Copias borradas por el limpiador por motivo (ttl, cuota, temporal)"))
+UPLOADS_BYTES = registro.registrar(Medidor(
+    "uploads_bytes", "Bytes ocupados por las copias de documentos en la última limpieza"))
+EN_CURSO = registro.registrar(Medidor(
+    "validacion_en_curso", "Validaciones en ejecución por tipo de documento"))
+TRABAJOS_EN_COLA = registro.registrar(Medidor(
+    "trabajos_en_cola", "Trabajos de /trabajos esperando un worker"))
+
+
+def registrar(nombre: str, operacion: str, valor: float = 1, **etiquetas):
+    """Registra una muestra desde el proceso principal."""
+    registro.aplicar([(nombre, operacion, valor, etiquetas)])
+
+
+# ==============================
+# Recolección en el worker
+# ==============================
+#
+# Los validadores corren en otro proceso: ahí no se toca el registro, se
+# juntan muestras en un recolector por hilo y viajan de vuelta con el
+# resultado (ver utils.ejecutor).
+
+_local = threading.local()
+
+
+@contextmanager
+def recolectar(tipo: str):
+    anterior = getattr(_local, "recolector", None)
+    _local.recolector = {"tipo": tipo, "muestras": []}
+    try:
+        yield _local.recolector["muestras"]
+    finally:
+        _local.recolector = anterior
+
+
+def tipo_actual() -> str | None:
+    """Tipo de documento que valida este hilo (None fuera de un validador)."""
+    recolector = getattr(_local, "recolector", None)
+    return recolector["tipo"] if recolector else None
+
+
+def _emitir(nombre: str, operacion: str, valor: float, **etiquetas):
+    recolector = getattr(_local, "recolector", None)
+    if recolector is None:
+        return
+    etiquetas.setdefault("tipo", recolector["tipo"])
+    recolector["muestras"].append((nombre, operacion, valor, etiquetas))
+
+
+def contar(nombre: str, valor: float = 1, **etiquetas):
+    _emitir(nombre, "inc", valor, **etiquetas)
+
+
+def observar(nombre: str, valor: float, **etiquetas):
+    _emitir(nombre, "observar", valor, **etiquetas)
+
+
+@contextmanager
+def etapa(nombre: str):
+    """Cronometra una etapa del validador en curso."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        observar(ETAPA_SEGUNDOS.nombre, time.perf_counter() - inicio, etapa=nombre)
+
+
+def medir_validador(tipo: str, validador, *args):
+    """Corre en el pool: ejecuta el validador y devuelve (resultado, muestras)."""
+    with recolectar(tipo) as muestras:
+        inicio = time.perf_counter()
+        resultado = validador(*args)
+        observar(DOCUMENTO_SEGUNDOS.nombre, time.perf_counter() - inicio)
+    return resultado, muestras
+
+
+# ==============================
+# Server-Timing por petición
+# ==============================
+
+_tiempos_peticion: contextvars.ContextVar[dict | None] = contextvars.ContextVar("tiempos_peticion", default=None)
+
+
+def iniciar_peticion() -> dict:
+    tiempos = {}
+    _tiempos_peticion.set(tiempos)
+    return tiempos
+
+
+def sumar_tiempo(etapa_nombre: str, segundos: float):
+    tiempos = _tiempos_peticion.get()
+    if tiempos is not None:
+        tiempos[etapa_nombre] = tiempos.get(etapa_nombre, 0.0) + segundos
+
+
+def aplicar_muestras(muestras: list[tuple]):
+    """En el proceso principal: registra las muestras y las suma al Server-Timing."""
+    registro.aplicar(muestras)
+    for nombre, _, valor, etiquetas in muestras:
+        if nombre == ETAPA_SEGUNDOS.nombre:
+            sumar_tiempo(etiquetas["etapa"], valor)
+
+
+def registrar_etapa(tipo: str, etapa_nombre: str, segundos: float):
+    """Etapa medida en el proceso principal (lectura del upload, serialización)."""
+    registrar(ETAPA_SEGUNDOS.nombre, "observar", segundos, tipo=tipo, etapa=etapa_nombre)
+    sumar_tiempo(etapa_nombre, segundos)
+
+
+def server_timing(tiempos: dict) -> str:
+    return ", ".join(f"{nombre};dur={segundos * 1000:.1f}" for nombre, segundos in tiempos.items())
@@ -0,0 +1,82 @@
+import os
+
+from utils import metricas
+from utils.documento_ocr import CLAVE_PAGINAS, DocumentoOCR, leer_documento, leer_pdf
+from utils.ocr import preparar_fuente
+from utils.plantillas import leer_regiones, texto_regiones
+
+# ==============================
+# OCR por niveles
+# ==============================
+#
+# Para validar solo hace falta confirmar que la cédula, el nombre o el código
+# esperados están en el documento. Los niveles van de barato a caro y se sube
+# solo si el validador no confirma todo con el anterior:
+#   paginas  -> documento de varias páginas que utils.paginas ya leyó en
+#               paralelo en el pool; se usa tal cual
+#   pdf      -> la capa de texto de un PDF (utils.pdf); es exacta, así que
+#               su resultado se devuelve aunque no confirme
+#   rapido   -> imagen reducida a OCR_LADO_RAPIDO con psm 6: primero las
+#               regiones de la plantilla (dígitos en los campos numéricos)
+#               y, si con ellas no se confirma, la página reducida por
+#               palabras (utils.documento_ocr). Si la página reducida ya se
+#               leyó para clasificar el documento, las regiones se saltan
+#   regiones -> las regiones de la plantilla a resolución completa
+#   pagina   -> el OCR completo de siempre
+
+OCR_NIVELES = os.getenv("OCR_NIVELES", "1") == "1"
+OCR_LADO_RAPIDO = int(os.getenv("OCR_LADO_RAPIDO", "1100"))
+CONFIG_RAPIDA = "--psm 6"
+# Clave en Fuente.documentos de la página reducida (la misma que arma leer_documento)
+CLAVE_RAPIDA = ("spa", CONFIG_RAPIDA, OCR_LADO_RAPIDO)
+
+
+def leer_rapido(fuente) -> DocumentoOCR:
+    """Página completa reducida a OCR_LADO_RAPIDO; también la usa utils.clasificador."""
+    return leer_documento(fuente, lang="spa", config=CONFIG_RAPIDA, lado_maximo=OCR_LADO_RAPIDO)
+
+
+def _documento_regiones(fuente, plantilla: str, lado_maximo: int | None = None) -> DocumentoOCR:
+    regiones = leer_regiones(fuente, plantilla, lado_maximo=lado_maximo)
+    return DocumentoOCR.desde_texto(texto_regiones(regiones) if regiones else "")
+
+
+def resolver_por_niveles(fuente, plantilla: str | None, evaluar, pagina):
+    """(resultado, nivel) del primer nivel que el validador confirma.
+
+    `evaluar(documento)` recibe un DocumentoOCR y devuelve (resultado,
+    confirmado) para los niveles baratos; `pagina()` devuelve el resultado
+    con el OCR completo y es el último recurso. Un PDF con capa de texto se
+    resuelve solo con ella (nivel "pdf").
+    """
+    fuente = preparar_fuente(fuente)
+    documento = fuente.documentos.get(CLAVE_PAGINAS)
+    if documento is not None:
+        metricas.contar(metricas.NIVEL_OCR.nombre, nivel="paginas")
+        return evaluar(documento)[0], "paginas"
+
+    if fuente.es_pdf:
+        documento = leer_pdf(fuente)
+        if documento is not None:
+            metricas.contar(metricas.NIVEL_OCR.nombre, nivel="pdf")
+            return evaluar(documento)[0], "pdf"
+
+    if OCR_NIVELES:
+        intentos = []
+        # Si la página reducida ya se leyó al clasificar el documento, sale gratis: va primero
+        if plantilla and CLAVE_RAPIDA not in fuente.documentos:
+            intentos.append(("rapido", lambda: _documento_regiones(fuente, plantilla, OCR_LADO_RAPIDO)))
+        intentos.append(("rapido", lambda: leer_rapido(fuente)))
+        if plantilla:
+            intentos.append(("regiones", lambda: _documento_regiones(fuente, plantilla)))
+        for nivel, leer in intentos:
+            documento = leer()
+            if not documento.palabras:
+                continue
+            resultado, confirmado = evaluar(documento)
+            if confirmado:
+                metricas.contar(metricas.NIVEL_OCR.nombre, nivel=nivel)
+                return resultado, nivel
+
+    metricas.contar(metricas.NIVEL_OCR.nombre, nivel="pagina")
+    return pagina(), "pagina"
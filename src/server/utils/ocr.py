@@ -0,0 +1,235 @@
+import hashlib
+import io
+import os
+
+from PIL import Image
+
+from utils import metricas
+from utils.file_normalizer import normalizar_imagen, VERSION_NORMALIZADOR
+from utils.ocr_backend import obtener_backend
+from utils.ocr_cache import cache_ocr, OCR_CACHE_ACTIVO
+from utils.pdf import es_pdf, rasterizar
+
+# Pasar las imágenes por utils/file_normalizer antes de tesseract
+NORMALIZAR_OCR = os.getenv("NORMALIZAR_OCR", "1") == "1"
+
+# ==============================
+# Lectura de la fuente
+# ==============================
+
+def leer_bytes(fuente) -> bytes:
+    """Devuelve los bytes crudos de una ruta, bytes o archivo abierto."""
+    if isinstance(fuente, (bytes, bytearray, memoryview)):
+        return bytes(fuente)
+    if isinstance(fuente, (str, os.PathLike)):
+        with open(fuente, "rb") as f:
+            return f.read()
+    if hasattr(fuente, "read"):
+        posicion = fuente.tell() if hasattr(fuente, "tell") else None
+        datos = fuente.read()
+        if posicion is not None:
+            fuente.seek(posicion)
+        return datos
+    raise TypeError(f"Fuente no soportada: {type(fuente).__name__}")
+
+
+def huella(datos: bytes) -> str:
+    return hashlib.sha256(datos).hexdigest()
+
+
+class Fuente:
+    """Documento a procesar: se hashea y se decodifica una sola vez.
+
+    Acepta ruta, bytes, archivo abierto o una imagen PIL ya decodificada.
+    Si los bytes son un PDF o un TIFF de varias páginas, la imagen es la
+    primera; `pagina(n)` da una Fuente por cada página (ver utils.paginas).
+    """
+
+    def __init__(self, origen):
+        if isinstance(origen, Fuente):
+            self.datos, self._imagen, self._digest = origen.datos, origen._imagen, origen._digest
+            self._normalizada, self.info_normalizacion = origen._normalizada, origen.info_normalizacion
+            self.documentos = origen.documentos
+            return
+        if isinstance(origen, Image.Image):
+            self.datos, self._imagen, self._digest = None, origen, None
+        else:
+            self.datos, self._imagen, self._digest = leer_bytes(origen), None, None
+        self._normalizada = None
+        self.info_normalizacion = None
+        # DocumentoOCR ya armados, por (lang, config, lado_maximo); ver utils.documento_ocr
+        self.documentos = {}
+
+    @property
+    def digest(self) -> str:
+        if self._digest is None:
+            if self.datos is not None:
+                self._digest = huella(self.datos)
+            else:
+                img = self._imagen
+                self._digest = huella(f"{img.mode}{img.size}".encode() + img.tobytes())
+        return self._digest
+
+    @property
+    def imagen(self) -> Image.Image:
+        if self._imagen is None:
+            if self.es_pdf:
+                with metricas.etapa("rasterizacion"):
+                    self._imagen = rasterizar(self.datos, 0)
+            else:
+                with metricas.etapa("decodificacion"):
+                    self._imagen = Image.open(io.BytesIO(self.datos))
+                    self._imagen.load()
+        return self._imagen
+
+    @property
+    def es_pdf(self) -> bool:
+        return es_pdf(self.datos)
+
+    def pagina(self, n: int) -> "Fuente":
+        """Fuente con la página `n` (PDF rasterizado o cuadro de un TIFF); cache propio por página."""
+        if n == 0:
+            return self
+        if self.es_pdf:
+            with metricas.etapa("rasterizacion"):
+                imagen = rasterizar(self.datos, n)
+        else:
+            with metricas.etapa("decodificacion"):
+                imagen = Image.open(io.BytesIO(self.datos))
+                imagen.seek(n)
+                imagen = imagen.copy()
+        pagina = Fuente(imagen)
+        pagina._digest = f"{self.digest}#p{n}"
+        return pagina
+
+    @property
+    def normalizada(self) -> Image.Image:
+        """Imagen pasada por el normalizador (decodificada en modo draft si es JPEG)."""
+        if self._normalizada is None:
+            # De JPEG y PNG se pasan los bytes (draft); de un PDF, la página ya rasterizada
+            origen = self.imagen if self._imagen is not None or self.es_pdf else self.datos
+            with metricas.etapa("normalizacion"):
+                self._normalizada, self.info_normalizacion = normalizar_imagen(origen)
+        return self._normalizada
+
+    def imagen_ocr(self, normalizar: bool = NORMALIZAR_OCR) -> Image.Image:
+        return self.normalizada if normalizar else self.imagen
+
+
+def preparar_fuente(origen) -> Fuente:
+    return origen if isinstance(origen, Fuente) else Fuente(origen)
+
+
+# ==============================
+# OCR con cache
+# ==============================
+
+def _clave(digest: str, tipo: str, lang: str, config: str) -> str:
+    return f"{digest}|{tipo}|{lang}|{config}"
+
+
+def _ocr_cacheado(fuente: Fuente, tipo: str, lang: str, config: str, calcular):
+    if NORMALIZAR_OCR:
+        tipo = f"{tipo}:{VERSION_NORMALIZADOR}"
+    clave = _clave(fuente.digest, tipo, lang, config)
+    if OCR_CACHE_ACTIVO:
+        valor, origen = cache_ocr.buscar(clave)
+        metricas.contar(metricas.CACHE_OCR.nombre, resultado=origen or "miss")
+        if valor is not None:
+            return valor
+
+    imagen = fuente.imagen_ocr()
+    with metricas.etapa("ocr"):
+        valor = calcular(imagen)
+    metricas.contar(metricas.PASES_OCR.nombre)
+    metricas.observar(metricas.TEXTO_LONGITUD.nombre, _longitud_texto(valor))
+    if OCR_CACHE_ACTIVO:
+        cache_ocr.guardar(clave, valor)
+    return valor
+
+
+def _longitud_texto(valor) -> int:
+    if isinstance(valor, str):
+        return len(valor)
+    return sum(len(p.strip()) for p in valor.get("text", []) if p)
+
+
+def _reducir(img: Image.Image, factor: float) -> Image.Image:
+    if factor >= 1:
+        return img
+    return img.resize((max(1, round(img.width * factor)), max(1, round(img.height * factor))), Image.BILINEAR)
+
+
+def _factor(img: Image.Image, lado_maximo: int | None) -> float:
+    return lado_maximo / max(img.size) if lado_maximo else 1.0
+
+
+def extraer_texto(origen, lang: str = "spa", config: str = "", lado_maximo: int | None = None) -> str:
+    """OCR a texto plano con cache por contenido (hash de bytes + idioma + config).
+
+    Con `lado_maximo` la imagen se reduce antes de tesseract (pase rápido).
+    """
+    tipo = f"texto@{lado_maximo}" if lado_maximo else "texto"
+    return _ocr_cacheado(
+        preparar_fuente(origen), tipo, lang, config,
+        lambda img: obtener_backend().texto(_reducir(img, _factor(img, lado_maximo)), lang=lang, config=config),
+    )
+
+
+def extraer_datos(origen, lang: str = "spa", config: str = "", lado_maximo: int | None = None) -> dict:
+    """OCR por palabra (cajas y confianzas, formato image_to_data) con el mismo cache."""
+    tipo = f"datos@{lado_maximo}" if lado_maximo else "datos"
+    return _ocr_cacheado(
+        preparar_fuente(origen), tipo, lang, config,
+        lambda img: obtener_backend().datos(_reducir(img, _factor(img, lado_maximo)), lang=lang, config=config),
+    )
+
+
+def extraer_texto_region(origen, region: tuple, lang: str = "spa", config: str = "",
+                         lado_maximo: int | None = None) -> str:
+    """OCR de una región (x0, y0, x1, y1 relativos a la imagen de OCR) con el mismo cache.
+
+    `lado_maximo` se refiere a la imagen completa: la región se reduce en la misma proporción.
+    """
+    def calcular(img):
+        ancho, alto = img.size
+        x0, y0, x1, y1 = region
+        recorte = img.crop((round(x0 * ancho), round(y0 * alto), round(x1 * ancho), round(y1 * alto)))
+        return obtener_backend().texto(_reducir(recorte, _factor(img, lado_maximo)), lang=lang, config=config)
+
+    etiqueta = "region:" + ",".join(f"{v:.3f}" for v in region)
+    if lado_maximo:
+        etiqueta += f"@{lado_maximo}"
+    return _ocr_cacheado(preparar_fuente(origen), etiqueta, lang, config, calcular)
+
+
+# ==============================
+# Utilidades sobre image_to_data
+# ==============================
+
+def texto_desde_datos(datos: dict) -> str:
+    """Reconstruye el texto plano (una línea por renglón) desde image_to_data."""
+    lineas = []
+    actual = None
+    palabras = []
+    for i, palabra in enumerate(datos.get("text", [])):
+        if not palabra or not palabra.strip():
+            continue
+        linea = (datos["block_num"][i], datos["par_num"][i], datos["line_num"][i])
+        if linea != actual and palabras:
+            lineas.append(" ".join(palabras))
+            palabras = []
+        actual = linea
+        palabras.append(palabra.strip())
+    if palabras:
+        lineas.append(" ".join(palabras))
+    return "\n".join(lineas)
+
+
+def confianzas(datos: dict) -> list[float]:
+    """Confianzas (0-100) de las palabras reconocidas, sin las cajas vacías."""
+    return [
+        float(c)
+        for palabra, c in zip(datos.get("text", []), datos.get("conf", []))
+        if palabra and palabra.strip() and float(c) >= 0
+    ]
@@ -0,0 +1,243 @@
+import importlib
+import os
+import queue
+import shlex
+import threading
+from contextlib import contextmanager
+
+import pytesseract
+from PIL import Image
+
+# ==============================
+# Configuración
+# ==============================
+
+# OCR_BACKEND: "auto" (tesserocr si está instalado), "tesserocr", "pytesseract"
+# o "modulo:Clase" con un BackendOCR propio (p. ej. benchmarks.ocr_falso:BackendFalso)
+OCR_BACKEND = os.getenv("OCR_BACKEND", "auto")
+# Idiomas que cada worker deja cargados al arrancar
+OCR_IDIOMAS = [l for l in os.getenv("OCR_IDIOMAS", "spa").split(",") if l]
+# Motores simultáneos por combinación idioma+config dentro de un proceso
+OCR_MOTORES_POR_CONFIG = int(os.getenv("OCR_MOTORES_POR_CONFIG", "1"))
+# Segundos que se espera un motor libre antes de fallar (y caer al respaldo)
+OCR_MOTOR_ESPERA = float(os.getenv("OCR_MOTOR_ESPERA", "30"))
+
+
+class BackendOCR:
+    """Interfaz común: texto plano y datos por palabra (formato image_to_data)."""
+
+    nombre = "base"
+
+    def texto(self, imagen: Image.Image, lang: str = "spa", config: str = "") -> str:
+        raise NotImplementedError
+
+    def datos(self, imagen: Image.Image, lang: str = "spa", config: str = "") -> dict:
+        raise NotImplementedError
+
+    def precalentar(self, idiomas: list[str]):
+        pass
+
+
+# ==============================
+# pytesseract: un proceso tesseract por llamada
+# ==============================
+
+class BackendPytesseract(BackendOCR):
+    nombre = "pytesseract"
+
+    def texto(self, imagen, lang="spa", config=""):
+        return pytesseract.image_to_string(imagen, lang=lang, config=config)
+
+    def datos(self, imagen, lang="spa", config=""):
+        return pytesseract.image_to_data(imagen, lang=lang, config=config, output_type=pytesseract.Output.DICT)
+
+
+# ==============================
+# tesserocr: motores residentes con el modelo ya cargado
+# ==============================
+
+def _parsear_config(config: str) -> tuple[int | None, int | None, dict]:
+    """Traduce la config estilo CLI (--psm 6 -c clave=valor) a parámetros del API."""
+    psm, oem, variables = None, None, {}
+    partes = shlex.split(config or "")
+    i = 0
+    while i < len(partes):
+        parte = partes[i]
+        if parte == "--psm" and i + 1 < len(partes):
+            psm, i = int(partes[i + 1]), i + 1
+        elif parte == "--oem" and i + 1 < len(partes):
+            oem, i = int(partes[i + 1]), i + 1
+        elif parte == "-c" and i + 1 < len(partes) and "=" in partes[i + 1]:
+            clave, valor = partes[i + 1].split("=", 1)
+            variables[clave] = valor
+            i += 1
+        i += 1
+    return psm, oem, variables
+
+
+class BackendTesserocr(BackendOCR):
+    """Pool de PyTessBaseAPI por (idioma, config), vivo mientras viva el proceso.
+
+    Evita lanzar un proceso tesseract, recargar el traineddata y pasar la
+    imagen por un archivo temporal en cada llamada.
+    """
+
+    nombre = "tesserocr"
+
+    def __init__(self, motores_por_config: int = OCR_MOTORES_POR_CONFIG, espera: float = OCR_MOTOR_ESPERA):
+        import tesserocr  # noqa: F401  (falla aquí si no está instalado)
+        self._tesserocr = tesserocr
+        self._motores_por_config = motores_por_config
+        self._espera = espera
+        self._pools: dict[tuple[str, str], queue.Queue] = {}
+        self._creados: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _crear_motor(self, lang: str, config: str):
+        tesserocr = self._tesserocr
+        psm, oem, variables = _parsear_config(config)
+        kwargs = {"lang": lang}
+        if psm is not None:
+            kwargs["psm"] = psm
+        if oem is not None:
+            kwargs["oem"] = oem
+        motor = tesserocr.PyTessBaseAPI(**kwargs)
+        for clave, valor in variables.items():
+            motor.SetVariable(clave, valor)
+        return motor
+
+    @contextmanager
+    def _motor(self, lang: str, config: str):
+        clave = (lang, config)
+        with self._lock:
+            pool = self._pools.setdefault(clave, queue.Queue())
+            crear = pool.empty() and self._creados.get(clave, 0) < self._motores_por_config
+            if crear:
+                self._creados[clave] = self._creados.get(clave, 0) + 1
+        if crear:
+            try:
+                motor = self._crear_motor(lang, config)
+            except Exception:
+                # El cupo no se usó: el siguiente llamado vuelve a intentar crear el motor
+                with self._lock:
+                    self._creados[clave] -= 1
+                raise
+        else:
+            try:
+                motor = pool.get(timeout=self._espera)
+            except queue.Empty:
+                raise TimeoutError(f"Ningún motor tesserocr libre para {lang} '{config}' en {self._espera:g}s")
+        try:
+            yield motor
+        finally:
+            motor.Clear()
+            pool.put(motor)
+
+    def precalentar(self, idiomas):
+        for lang in idiomas:
+            with self._motor(lang, ""):
+                pass
+
+    def texto(self, imagen, lang="spa", config=""):
+        with self._motor(lang, config) as motor:
+            motor.SetImage(imagen)
+            return motor.GetUTF8Text()
+
+    def datos(self, imagen, lang="spa", config=""):
+        RIL = self._tesserocr.RIL
+        salida = {k: [] for k in (
+            "level", "page_num", "block_num", "par_num", "line_num", "word_num",
+            "left", "top", "width", "height", "conf", "text",
+        )}
+        with self._motor(lang, config) as motor:
+            motor.SetImage(imagen)
+            motor.Recognize()
+            iterador = motor.GetIterator()
+            bloque = parrafo = linea = palabra = 0
+            for it in self._tesserocr.iterate_level(iterador, RIL.WORD):
+                if it.IsAtBeginningOf(RIL.BLOCK):
+                    bloque, parrafo, linea, palabra = bloque + 1, 0, 0, 0
+                if it.IsAtBeginningOf(RIL.PARA):
+                    parrafo, linea, palabra = parrafo + 1, 0, 0
+                if it.IsAtBeginningOf(RIL.TEXTLINE):
+                    linea, palabra = linea + 1, 0
+                palabra += 1
+                caja = it.BoundingBox(RIL.WORD)
+                if caja is None:
+                    continue
+                x1, y1, x2, y2 = caja
+                for k, v in (
+                    ("level", 5), ("page_num", 1), ("block_num", bloque), ("par_num", parrafo),
+                    ("line_num", linea), ("word_num", palabra), ("left", x1), ("top", y1),
+                    ("width", x2 - x1), ("height", y2 - y1),
+                    ("conf", it.Confidence(RIL.WORD)), ("text", it.GetUTF8Text(RIL.WORD) or ""),
+                ):
+                    salida[k].append(v)
+        return salida
+
+
+# ==============================
+# Selección del backend
+# ==============================
+
+class BackendConRespaldo(BackendOCR):
+    """Usa el backend residente y cae a pytesseract si este falla."""
+
+    def __init__(self, principal: BackendOCR, respaldo: BackendOCR):
+        self.principal, self.respaldo = principal, respaldo
+        self.nombre = f"{principal.nombre}+{respaldo.nombre}"
+
+    def texto(self, imagen, lang="spa", config=""):
+        try:
+            return self.principal.texto(imagen, lang, config)
+        except Exception as e:
+            print(f"⚠️ {self.principal.nombre} falló ({e}), usando {self.respaldo.nombre}")
+            return self.respaldo.texto(imagen, lang, config)
+
+    def datos(self, imagen, lang="spa", config=""):
+        try:
+            return self.principal.datos(imagen, lang, config)
+        except Exception as e:
+            print(f"⚠️ {self.principal.nombre} falló ({e}), usando {self.respaldo.nombre}")
+            return self.respaldo.datos(imagen, lang, config)
+
+    def precalentar(self, idiomas):
+        try:
+            self.principal.precalentar(idiomas)
+        except Exception as e:
+            print(f"⚠️ No se pudo precalentar {self.principal.nombre}: {e}")
+
+
+_backend: BackendOCR | None = None
+
+
+def crear_backend(nombre: str = OCR_BACKEND) -> BackendOCR:
+    if ":" in nombre:
+        modulo, clase = nombre.split(":", 1)
+        return getattr(importlib.import_module(modulo), clase)()
+    nombre = nombre.lower()
+    if nombre == "pytesseract":
+        return BackendPytesseract()
+    try:
+        return BackendConRespaldo(BackendTesserocr(), BackendPytesseract())
+    except ImportError:
+        if nombre == "tesserocr":
+            raise
+        return BackendPytesseract()
+
+
+def obtener_backend() -> BackendOCR:
+    global _backend
+    if _backend is None:
+        _backend = crear_backend()
+    return _backend
+
+
+def usar_backend(backend: BackendOCR):
+    """Reemplaza el backend del proceso actual (pruebas, benchmarks)."""
+    global _backend
+    _backend = backend
+
+
+def precalentar(idiomas: list[str] = OCR_IDIOMAS):
+    obtener_backend().precalentar(idiomas)
@@ -0,0 +1,141 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# ==============================
+# Configuración
+# ==============================
+
+OCR_CACHE_ACTIVO = os.getenv("OCR_CACHE", "1") != "0"
+OCR_CACHE_DIR = os.getenv("OCR_CACHE_DIR", "./.cache/ocr")
+OCR_CACHE_MAX_ITEMS = int(os.getenv("OCR_CACHE_MAX_ITEMS", "256"))
+OCR_CACHE_MAX_MB = int(os.getenv("OCR_CACHE_MAX_MB", "200"))
+OCR_CACHE_TTL = int(os.getenv("OCR_CACHE_TTL", str(7 * 24 * 3600)))  # segundos
+
+# Cada cuántas escrituras se purga el nivel en disco
+_PURGA_CADA = 50
+
+
+class CacheOCR:
+    """Cache de resultados OCR en dos niveles: LRU en memoria + SQLite en disco.
+
+    Las claves las arma quien llama (hash de la imagen + idioma + config),
+    los valores deben ser serializables a JSON.
+    """
+
+    def __init__(self, directorio: str, max_items: int, max_mb: int, ttl: int):
+        self.directorio = directorio
+        self.max_items = max_items
+        self.max_bytes = max_mb * 1024 * 1024
+        self.ttl = ttl
+        self._memoria: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conexion = None
+        self._pid = None
+        self._escrituras = 0
+        self.contadores = {"hitsMemoria": 0, "hitsDisco": 0, "misses": 0}
+
+    # --- Nivel en disco (una conexión por proceso)
+    def _db(self):
+        if self._conexion is None or self._pid != os.getpid():
+            os.makedirs(self.directorio, exist_ok=True)
+            ruta = os.path.join(self.directorio, "ocr.sqlite3")
+            conexion = sqlite3.connect(ruta, timeout=5, check_same_thread=False)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute(
+                """CREATE TABLE IF NOT EXISTS ocr (
+                    clave TEXT PRIMARY KEY,
+                    valor TEXT NOT NULL,
+                    tamano INTEGER NOT NULL,
+                    creado REAL NOT NULL,
+                    accedido REAL NOT NULL
+                )"""
+            )
+            conexion.execute("CREATE INDEX IF NOT EXISTS ocr_accedido ON ocr (accedido)")
+            self._conexion = conexion
+            self._pid = os.getpid()
+        return self._conexion
+
+    def obtener(self, clave: str):
+        return self.buscar(clave)[0]
+
+    def buscar(self, clave: str):
+        """(valor, origen) con origen "memoria", "disco" o None si no está."""
+        ahora = time.time()
+        with self._lock:
+            item = self._memoria.get(clave)
+            if item is not None:
+                creado, valor = item
+                if ahora - creado <= self.ttl:
+                    self._memoria.move_to_end(clave)
+                    self.contadores["hitsMemoria"] += 1
+                    return valor, "memoria"
+                del self._memoria[clave]
+
+            try:
+                db = self._db()
+                fila = db.execute(
+                    "SELECT valor, creado FROM ocr WHERE clave = ?", (clave,)
+                ).fetchone()
+                if fila and ahora - fila[1] <= self.ttl:
+                    db.execute("UPDATE ocr SET accedido = ? WHERE clave = ?", (ahora, clave))
+                    db.commit()
+                    valor = json.loads(fila[0])
+                    self._guardar_memoria(clave, fila[1], valor)
+                    self.contadores["hitsDisco"] += 1
+                    return valor, "disco"
+            except sqlite3.Error:
+                pass
+
+            self.contadores["misses"] += 1
+            return None, None
+
+    def guardar(self, clave: str, valor):
+        ahora = time.time()
+        with self._lock:
+            self._guardar_memoria(clave, ahora, valor)
+            try:
+                serializado = json.dumps(valor, ensure_ascii=False)
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO ocr (clave, valor, tamano, creado, accedido) VALUES (?, ?, ?, ?, ?)",
+                    (clave, serializado, len(serializado.encode("utf-8")), ahora, ahora),
+                )
+                db.commit()
+                self._escrituras += 1
+                if self._escrituras % _PURGA_CADA == 0:
+                    self._purgar(db, ahora)
+            except sqlite3.Error:
+                pass
+
+    def _guardar_memoria(self, clave, creado, valor):
+        self._memoria[clave] = (creado, valor)
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_items:
+            self._memoria.popitem(last=False)
+
+    def _purgar(self, db, ahora):
+        # 1) Vencidos por TTL
+        db.execute("DELETE FROM ocr WHERE creado < ?", (ahora - self.ttl,))
+        # 2) Recortar por tamaño, empezando por los menos usados
+        total = db.execute("SELECT COALESCE(SUM(tamano), 0) FROM ocr").fetchone()[0]
+        if total > self.max_bytes:
+            exceso = total - self.max_bytes
+            acumulado = 0
+            claves = []
+            for clave, tamano in db.execute("SELECT clave, tamano FROM ocr ORDER BY accedido"):
+                claves.append((clave,))
+                acumulado += tamano
+                if acumulado >= exceso:
+                    break
+            db.executemany("DELETE FROM ocr WHERE clave = ?", claves)
+        db.commit()
+
+    def estadisticas(self) -> dict:
+        return {**self.contadores, "itemsMemoria": len(self._memoria)}
+
+
+cache_ocr = CacheOCR(OCR_CACHE_DIR, OCR_CACHE_MAX_ITEMS, OCR_CACHE_MAX_MB, OCR_CACHE_TTL)
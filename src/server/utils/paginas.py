@@ -0,0 +1,163 @@
+import asyncio
+import io
+import os
+import time
+
+from PIL import Image
+
+from utils import metricas
+from utils.coincidencias import mejor_ventana, tokenizar
+from utils.documento_ocr import CLAVE_PAGINAS, DocumentoOCR, leer_documento, normalizar_token
+from utils.ejecutor import ejecutar
+from utils.extraccion import extraer, PATRON_CEDULA_SIN_PUNTOS
+from utils.ocr import Fuente
+from utils.pdf import capa_texto, es_pdf, numero_paginas
+from validators.arl_validator import clase_riesgo
+
+# ==============================
+# Documentos de varias páginas
+# ==============================
+#
+# Los certificados de pensión y ARL suelen traer varias páginas (PDF o TIFF).
+# Las páginas de un PDF con texto embebido salen de su capa de texto (el PDF
+# se abre una vez para todas); cada página escaneada se lee como un trabajo
+# aparte en el pool de OCR y, a medida que van terminando, se unen en un
+# solo DocumentoOCR. En cuanto aparecen todos
+# los campos que el tipo de documento necesita se cancelan las páginas que
+# faltan: un documento largo cuesta más o menos lo que cuesta una página.
+# El validador recibe el documento ya armado (nivel "paginas" en utils.niveles).
+
+OCR_MULTIPAGINA = os.getenv("OCR_MULTIPAGINA", "1") == "1"
+# Las páginas siguientes a esta se ignoran
+OCR_PAGINAS_MAXIMAS = int(os.getenv("OCR_PAGINAS_MAXIMAS", "10"))
+
+# clave en "resultados" -> campos que deben aparecer para dejar de leer páginas
+CAMPOS_REQUERIDOS = {
+    "cedula": ("nombre", "cedula"),
+    "documentoFormato": ("nombre", "cedula"),
+    "documentoEPS": ("nombre", "cedula", "fecha"),
+    "documentoARL": ("nombre", "cedula", "fecha", "riesgo"),
+    "documentoPension": ("nombre", "cedula", "fecha"),
+}
+
+
+def contar_paginas(datos: bytes) -> int:
+    """Páginas de un PDF o un TIFF; cualquier otra imagen es una sola.
+
+    Un JPEG MPO o un PNG animado también traen varios cuadros, pero no son
+    páginas del documento.
+    """
+    if es_pdf(datos):
+        return numero_paginas(datos)
+    with Image.open(io.BytesIO(datos)) as imagen:
+        return getattr(imagen, "n_frames", 1) if imagen.format == "TIFF" else 1
+
+
+def leer_pagina(datos: bytes, n: int, lang: str = "spa") -> DocumentoOCR:
+    """DocumentoOCR de una página con OCR completo (las de un PDF con texto ya salieron de su capa)."""
+    return leer_documento(Fuente(datos).pagina(n), lang=lang)
+
+
+def medir_pagina(tipo: str, datos: bytes, n: int):
+    """Corre en el pool: (DocumentoOCR de la página, muestras de métricas)."""
+    with metricas.recolectar(tipo) as muestras:
+        documento = leer_pagina(datos, n)
+    return documento, muestras
+
+
+def campos_encontrados(documento: DocumentoOCR, requeridos, nombre: str | None, cedula: str | None) -> bool:
+    """Si el documento ya tiene todos los campos requeridos (misma regla que los validadores)."""
+    extraccion = extraer(documento.texto)
+    for campo in requeridos:
+        if campo == "nombre":
+            objetivo = " ".join(normalizar_token(t) for t in (nombre or "").split())
+            tokens = tokenizar(" ".join(p.token for p in documento.palabras))
+            if mejor_ventana(objetivo, tokens, corte=0.55)[1] <= 0.55:
+                return False
+        elif campo == "cedula":
+            if "".join(c for c in cedula or "" if c.isdigit()) not in extraccion.candidatos(PATRON_CEDULA_SIN_PUNTOS):
+                return False
+        elif campo == "fecha":
+            if not extraccion.fecha_expedicion()[0]:
+                return False
+        elif campo == "riesgo":
+            if clase_riesgo(documento, extraccion)[0] is None:
+                return False
+    return True
+
+
+def _unir_y_revisar(documentos, requeridos, nombre, cedula, revisar: bool) -> tuple[DocumentoOCR, bool]:
+    documento = documentos[0] if len(documentos) == 1 else DocumentoOCR.unir(documentos)
+    return documento, revisar and campos_encontrados(documento, requeridos, nombre, cedula)
+
+
+async def leer_paginas(tipo: str, datos: bytes, nombre: str | None, cedula: str | None,
+                       primera: DocumentoOCR | None = None) -> tuple[Fuente, dict] | None:
+    """(Fuente con el documento de sus páginas ya leído, resumen), o None si tiene una sola.
+
+    Las páginas se leen en paralelo en el pool; se deja de esperar (y se
+    cancelan las que no arrancaron) apenas aparecen los campos requeridos.
+    `primera` es la primera página ya leída (reducida, al clasificar el
+    archivo): se usa en lugar de volver a leerla y solo se lee completa si
+    con todas las páginas no aparecen los campos.
+    """
+    if not OCR_MULTIPAGINA:
+        return None
+    try:
+        if es_pdf(datos):
+            # La capa de texto de todas las páginas con el PDF abierto una vez
+            inicio = time.perf_counter()
+            capas = await asyncio.to_thread(capa_texto, datos, OCR_PAGINAS_MAXIMAS)
+            metricas.registrar_etapa(tipo, "capa_texto", time.perf_counter() - inicio)
+            total = len(capas)
+        else:
+            capas = []
+            total = min(await asyncio.to_thread(contar_paginas, datos), OCR_PAGINAS_MAXIMAS)
+    except Exception:
+        return None  # no se pudo abrir: el validador reporta el error como siempre
+    if total < 2:
+        return None
+
+    requeridos = CAMPOS_REQUERIDOS.get(tipo, ("nombre", "cedula", "fecha"))
+    # Las páginas con texto embebido ya están leídas; solo las escaneadas van al pool
+    leidas: dict[int, DocumentoOCR] = {n: DocumentoOCR(renglones) for n, renglones in enumerate(capas) if renglones}
+    sembrada = primera is not None and bool(primera.palabras) and 0 not in leidas
+    if sembrada:
+        leidas[0] = primera
+    completo = False
+    if leidas:
+        documento, completo = await asyncio.to_thread(
+            _unir_y_revisar, [leidas[n] for n in sorted(leidas)], requeridos, nombre, cedula, True
+        )
+    tareas = {} if completo else {
+        asyncio.ensure_future(ejecutar(medir_pagina, tipo, datos, n)): n
+        for n in range(total) if n not in leidas
+    }
+    pendientes = set(tareas)
+    try:
+        while pendientes:
+            listas, pendientes = await asyncio.wait(pendientes, return_when=asyncio.FIRST_COMPLETED)
+            for tarea in listas:
+                documento, muestras = tarea.result()
+                metricas.aplicar_muestras(muestras)
+                leidas[tareas[tarea]] = documento
+            # Unir y buscar los campos es CPU (coincidencia difusa): fuera del event loop
+            documento, completo = await asyncio.to_thread(
+                _unir_y_revisar, [leidas[n] for n in sorted(leidas)], requeridos, nombre, cedula,
+                bool(pendientes) or sembrada,
+            )
+            if completo:
+                break
+    finally:
+        for tarea in pendientes:
+            tarea.cancel()
+
+    if sembrada and not completo:
+        # Los campos no aparecieron: la primera página se lee completa, como las demás
+        leidas[0], muestras = await ejecutar(medir_pagina, tipo, datos, 0)
+        metricas.aplicar_muestras(muestras)
+        documento = await asyncio.to_thread(DocumentoOCR.unir, [leidas[n] for n in sorted(leidas)])
+
+    fuente = Fuente(datos)
+    fuente.documentos[CLAVE_PAGINAS] = documento
+    return fuente, {"leidas": sorted(n + 1 for n in leidas), "total": total}
@@ -0,0 +1,92 @@
+import os
+
+from PIL import Image
+
+try:
+    import pymupdf
+except ImportError:  # PyMuPDF es opcional: sin él los PDF no se pueden leer
+    pymupdf = None
+
+# ==============================
+# PDF: capa de texto y rasterización
+# ==============================
+#
+# Los certificados de EPS, ARL y pensión casi siempre son PDF generados por
+# los portales, con el texto embebido. Ese texto es exacto y sale en
+# milisegundos; solo las páginas sin texto (escaneos dentro de un PDF) se
+# rasterizan para pasarlas por OCR.
+
+PDF_DPI = int(os.getenv("PDF_DPI", "300"))
+# Tope de una página rasterizada: en páginas muy grandes se baja el DPI
+PDF_MAX_MEGAPIXELES = float(os.getenv("PDF_MAX_MEGAPIXELES", "35"))
+# Una página con menos caracteres que esto se trata como escaneada
+PDF_MIN_CARACTERES = int(os.getenv("PDF_MIN_CARACTERES", "20"))
+
+
+def es_pdf(datos: bytes | None) -> bool:
+    # El encabezado puede venir precedido de basura dentro del primer KB
+    return bool(datos) and b"%PDF-" in datos[:1024]
+
+
+def _abrir(datos: bytes):
+    if pymupdf is None:
+        raise RuntimeError("Los PDF requieren PyMuPDF (pip install pymupdf)")
+    return pymupdf.open(stream=datos, filetype="pdf")
+
+
+def numero_paginas(datos: bytes) -> int:
+    with _abrir(datos) as pdf:
+        return pdf.page_count
+
+
+def paginas_pdf(datos: bytes) -> list[tuple[float, float]]:
+    """(ancho, alto) en puntos de cada página."""
+    with _abrir(datos) as pdf:
+        return [(pagina.rect.width, pagina.rect.height) for pagina in pdf]
+
+
+def dpi_pagina(ancho: float, alto: float, dpi: int = PDF_DPI) -> int:
+    """DPI de rasterización, reducido si la página pasaría de PDF_MAX_MEGAPIXELES."""
+    pulgadas2 = (ancho / 72) * (alto / 72)
+    if pulgadas2 <= 0:
+        return dpi
+    return max(1, min(dpi, int((PDF_MAX_MEGAPIXELES * 1_000_000 / pulgadas2) ** 0.5)))
+
+
+def megapixeles_pagina(ancho: float, alto: float, dpi: int = PDF_DPI) -> float:
+    d = dpi_pagina(ancho, alto, dpi)
+    return (ancho / 72 * d) * (alto / 72 * d) / 1_000_000
+
+
+def _renglones(pagina) -> list[list[tuple[str, float, tuple]]] | None:
+    """Renglones de la capa de texto de una página abierta, o None si no tiene texto.
+
+    Mismo formato que recibe DocumentoOCR: cada renglón es una lista de
+    (texto, conf, caja) con la caja en puntos del PDF. La confianza es 100:
+    el texto embebido no es una lectura aproximada.
+    """
+    palabras = pagina.get_text("words", sort=True)
+    if sum(len(p[4]) for p in palabras) < PDF_MIN_CARACTERES:
+        return None
+    renglones: dict[tuple, list] = {}
+    for x0, y0, x1, y1, texto, bloque, linea, _ in palabras:
+        renglones.setdefault((bloque, linea), []).append((texto, 100.0, (x0, y0, x1, y1)))
+    return list(renglones.values())
+
+
+def capa_texto(datos: bytes, maximo: int | None = None) -> list[list | None]:
+    """Renglones de cada página (None en las que no tienen texto), abriendo el PDF una sola vez."""
+    with _abrir(datos) as pdf:
+        total = pdf.page_count if maximo is None else min(pdf.page_count, maximo)
+        return [_renglones(pdf[n]) for n in range(total)]
+
+
+def rasterizar(datos: bytes, pagina: int, dpi: int = PDF_DPI) -> Image.Image:
+    """Página del PDF como imagen en escala de grises, con el DPI (ya limitado) en info."""
+    with _abrir(datos) as pdf:
+        pagina = pdf[pagina]
+        dpi = dpi_pagina(pagina.rect.width, pagina.rect.height, dpi)
+        pixmap = pagina.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY, alpha=False)
+    imagen = Image.frombytes("L", (pixmap.width, pixmap.height), pixmap.samples)
+    imagen.info["dpi"] = (dpi, dpi)
+    return imagen
@@ -0,0 +1,109 @@
+import json
+import math
+import os
+
+from utils.ocr import NORMALIZAR_OCR, extraer_texto_region, preparar_fuente
+
+# ==============================
+# Plantillas de diseño por tipo de documento
+# ==============================
+#
+# La cédula y nuestro formato de creación tienen diseño fijo: en lugar de
+# pasar toda la imagen por tesseract se leen solo las regiones donde están
+# los campos. Las coordenadas son relativas (0-1) a la caja del documento
+# que detecta el normalizador (lo que queda después de recortar el fondo),
+# así que no dependen de la resolución ni del margen de la foto. Se midieron
+# sobre benchmarks/muestras; `python -m benchmarks.bench_plantillas` comprueba
+# que cada plantilla siga leyendo los campos esperados de su muestra antes
+# de cambiarlas.
+#
+# Los validadores usan las regiones en los niveles baratos de utils.niveles y
+# vuelven al OCR de la página si con ellas no se confirma todo.
+
+OCR_REGIONES = os.getenv("OCR_REGIONES", "1") == "1"
+# JSON opcional con plantillas que reemplazan o agregan a las de abajo,
+# para ajustar coordenadas sin tocar el código
+OCR_PLANTILLAS = os.getenv("OCR_PLANTILLAS")
+
+# Ajustes de tesseract por tipo de campo
+CAMPO_NUMERO = {"lang": "spa", "config": "--psm 6 -c tessedit_char_whitelist=0123456789.,-"}
+CAMPO_TEXTO = {"lang": "spa", "config": "--psm 6"}
+
+# tipo -> región -> {"caja": (x0, y0, x1, y1), "lang", "config"}
+PLANTILLAS = {
+    "cedula": {
+        # "NUMERO 1.095.926.634" bajo el encabezado (frente de la tarjeta)
+        "numero": {"caja": (0.0, 0.14, 0.62, 0.19), **CAMPO_NUMERO},
+        # Apellidos y nombres con sus etiquetas
+        "nombres": {"caja": (0.0, 0.18, 0.62, 0.32), **CAMPO_TEXTO},
+    },
+    "formato": {
+        # NIT, código y razón social del transportador
+        "transportador": {"caja": (0.0, 0.26, 1.0, 0.34), **CAMPO_TEXTO},
+        # Cédula, nombres y apellidos del conductor
+        "conductor": {"caja": (0.0, 0.42, 1.0, 0.49), **CAMPO_TEXTO},
+    },
+}
+
+if OCR_PLANTILLAS:
+    with open(OCR_PLANTILLAS, encoding="utf-8") as f:
+        PLANTILLAS.update(json.load(f))
+
+
+def region_en_imagen(caja: tuple, info: dict) -> tuple:
+    """Pasa una caja relativa al documento a coordenadas relativas de la imagen de OCR.
+
+    La imagen normalizada ya viene recortada a la caja del documento; si
+    además se enderezó, la rotación con expand la agrandó y el documento
+    quedó centrado dentro de ella.
+    """
+    x0, y0, x1, y1 = caja
+    angulo = math.radians(info.get("angulo", 0.0))
+    if not angulo:
+        return x0, y0, x1, y1
+
+    # Tamaño del recorte antes de rotar: ancho' = a·cos + h·sen, alto' = a·sen + h·cos
+    ancho_rotado, alto_rotado = info["tamano"]
+    cos, sen = abs(math.cos(angulo)), abs(math.sin(angulo))
+    determinante = cos * cos - sen * sen
+    ancho = (ancho_rotado * cos - alto_rotado * sen) / determinante
+    alto = (alto_rotado * cos - ancho_rotado * sen) / determinante
+    dx, dy = (ancho_rotado - ancho) / 2, (alto_rotado - alto) / 2
+
+    def eje(v, largo, desplazamiento, total):
+        return min(1.0, max(0.0, (desplazamiento + v * largo) / total))
+
+    return (
+        eje(x0, ancho, dx, ancho_rotado),
+        eje(y0, alto, dy, alto_rotado),
+        eje(x1, ancho, dx, ancho_rotado),
+        eje(y1, alto, dy, alto_rotado),
+    )
+
+
+def leer_regiones(fuente, tipo: str, lado_maximo: int | None = None) -> dict[str, str] | None:
+    """Texto OCR de cada región de la plantilla, o None si no aplica.
+
+    Sin normalizador no hay límites de página detectados, así que tampoco
+    se usan plantillas. Con `lado_maximo` las regiones se leen reducidas.
+    """
+    plantilla = PLANTILLAS.get(tipo)
+    if not OCR_REGIONES or not NORMALIZAR_OCR or not plantilla:
+        return None
+    fuente = preparar_fuente(fuente)
+    fuente.normalizada
+    regiones = {}
+    for nombre, region in plantilla.items():
+        caja = region_en_imagen(tuple(region["caja"]), fuente.info_normalizacion)
+        if caja[2] <= caja[0] or caja[3] <= caja[1]:
+            regiones[nombre] = ""  # caja vacía (plantilla mal escrita en OCR_PLANTILLAS)
+            continue
+        regiones[nombre] = extraer_texto_region(
+            fuente, caja, lang=region.get("lang", "spa"), config=region.get("config", ""),
+            lado_maximo=lado_maximo,
+        )
+    return regiones
+
+
+def texto_regiones(regiones: dict[str, str]) -> str:
+    return "\n".join(t for t in regiones.values() if t)
@@ -0,0 +1,95 @@
+import json
+import os
+from typing import Literal
+
+from fastapi import Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa json de la librería estándar
+    orjson = None
+
+# ==============================
+# Forma de la respuesta
+# ==============================
+#
+# Los validadores devuelven el texto OCR completo y un bloque de depuración
+# que el frontend casi nunca usa. La verbosidad decide qué se envía:
+#   completa -> todo, como siempre (por defecto)
+#   normal   -> sin "debug" y con el texto OCR recortado a maxTexto caracteres
+#   minima   -> sin texto OCR ni "debug"
+
+VERBOSIDADES = ("completa", "normal", "minima")
+RESPUESTA_VERBOSIDAD = os.getenv("RESPUESTA_VERBOSIDAD", "completa")
+if RESPUESTA_VERBOSIDAD not in VERBOSIDADES:
+    RESPUESTA_VERBOSIDAD = "completa"
+RESPUESTA_MAX_TEXTO = int(os.getenv("RESPUESTA_MAX_TEXTO", "300"))
+# Respuestas más chicas que esto no se comprimen
+RESPUESTA_GZIP_MINIMO = int(os.getenv("RESPUESTA_GZIP_MINIMO", "1000"))
+
+CAMPOS_TEXTO = ("texto", "textoOCR", "textoCedula", "textoPlanoCedula")
+CAMPOS_DEBUG = ("debug",)
+
+
+class FormaRespuesta:
+    def __init__(self, verbosidad: str = RESPUESTA_VERBOSIDAD, campos: list[str] | None = None,
+                 max_texto: int = RESPUESTA_MAX_TEXTO):
+        self.verbosidad = verbosidad
+        self.campos = campos
+        self.max_texto = max_texto
+
+    def documento(self, resultado):
+        """Aplica la verbosidad y la selección de campos al resultado de un validador."""
+        if not isinstance(resultado, dict):
+            return resultado
+        if self.campos is not None:
+            # El error se conserva siempre: sin él no se distingue un fallo
+            resultado = {k: v for k, v in resultado.items() if k in self.campos or k == "error"}
+        if self.verbosidad == "completa":
+            return resultado
+
+        forma = {}
+        for clave, valor in resultado.items():
+            if clave in CAMPOS_DEBUG:
+                continue
+            if clave in CAMPOS_TEXTO:
+                if self.verbosidad == "minima":
+                    continue
+                if isinstance(valor, str) and len(valor) > self.max_texto:
+                    valor = valor[:self.max_texto]
+            forma[clave] = valor
+        return forma
+
+    def resultados(self, resultados: dict) -> dict:
+        return {clave: self.documento(r) for clave, r in resultados.items()}
+
+
+def forma_respuesta(
+    verbosidad: Literal["completa", "normal", "minima"] = Query(RESPUESTA_VERBOSIDAD),
+    campos: str | None = Query(None, description="Campos de cada documento, separados por coma"),
+    maxTexto: int = Query(RESPUESTA_MAX_TEXTO, ge=0),
+) -> FormaRespuesta:
+    """Dependencia con las opciones de forma de /validar, /validar/lote y /trabajos."""
+    seleccion = [c.strip() for c in campos.split(",") if c.strip()] if campos else None
+    return FormaRespuesta(verbosidad, seleccion, maxTexto)
+
+
+# ==============================
+# Serialización
+# ==============================
+
+def serializar(contenido) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(
+            contenido, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY, default=str
+        )
+    return json.dumps(jsonable_encoder(contenido), ensure_ascii=False).encode("utf-8")
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse serializada con orjson cuando está instalado."""
+
+    def render(self, contenido) -> bytes:
+        return serializar(contenido)
@@ -0,0 +1,259 @@
+import asyncio
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from utils.documentos import validar_formulario
+from utils.ejecutor import OCR_WORKERS
+
+# ==============================
+# Configuración
+# ==============================
+
+TRABAJOS_MAX_COLA = int(os.getenv("TRABAJOS_MAX_COLA", "100"))
+TRABAJOS_WORKERS = int(os.getenv("TRABAJOS_WORKERS", "0")) or OCR_WORKERS
+TRABAJOS_TTL = int(os.getenv("TRABAJOS_TTL", "3600"))  # segundos que se guarda un resultado
+# Si se define, la cola sobrevive reinicios en este archivo SQLite
+TRABAJOS_DB = os.getenv("TRABAJOS_DB", "")
+
+EN_COLA, PROCESANDO, COMPLETADO, ERROR = "en_cola", "procesando", "completado", "error"
+
+
+class ColaLlena(Exception):
+    def __init__(self, reintentar_en: int):
+        super().__init__("La cola de trabajos está llena")
+        self.reintentar_en = reintentar_en
+
+
+class ColaCerrada(Exception):
+    pass
+
+
+# ==============================
+# Almacenes de trabajos
+# ==============================
+
+class AlmacenMemoria:
+    """Trabajos en un dict del proceso; se pierden al reiniciar."""
+
+    def __init__(self):
+        self._trabajos: dict[str, dict] = {}
+        self._envios: dict[str, tuple[dict, dict]] = {}
+
+    def crear(self, id_trabajo, documentos, formulario, ahora):
+        self._trabajos[id_trabajo] = {"id": id_trabajo, "estado": EN_COLA, "creado": ahora, "terminado": None}
+        self._envios[id_trabajo] = (documentos, formulario)
+
+    def tomar_envio(self, id_trabajo):
+        return self._envios.pop(id_trabajo, None)
+
+    def actualizar(self, id_trabajo, **campos):
+        if id_trabajo in self._trabajos:
+            self._trabajos[id_trabajo].update(campos)
+
+    def obtener(self, id_trabajo):
+        trabajo = self._trabajos.get(id_trabajo)
+        return dict(trabajo) if trabajo else None
+
+    def pendientes(self) -> list[str]:
+        return []
+
+    def purgar(self, antes_de: float):
+        vencidos = [
+            i for i, t in self._trabajos.items()
+            if t["terminado"] is not None and t["terminado"] < antes_de
+        ]
+        for i in vencidos:
+            del self._trabajos[i]
+
+
+class AlmacenSQLite:
+    """Trabajos y documentos en SQLite: lo que quedó en cola se retoma al reiniciar."""
+
+    def __init__(self, ruta: str):
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._db = sqlite3.connect(ruta, timeout=5, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS trabajos (
+                    id TEXT PRIMARY KEY,
+                    estado TEXT NOT NULL,
+                    creado REAL NOT NULL,
+                    terminado REAL,
+                    formulario TEXT NOT NULL,
+                    resultados TEXT,
+                    error TEXT
+                )"""
+            )
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS documentos_trabajo (
+                    trabajo_id TEXT NOT NULL,
+                    campo TEXT NOT NULL,
+                    datos BLOB NOT NULL,
+                    PRIMARY KEY (trabajo_id, campo)
+                )"""
+            )
+            # Lo que estaba procesándose cuando se cayó el servidor vuelve a la cola
+            self._db.execute("UPDATE trabajos SET estado = ? WHERE estado = ?", (EN_COLA, PROCESANDO))
+            self._db.commit()
+
+    def crear(self, id_trabajo, documentos, formulario, ahora):
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO trabajos (id, estado, creado, formulario) VALUES (?, ?, ?, ?)",
+                (id_trabajo, EN_COLA, ahora, json.dumps(formulario)),
+            )
+            self._db.executemany(
+                "INSERT INTO documentos_trabajo (trabajo_id, campo, datos) VALUES (?, ?, ?)",
+                [(id_trabajo, campo, datos) for campo, datos in documentos.items()],
+            )
+            self._db.commit()
+
+    def tomar_envio(self, id_trabajo):
+        with self._lock:
+            fila = self._db.execute("SELECT formulario FROM trabajos WHERE id = ?", (id_trabajo,)).fetchone()
+            if fila is None:
+                return None
+            documentos = dict(self._db.execute(
+                "SELECT campo, datos FROM documentos_trabajo WHERE trabajo_id = ? ORDER BY rowid", (id_trabajo,)
+            ).fetchall())
+            return documentos, json.loads(fila[0])
+
+    def actualizar(self, id_trabajo, **campos):
+        if "resultados" in campos:
+            campos["resultados"] = json.dumps(campos["resultados"], ensure_ascii=False, default=str)
+        asignaciones = ", ".join(f"{k} = ?" for k in campos)
+        with self._lock:
+            self._db.execute(f"UPDATE trabajos SET {asignaciones} WHERE id = ?", (*campos.values(), id_trabajo))
+            if campos.get("estado") in (COMPLETADO, ERROR):
+                # Los documentos ya no hacen falta
+                self._db.execute("DELETE FROM documentos_trabajo WHERE trabajo_id = ?", (id_trabajo,))
+            self._db.commit()
+
+    def obtener(self, id_trabajo):
+        with self._lock:
+            fila = self._db.execute(
+                "SELECT id, estado, creado, terminado, resultados, error FROM trabajos WHERE id = ?", (id_trabajo,)
+            ).fetchone()
+        if fila is None:
+            return None
+        trabajo = {"id": fila[0], "estado": fila[1], "creado": fila[2], "terminado": fila[3]}
+        if fila[4] is not None:
+            trabajo["resultados"] = json.loads(fila[4])
+        if fila[5] is not None:
+            trabajo["error"] = fila[5]
+        return trabajo
+
+    def pendientes(self) -> list[str]:
+        with self._lock:
+            return [f[0] for f in self._db.execute(
+                "SELECT id FROM trabajos WHERE estado = ? ORDER BY creado", (EN_COLA,)
+            )]
+
+    def purgar(self, antes_de: float):
+        with self._lock:
+            self._db.execute("DELETE FROM trabajos WHERE terminado IS NOT NULL AND terminado < ?", (antes_de,))
+            self._db.commit()
+
+
+# ==============================
+# Cola con workers fijos
+# ==============================
+
+class ColaTrabajos:
+    """Cola acotada de envíos de /validar drenada por un número fijo de workers."""
+
+    def __init__(self, almacen, max_cola: int = TRABAJOS_MAX_COLA,
+                 workers: int = TRABAJOS_WORKERS, ttl: int = TRABAJOS_TTL):
+        self.almacen = almacen
+        self.max_cola = max_cola
+        self.workers = workers
+        self.ttl = ttl
+        self._cola: asyncio.Queue | None = None
+        self._tareas: list[asyncio.Task] = []
+        self._aceptando = False
+        self._duracion_media = 10.0  # segundos, se ajusta con cada trabajo
+
+    async def iniciar(self):
+        self._cola = asyncio.Queue(maxsize=self.max_cola)
+        for id_trabajo in await asyncio.to_thread(self.almacen.pendientes):
+            if self._cola.full():
+                break
+            self._cola.put_nowait(id_trabajo)
+        self._tareas = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tareas.append(asyncio.create_task(self._purgar_periodicamente()))
+        self._aceptando = True
+
+    async def detener(self):
+        self._aceptando = False
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+
+    def profundidad(self) -> int:
+        return self._cola.qsize() if self._cola else 0
+
+    def reintentar_en(self) -> int:
+        """Segundos estimados hasta que se libere lugar en la cola."""
+        return max(1, math.ceil(self.profundidad() * self._duracion_media / max(self.workers, 1)))
+
+    async def encolar(self, documentos: dict, formulario: dict) -> str:
+        if not self._aceptando:
+            raise ColaCerrada("La cola de trabajos no está aceptando envíos")
+        if self._cola.full():
+            raise ColaLlena(self.reintentar_en())
+
+        id_trabajo = uuid.uuid4().hex
+        await asyncio.to_thread(self.almacen.crear, id_trabajo, documentos, formulario, time.time())
+        try:
+            self._cola.put_nowait(id_trabajo)
+        except asyncio.QueueFull:
+            await asyncio.to_thread(self.almacen.actualizar, id_trabajo, estado=ERROR,
+                                    error="Cola llena", terminado=time.time())
+            raise ColaLlena(self.reintentar_en())
+        return id_trabajo
+
+    async def obtener(self, id_trabajo: str) -> dict | None:
+        trabajo = await asyncio.to_thread(self.almacen.obtener, id_trabajo)
+        if trabajo and trabajo["terminado"] and time.time() - trabajo["terminado"] > self.ttl:
+            return None  # vencido, la purga lo borrará
+        return trabajo
+
+    async def _worker(self):
+        while True:
+            id_trabajo = await self._cola.get()
+            try:
+                envio = await asyncio.to_thread(self.almacen.tomar_envio, id_trabajo)
+                if envio is None:
+                    continue
+                documentos, formulario = envio
+                await asyncio.to_thread(self.almacen.actualizar, id_trabajo, estado=PROCESANDO)
+
+                inicio = time.perf_counter()
+                try:
+                    resultados = await validar_formulario(documentos, formulario)
+                except Exception as e:
+                    await asyncio.to_thread(self.almacen.actualizar, id_trabajo, estado=ERROR,
+                                            error=str(e), terminado=time.time())
+                else:
+                    await asyncio.to_thread(self.almacen.actualizar, id_trabajo, estado=COMPLETADO,
+                                            resultados=resultados, terminado=time.time())
+                duracion = time.perf_counter() - inicio
+                self._duracion_media = 0.8 * self._duracion_media + 0.2 * duracion
+            finally:
+                self._cola.task_done()
+
+    async def _purgar_periodicamente(self):
+        while True:
+            await asyncio.sleep(min(60, self.ttl))
+            await asyncio.to_thread(self.almacen.purgar, time.time() - self.ttl)
+
+
+cola_trabajos = ColaTrabajos(AlmacenSQLite(TRABAJOS_DB) if TRABAJOS_DB else AlmacenMemoria())
@@ -0,0 +1,176 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+from utils.extraccion import DIAS_VIGENCIA
+from utils.file_normalizer import VERSION_NORMALIZADOR
+from utils.respuesta import CAMPOS_DEBUG, CAMPOS_TEXTO
+
+# ==============================
+# Verificaciones guardadas por conductor
+# ==============================
+#
+# Cada vez que una transportadora edita el formulario se vuelven a subir la
+# cédula y los certificados del mismo conductor. El veredicto de un documento
+# solo depende de su contenido y de los datos esperados, así que se guarda
+# por (cédula, tipo de documento, hash del contenido) y se devuelve sin OCR
+# mientras siga vigente:
+#   - certificados con fecha de expedición: hasta que se cumplen
+#     DIAS_VIGENCIA días desde esa fecha (la misma ventana de fechaValida)
+#   - cédula y formato, que no vencen: VERIFICACIONES_TTL segundos
+# Los resultados con fecha vencida, sin fecha o con error no se guardan.
+#
+# Solo se guarda el veredicto: el texto OCR y el bloque de depuración se
+# quitan antes de escribir, así que un hit tampoco los trae. La versión de
+# los validadores es parte de la clave: al cambiar cómo se decide un
+# veredicto, los guardados con la versión anterior dejan de servir. El
+# almacén es opcional (VERIFICACIONES=1) y sus rutas de consulta piden el
+# token de auditoría (utils.auditoria).
+
+VERIFICACIONES_ACTIVO = os.getenv("VERIFICACIONES", "0") == "1"
+VERIFICACIONES_DB = os.getenv("VERIFICACIONES_DB", "./.cache/verificaciones.sqlite3")
+VERIFICACIONES_TTL = int(os.getenv("VERIFICACIONES_TTL", str(30 * 24 * 3600)))  # segundos
+
+# Súbela al cambiar la lógica de un validador o la forma de su resultado
+VERSION_VALIDADORES = "v2"
+VERSION_VERIFICACIONES = f"{VERSION_VALIDADORES}:{VERSION_NORMALIZADOR}"
+
+_FORMATO_FECHA = "%d/%m/%Y"
+# Cada cuántas escrituras se borran las verificaciones vencidas
+_PURGA_CADA = 100
+
+
+def limpiar_cedula(cedula: str | None) -> str:
+    return re.sub(r"\D", "", cedula or "")
+
+
+def vencimiento(resultado, ahora: float) -> float | None:
+    """Hasta cuándo (epoch) vale el resultado, o None si no se debe guardar."""
+    if not isinstance(resultado, dict) or resultado.get("error") or (resultado.get("debug") or {}).get("error"):
+        return None
+    if "fechaDetectada" not in resultado:
+        return ahora + VERIFICACIONES_TTL
+    if not resultado.get("fechaValida"):
+        return None
+    expedicion = datetime.strptime(resultado["fechaDetectada"], _FORMATO_FECHA)
+    # Vigente durante todo el último día de la ventana
+    return (expedicion + timedelta(days=DIAS_VIGENCIA + 1)).timestamp()
+
+
+def veredicto(resultado: dict) -> dict:
+    """El resultado sin texto OCR ni depuración: lo único que se guarda."""
+    return {k: v for k, v in resultado.items() if k not in CAMPOS_TEXTO and k not in CAMPOS_DEBUG}
+
+
+def actualizar_vigencia(resultado: dict) -> dict:
+    """Recalcula diffDias y fechaValida al día de hoy (se guardaron el día de la validación)."""
+    if resultado.get("fechaDetectada"):
+        expedicion = datetime.strptime(resultado["fechaDetectada"], _FORMATO_FECHA)
+        hoy = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
+        resultado["diffDias"] = (hoy - expedicion).days
+        resultado["fechaValida"] = 0 <= resultado["diffDias"] <= DIAS_VIGENCIA
+    return resultado
+
+
+class AlmacenVerificaciones:
+    """Veredictos en SQLite por (cédula, tipo, huella, versión); vencen solos con su ventana."""
+
+    def __init__(self, ruta: str, version: str = VERSION_VERIFICACIONES):
+        self.version = version
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        self._db = sqlite3.connect(ruta, timeout=5, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._escrituras = 0
+        with self._lock:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                """CREATE TABLE IF NOT EXISTS veredictos (
+                    cedula TEXT NOT NULL,
+                    tipo TEXT NOT NULL,
+                    huella TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    argumentos TEXT NOT NULL,
+                    resultado TEXT NOT NULL,
+                    creado REAL NOT NULL,
+                    vence REAL NOT NULL,
+                    PRIMARY KEY (cedula, tipo, huella, version)
+                )"""
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS veredictos_vence ON veredictos (vence)")
+            self._db.commit()
+
+    def buscar(self, cedula: str, tipo: str, huella: str, argumentos: list) -> dict | None:
+        """Resultado guardado y vigente para esos mismos datos esperados, o None."""
+        try:
+            with self._lock:
+                fila = self._db.execute(
+                    "SELECT argumentos, resultado FROM veredictos "
+                    "WHERE cedula = ? AND tipo = ? AND huella = ? AND version = ? AND vence > ?",
+                    (cedula, tipo, huella, self.version, time.time()),
+                ).fetchone()
+        except sqlite3.Error:
+            return None  # sin almacén se valida como siempre
+        if fila is None or json.loads(fila[0]) != argumentos:
+            return None
+        return actualizar_vigencia(json.loads(fila[1]))
+
+    def guardar(self, cedula: str, tipo: str, huella: str, argumentos: list, resultado) -> bool:
+        ahora = time.time()
+        vence = vencimiento(resultado, ahora)
+        if vence is None or vence <= ahora:
+            return False
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO veredictos "
+                    "(cedula, tipo, huella, version, argumentos, resultado, creado, vence) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (cedula, tipo, huella, self.version, json.dumps(argumentos, ensure_ascii=False),
+                     json.dumps(veredicto(resultado), ensure_ascii=False, default=str), ahora, vence),
+                )
+                self._escrituras += 1
+                if self._escrituras % _PURGA_CADA == 0:
+                    # También los de versiones anteriores, que ya no se leen
+                    self._db.execute("DELETE FROM veredictos WHERE vence <= ? OR version != ?", (ahora, self.version))
+                self._db.commit()
+        except sqlite3.Error:
+            return False
+        return True
+
+    def consultar(self, cedulas: list[str]) -> dict[str, dict]:
+        """cédula -> tipo -> último veredicto vigente, para varias cédulas en una consulta."""
+        cedulas = sorted({limpiar_cedula(c) for c in cedulas} - {""})
+        encontradas = {c: {} for c in cedulas}
+        if not cedulas:
+            return encontradas
+        marcadores = ", ".join("?" * len(cedulas))
+        with self._lock:
+            filas = self._db.execute(
+                f"SELECT cedula, tipo, huella, resultado, creado, vence FROM veredictos "
+                f"WHERE cedula IN ({marcadores}) AND version = ? AND vence > ? ORDER BY creado",
+                (*cedulas, self.version, time.time()),
+            ).fetchall()
+        for cedula, tipo, huella, resultado, creado, vence in filas:
+            # ORDER BY creado: si hay varias del mismo tipo queda la más reciente
+            encontradas[cedula][tipo] = {
+                "huella": huella,
+                "validadoEn": datetime.fromtimestamp(creado).isoformat(timespec="seconds"),
+                "vence": datetime.fromtimestamp(vence).isoformat(timespec="seconds"),
+                "resultado": actualizar_vigencia(json.loads(resultado)),
+            }
+        return encontradas
+
+
+_almacen: AlmacenVerificaciones | None = None
+
+
+def obtener_almacen() -> AlmacenVerificaciones | None:
+    """Almacén del proceso principal; se abre en el primer uso (los workers del pool no lo necesitan)."""
+    global _almacen
+    if _almacen is None and VERIFICACIONES_ACTIVO:
+        _almacen = AlmacenVerificaciones(VERIFICACIONES_DB)
+    return _almacen
@@ -1,8 +1,9 @@
 import re
-import pytesseract
-from difflib import SequenceMatcher
-from datetime import datetime
-from rapidfuzz import fuzz, process  # más preciso que difflib
+from utils.coincidencias import tokenizar, mejor_ventana
+from utils.extraccion import extraer, PATRON_CEDULA
+from utils.niveles import resolver_por_niveles
+from utils.documento_ocr import leer_documento
+from utils.ocr import preparar_fuente
 
 # --- Normalizar texto
 def normalize_text(s: str) -> str:
@@ -15,20 +16,54 @@ def normalize_text(s: str) -> str:
         .strip()
     )
 
-# --- Similitud de cadenas
-def similarity(a: str, b: str) -> float:
-    return fuzz.ratio(a, b) / 100.0
+# --- Clase de riesgo: etiqueta y valor (1-5 o en romanos) como tokens del documento
+ETIQUETAS_RIESGO = ("clase de riesgo", "clase riesgo", "nivel de riesgo", "riesgo")
+_VALOR_RIESGO = re.compile(r"[1-5]|i{1,3}|iv|v")
+_ROMANOS = {"i": 1, "ii": 2, "iii": 3, "iv": 4, "v": 5}
+
+
+def clase_riesgo(documento, extraccion) -> tuple[int | None, float]:
+    """(clase de riesgo, confianza 0-1) del documento, o (None, 0).
+
+    El valor a la derecha o debajo de la etiqueta; si la etiqueta no se
+    reconoce como palabras sueltas, el dígito que sigue a "clase ... riesgo".
+    """
+    valor = documento.valor(ETIQUETAS_RIESGO, _VALOR_RIESGO)
+    if valor is not None:
+        return _ROMANOS.get(valor.token) or int(valor.token), valor.conf / 100 if valor.conf is not None else 0.8
+    riesgo = extraccion.clase_riesgo()
+    return riesgo, 0.6 if riesgo is not None else 0
 
 # --- Validación ARL
-def validar_arl(file_path, nombre_esperado, cedula_esperada):
-    # --- OCR inicial
+def validar_arl(fuente, nombre_esperado, cedula_esperada):
+    fuente = preparar_fuente(fuente)
+
+    # --- OCR por niveles: la página reducida basta si aparecen nombre, cédula, fecha y clase de riesgo
+    def evaluar(documento):
+        resultado = resultado_arl(documento, nombre_esperado, cedula_esperada)
+        confirmado = (
+            resultado["nombreEncontrado"]
+            and resultado["cedulaEncontrada"]
+            and bool(resultado["fechaDetectada"])
+            and resultado["riesgoEncontrado"] is not None
+        )
+        return resultado, confirmado
+
     try:
-        texto_arl = pytesseract.image_to_string(file_path, lang="spa")
+        resultado, nivel = resolver_por_niveles(
+            fuente, None, evaluar,
+            lambda: resultado_arl(leer_documento(fuente, lang="spa"), nombre_esperado, cedula_esperada),
+        )
     except Exception as e:
         raise RuntimeError(f"Error OCR: {e}")
+    resultado["nivelOCR"] = nivel
+    return resultado
 
-    texto_arl = texto_arl.replace("\u00A0", " ")
+def resultado_arl(documento, nombre_esperado, cedula_esperada):
+    texto_arl = documento.texto.replace("\u00A0", " ")
     texto_plano = normalize_text(texto_arl)
+    # Números, fechas y palabras clave en una sola pasada
+    extraccion = extraer(texto_plano)
 
     # --- Normalizar entradas
     nombre_esperado_norm = normalize_text(nombre_esperado)
@@ -38,67 +73,32 @@ def validar_arl(file_path, nombre_esperado, cedula_esperada):
     similitud_arl = 0
     nombre_encontrado_arl = False
 
-    # Sliding window
-    palabras = texto_plano.split()
-    ventanas = []
-    for i in range(len(palabras)):
-        for size in range(2, 6):
-            if i + size <= len(palabras):
-                ventanas.append(" ".join(palabras[i:i+size]))
-
-    if nombre_esperado_norm and ventanas:
-        mejor_match, score, _ = process.extractOne(nombre_esperado_norm, ventanas, scorer=fuzz.ratio)
-        similitud_arl = score / 100.0
-        nombre_encontrado_arl = similitud_arl > 0.55
+    # Sliding window (solo las ventanas que pueden superar el umbral)
+    palabras = tokenizar(texto_plano)
+    _, similitud_arl = mejor_ventana(nombre_esperado_norm, palabras, corte=0.55)
+    nombre_encontrado_arl = similitud_arl > 0.55
 
     # ---------- 2) Validar cédula
-    cedula_regex = re.compile(r"(\d{1,3}(?:\.\d{3}){1,2}|\d{7,12})")
-    posibles_cedulas = [re.sub(r"\D", "", c) for c in cedula_regex.findall(texto_arl)]
+    posibles_cedulas = extraccion.candidatos(PATRON_CEDULA)
     cedula_encontrada_arl = cedula_esperada_clean in posibles_cedulas
 
     # ---------- 3) Validar fecha expedición
-    fecha_detectada = None
-    fecha_valida = False
-    diff_dias = None
-
-    re_num = re.compile(r"(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})")
-
-    match_fecha = re_num.search(texto_plano)
-    if match_fecha:
-        try:
-            fecha = match_fecha.group(1)
-            for fmt in ["%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y"]:
-                try:
-                    fecha_doc = datetime.strptime(fecha, fmt).date()
-                    hoy = datetime.now().date()
-                    diff_dias = (hoy - fecha_doc).days
-                    fecha_valida = 0 <= diff_dias <= 30
-                    fecha_detectada = fecha_doc.strftime("%d/%m/%Y")
-                    break
-                except ValueError:
-                    continue
-        except Exception:
-            pass
+    fecha_detectada, fecha_valida, diff_dias = extraccion.fecha_expedicion()
 
     # ---------- 4) Clase de riesgo
-    riesgo_encontrado = None
     cumple_riesgo = False
-    confianza_riesgo = 0
-
-    riesgo_match = re.search(r"clase.*riesgo.*([1-5])", texto_plano)
-    if riesgo_match:
-        riesgo_encontrado = int(riesgo_match.group(1))
+    riesgo_encontrado, confianza_riesgo = clase_riesgo(documento, extraccion)
+    if riesgo_encontrado is not None:
         cumple_riesgo = riesgo_encontrado >= 4
-        confianza_riesgo = 0.8
 
     # ---------- 5) Palabras clave
     palabras_clave = {
-        "afiliado": "afiliado" in texto_plano,
-        "vinculado": "vinculado" in texto_plano,
-        "habilitado": "habilitado" in texto_plano,
-        "activo": "activo" in texto_plano,
-        "vigente": "vigente" in texto_plano,
-        "registra": "registra" in texto_plano,
+        "afiliado": extraccion.tiene("afiliado"),
+        "vinculado": extraccion.tiene("vinculado"),
+        "habilitado": extraccion.tiene("habilitado"),
+        "activo": extraccion.tiene("activo"),
+        "vigente": extraccion.tiene("vigente"),
+        "registra": extraccion.tiene("registra"),
     }
 
     # --- Resultado final
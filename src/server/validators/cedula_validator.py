@@ -1,8 +1,16 @@
-import pytesseract
-from PIL import Image
 import re
 import unicodedata
 from rapidfuzz import fuzz
+from utils.coincidencias import mejores_por_palabra
+from utils.extraccion import extraer, PATRON_NUMERO_PUNTEADO
+from utils.metricas import contar, REINTENTOS_OCR
+from utils.ocr import preparar_fuente, extraer_datos, texto_desde_datos, confianzas
+from utils.niveles import resolver_por_niveles
+
+# Un pase se acepta si deja al menos este texto o esta confianza media
+MIN_LONGITUD_TEXTO = 10
+MIN_CONFIANZA = 60
+IDIOMAS_RESPALDO = ("eng", "spa+eng")
 
 
 def normalize_text(s: str) -> str:
@@ -16,131 +24,194 @@ def normalize_text(s: str) -> str:
     return s
 
 
-def validar_cedula(file_path: str, cedula: str, nombre_conductor: str):
-    try:
-        print("🚀 Iniciando validación de cédula...")
-
-        # === OCR ===
-        texto_cedula = pytesseract.image_to_string(Image.open(file_path), lang="spa")
-        print("✅ OCR completado")
-        print("📝 Longitud del texto:", len(texto_cedula))
-        print("🔍 OCR bruto:", texto_cedula[:200])
-
-        # Si el texto es muy corto, probar con inglés
-        if len(texto_cedula) < 10:
-            print("⚠️ Texto muy corto, intentando con inglés...")
-            texto2 = pytesseract.image_to_string(Image.open(file_path), lang="eng")
-            if len(texto2) > len(texto_cedula):
-                texto_cedula = texto2
-                print("✅ Inglés funcionó mejor")
-
-        # Si sigue corto, probar con español+inglés
-        if len(texto_cedula) < 10:
-            print("⚠️ Aún muy corto, intentando con spa+eng...")
-            texto3 = pytesseract.image_to_string(Image.open(file_path), lang="spa+eng")
-            if len(texto3) > len(texto_cedula):
-                texto_cedula = texto3
-                print("✅ Idioma combinado funcionó mejor")
-
-        # === NORMALIZACIÓN ===
-        texto_plano_cedula = normalize_text(texto_cedula)
-        print("🧹 Texto normalizado:", texto_plano_cedula[:100])
-
-        # === VALIDACIÓN DE CÉDULA ===
-        cedula_limpia = re.sub(r"\D", "", cedula)
-        print("🎯 Buscando cédula:", cedula_limpia)
-
-        numeros_en_texto = [re.sub(r"[\.,\s]", "", n) for n in re.findall(r"[\d\.\,]+", texto_cedula)]
-        numeros_largos = [n for n in numeros_en_texto if len(n) >= 6]
-
-        print("🔢 Números largos:", numeros_largos)
-
-        cedula_encontrada = False
-        mejor_coincidencia = ""
-        tipo_coincidencia = ""
-
-        # 1. Exacta
-        if cedula_limpia in numeros_largos:
-            cedula_encontrada = True
-            mejor_coincidencia = cedula_limpia
-            tipo_coincidencia = "exacta"
-
-        # 2. Contenida
-        if not cedula_encontrada:
-            for numero in numeros_largos:
-                if cedula_limpia in numero or numero in cedula_limpia:
-                    cedula_encontrada = True
-                    mejor_coincidencia = numero
-                    tipo_coincidencia = "contenida"
-                    break
-
-        # 3. Fuzzy
-        if not cedula_encontrada:
-            for numero in numeros_largos:
-                similitud = fuzz.ratio(numero, cedula_limpia) / 100
-                if similitud > 0.65:
-                    cedula_encontrada = True
-                    mejor_coincidencia = numero
-                    tipo_coincidencia = f"fuzzy ({int(similitud*100)}%)"
-                    break
-
-        # 4. Longitud cercana
-        if not cedula_encontrada:
-            for numero in numeros_largos:
-                if abs(len(numero) - len(cedula_limpia)) <= 2 and numero.startswith(cedula_limpia[:4]):
-                    cedula_encontrada = True
-                    mejor_coincidencia = numero
-                    tipo_coincidencia = "longitud cercana con prefijo igual"
-                    break
-
-        # === VALIDACIÓN DE NOMBRE ===
-        nombre_esperado = normalize_text(nombre_conductor)
-        palabras_nombre = [p for p in nombre_esperado.split() if len(p) >= 3]
-
-        palabras_encontradas = []
-        for palabra in palabras_nombre:
-            if palabra in texto_plano_cedula:
-                palabras_encontradas.append({"palabra": palabra, "tipo": "exacta"})
-                continue
-            if len(palabra) >= 4 and palabra[:4] in texto_plano_cedula:
-                palabras_encontradas.append({"palabra": palabra, "tipo": "prefijo"})
-                continue
-            for palabra_texto in texto_plano_cedula.split():
-                if len(palabra_texto) >= 3:
-                    similitud = fuzz.ratio(palabra, palabra_texto) / 100
-                    if similitud > 0.6:
-                        palabras_encontradas.append({"palabra": palabra, "tipo": f"fuzzy ({int(similitud*100)}%)"})
-                        break
-
-        porcentaje_palabras = len(palabras_encontradas) / len(palabras_nombre) if palabras_nombre else 0
-        nombre_encontrado = porcentaje_palabras > 0.25 or len(palabras_encontradas) >= 1
-
-        resultado = {
-            "textoCedula": texto_cedula,
-            "textoPlanoCedula": texto_plano_cedula,
-            "coincidencias": {
-                "cedula": cedula_encontrada,
-                "nombre": nombre_encontrado
-            },
-            "metricas": {
-                "similitudNombre": porcentaje_palabras,
-                "palabrasEncontradas": len(palabras_encontradas),
-                "totalPalabrasEsperadas": len(palabras_nombre),
-                "porcentajePalabras": porcentaje_palabras,
-                "longitudTextoOCR": len(texto_cedula)
-            },
-            "debug": {
-                "nombreEsperado": nombre_esperado,
-                "palabrasNombre": palabras_nombre,
-                "palabrasEncontradasDetalle": palabras_encontradas,
-                "cedulaLimpia": cedula_limpia,
-                "numerosEncontrados": numeros_largos,
-                "mejorCoincidenciaCedula": mejor_coincidencia,
-                "tipoCoincidencia": tipo_coincidencia,
-            }
+def _pase_ocr(fuente, lang: str) -> dict:
+    datos = extraer_datos(fuente, lang=lang)
+    confs = confianzas(datos)
+    texto = texto_desde_datos(datos)
+    return {
+        "lang": lang,
+        "texto": texto,
+        "palabras": len(confs),
+        "confianza": sum(confs) / len(confs) if confs else 0,
+        # Peso para comparar pases: caracteres reconocidos ponderados por confianza
+        "puntaje": sum(
+            float(c) * len(p.strip())
+            for p, c in zip(datos["text"], datos["conf"])
+            if p and p.strip() and float(c) >= 0
+        ),
+    }
+
+
+def _pase_aceptable(pase: dict) -> bool:
+    return len(pase["texto"]) >= MIN_LONGITUD_TEXTO or pase["confianza"] >= MIN_CONFIANZA
+
+
+def ocr_cedula(fuente):
+    """OCR de la cédula con decisión por confianza.
+
+    La imagen se decodifica una vez. Primero se corre `spa`; los idiomas de
+    respaldo solo se intentan si el texto es muy corto y la confianza baja,
+    uno tras otro y hasta el primero que sea aceptable: el worker ya es un
+    proceso del pool y no abre más tesseract en paralelo. Si tesseract no encuentra ninguna
+    palabra, se desiste: otro idioma no va a encontrar texto donde no lo hay.
+    """
+    fuente = preparar_fuente(fuente)
+    fuente.imagen_ocr()  # decodificar y normalizar una sola vez para todos los pases
+
+    mejor = _pase_ocr(fuente, "spa")
+    pases = 1
+
+    if not _pase_aceptable(mejor) and mejor["palabras"] > 0:
+        print("⚠️ Texto muy corto, intentando idiomas de respaldo...")
+        for lang in IDIOMAS_RESPALDO:
+            pase = _pase_ocr(fuente, lang)
+            pases += 1
+            contar(REINTENTOS_OCR.nombre)
+            if pase["puntaje"] > mejor["puntaje"]:
+                mejor = pase
+                print(f"✅ {pase['lang']} funcionó mejor")
+            if _pase_aceptable(pase):
+                break
+
+    return mejor["texto"], {"idioma": mejor["lang"], "confianza": mejor["confianza"], "pases": pases}
+
+
+def _comparar_cedula(texto_cedula: str, info_ocr: dict, cedula: str, nombre_conductor: str) -> dict:
+    """Busca el número y el nombre esperados en el texto OCR y arma el resultado."""
+    # === NORMALIZACIÓN ===
+    texto_plano_cedula = normalize_text(texto_cedula)
+    print("🧹 Texto normalizado:", texto_plano_cedula[:100])
+
+    # === VALIDACIÓN DE CÉDULA ===
+    cedula_limpia = re.sub(r"\D", "", cedula)
+    print("🎯 Buscando cédula:", cedula_limpia)
+
+    numeros_en_texto = extraer(texto_cedula).candidatos(PATRON_NUMERO_PUNTEADO)
+    numeros_largos = [n for n in numeros_en_texto if len(n) >= 6]
+
+    print("🔢 Números largos:", numeros_largos)
+
+    cedula_encontrada = False
+    mejor_coincidencia = ""
+    tipo_coincidencia = ""
+
+    # 1. Exacta
+    if cedula_limpia in numeros_largos:
+        cedula_encontrada = True
+        mejor_coincidencia = cedula_limpia
+        tipo_coincidencia = "exacta"
+
+    # 2. Contenida
+    if not cedula_encontrada:
+        for numero in numeros_largos:
+            if cedula_limpia in numero or numero in cedula_limpia:
+                cedula_encontrada = True
+                mejor_coincidencia = numero
+                tipo_coincidencia = "contenida"
+                break
+
+    # 3. Fuzzy
+    if not cedula_encontrada:
+        for numero in numeros_largos:
+            similitud = fuzz.ratio(numero, cedula_limpia) / 100
+            if similitud > 0.65:
+                cedula_encontrada = True
+                mejor_coincidencia = numero
+                tipo_coincidencia = f"fuzzy ({int(similitud*100)}%)"
+                break
+
+    # 4. Longitud cercana
+    if not cedula_encontrada:
+        for numero in numeros_largos:
+            if abs(len(numero) - len(cedula_limpia)) <= 2 and numero.startswith(cedula_limpia[:4]):
+                cedula_encontrada = True
+                mejor_coincidencia = numero
+                tipo_coincidencia = "longitud cercana con prefijo igual"
+                break
+
+    # === VALIDACIÓN DE NOMBRE ===
+    nombre_esperado = normalize_text(nombre_conductor)
+    palabras_nombre = [p for p in nombre_esperado.split() if len(p) >= 3]
+
+    palabras_encontradas = []
+    pendientes = []
+    for palabra in palabras_nombre:
+        if palabra in texto_plano_cedula:
+            palabras_encontradas.append({"palabra": palabra, "tipo": "exacta"})
+        elif len(palabra) >= 4 and palabra[:4] in texto_plano_cedula:
+            palabras_encontradas.append({"palabra": palabra, "tipo": "prefijo"})
+        else:
+            pendientes.append(palabra)
+
+    # Las que faltan se comparan en lote contra todos los tokens del OCR
+    tokens_texto = [t for t in texto_plano_cedula.split() if len(t) >= 3]
+    similitudes, _ = mejores_por_palabra(pendientes, tokens_texto)
+    for palabra, similitud in zip(pendientes, similitudes):
+        if similitud > 0.6:
+            palabras_encontradas.append({"palabra": palabra, "tipo": f"fuzzy ({int(similitud*100)}%)"})
+
+    porcentaje_palabras = len(palabras_encontradas) / len(palabras_nombre) if palabras_nombre else 0
+    nombre_encontrado = porcentaje_palabras > 0.25 or len(palabras_encontradas) >= 1
+
+    resultado = {
+        "textoCedula": texto_cedula,
+        "textoPlanoCedula": texto_plano_cedula,
+        "coincidencias": {
+            "cedula": cedula_encontrada,
+            "nombre": nombre_encontrado
+        },
+        "metricas": {
+            "similitudNombre": porcentaje_palabras,
+            "palabrasEncontradas": len(palabras_encontradas),
+            "totalPalabrasEsperadas": len(palabras_nombre),
+            "porcentajePalabras": porcentaje_palabras,
+            "longitudTextoOCR": len(texto_cedula),
+            "confianzaOCR": info_ocr["confianza"],
+            "pasesOCR": info_ocr["pases"],
+        },
+        "debug": {
+            "idiomaOCR": info_ocr["idioma"],
+            "nombreEsperado": nombre_esperado,
+            "palabrasNombre": palabras_nombre,
+            "palabrasEncontradasDetalle": palabras_encontradas,
+            "cedulaLimpia": cedula_limpia,
+            "numerosEncontrados": numeros_largos,
+            "mejorCoincidenciaCedula": mejor_coincidencia,
+            "tipoCoincidencia": tipo_coincidencia,
         }
+    }
+
+    return resultado
+
 
-        print("✅ Validación completada")
+def validar_cedula(fuente, cedula: str, nombre_conductor: str):
+    try:
+        print("🚀 Iniciando validación de cédula...")
+        fuente = preparar_fuente(fuente)
+
+        # === NIVELES BARATOS ===
+        # Número y nombres con la imagen reducida o solo las regiones; se acepta
+        # únicamente con coincidencia exacta de la cédula y el nombre encontrado
+        def evaluar(documento):
+            info = {"idioma": "spa", "confianza": None, "pases": 1}
+            resultado = _comparar_cedula(documento.texto, info, cedula, nombre_conductor)
+            confirmado = (
+                resultado["coincidencias"]["nombre"]
+                and resultado["debug"]["tipoCoincidencia"] == "exacta"
+            )
+            return resultado, confirmado
+
+        # === OCR COMPLETO ===
+        def pagina():
+            texto_cedula, info_ocr = ocr_cedula(fuente)
+            print("✅ OCR completado")
+            print("📝 Longitud del texto:", len(texto_cedula))
+            print("🔍 OCR bruto:", texto_cedula[:200])
+            return _comparar_cedula(texto_cedula, info_ocr, cedula, nombre_conductor)
+
+        resultado, nivel = resolver_por_niveles(fuente, "cedula", evaluar, pagina)
+        resultado["metricas"]["nivelOCR"] = nivel
+        print(f"✅ Validación completada (nivel {nivel})")
         return resultado
 
     except Exception as e:
@@ -1,9 +1,16 @@
 # validators/eps_validator.py
 import re
-import pytesseract
-from PIL import Image
-from datetime import datetime
-from fuzzywuzzy import fuzz, process
+from rapidfuzz import fuzz
+from utils.niveles import resolver_por_niveles
+from utils.documento_ocr import leer_documento, normalizar_token
+from utils.ocr import preparar_fuente
+from utils.coincidencias import tokenizar, mejor_ventana
+from utils.extraccion import extraer, PATRON_CEDULA
+
+# "Señor(a)" queda como "senora" al normalizar el token
+ANCLAS_NOMBRE = ("senor", "senora", "sr", "sra")
+_SIMBOLOS = re.compile(r"[^a-z0-9\s]")
+_ESPACIOS = re.compile(r"\s+")
 
 def normalize_text(s: str) -> str:
     if not s:
@@ -17,64 +24,79 @@ def normalize_text(s: str) -> str:
 def limpiar_digitos(s: str) -> str:
     return re.sub(r"\D", "", s or "")
 
-def validar_eps(file_path: str, nombre_esperado: str, cedula_esperada: str):
-    # --- OCR
-    texto_eps = pytesseract.image_to_string(Image.open(file_path), lang="spa")
-    texto_eps = texto_eps.replace("\u00A0", " ")
+def validar_eps(fuente, nombre_esperado: str, cedula_esperada: str):
+    fuente = preparar_fuente(fuente)
+
+    # --- OCR por niveles: se sube de nivel si falta el nombre, la cédula o la fecha
+    def evaluar(documento):
+        resultado = resultado_eps(documento, nombre_esperado, cedula_esperada)
+        confirmado = (
+            resultado["nombreEncontrado"]
+            and resultado["cedulaEncontrada"]
+            and bool(resultado["fechaDetectada"])
+        )
+        return resultado, confirmado
+
+    resultado, nivel = resolver_por_niveles(
+        fuente, None, evaluar,
+        lambda: resultado_eps(leer_documento(fuente, lang="spa"), nombre_esperado, cedula_esperada),
+    )
+    resultado["nivelOCR"] = nivel
+    return resultado
+
+def resultado_eps(documento, nombre_esperado: str, cedula_esperada: str):
+    texto_eps = documento.texto.replace("\u00A0", " ")
     texto_plano = normalize_text(texto_eps)
-    texto_for_extraction = re.sub(r"[^a-z0-9\s]", " ", texto_plano)
-    texto_for_extraction = re.sub(r"\s+", " ", texto_for_extraction).strip()
+    texto_for_extraction = _SIMBOLOS.sub(" ", texto_plano)
+    texto_for_extraction = _ESPACIOS.sub(" ", texto_for_extraction).strip()
+    # Números, fechas y palabras clave en una sola pasada
+    extraccion = extraer(texto_eps)
 
     # --- Normalización de entradas
     nombre_norm = normalize_text(nombre_esperado)
     cedula_clean = limpiar_digitos(cedula_esperada)
 
-    # ---------- 1) Extraer nombre (anchor "señor")
+    # ---------- 1) Extraer nombre: las palabras que siguen al ancla "señor" (aunque cambien de renglón)
     nombre_candidato = None
-    anchor_match = re.search(r"\b(?:senor|senora|senor\(a\)|sr|sra)\b", texto_for_extraction)
-    if anchor_match:
-        idx = anchor_match.end()
-        after = texto_for_extraction[idx:].strip()
-        stop_words = {"identificado", "identificada", "identificad", "identificacion",
-                      "con", "cc", "cedula", "numero", "c", "documento"}
-        skip_words = {"el","la","del","de","los","las","y","en","por","a","al"}
-        tokens = after.split()
-        name_tokens = []
-        for t in tokens:
-            if t in stop_words:
-                break
-            if t in skip_words or len(t) <= 1:
-                continue
-            name_tokens.append(t)
-            if len(name_tokens) >= 5:
-                break
-        if name_tokens:
-            nombre_candidato = " ".join(name_tokens)
-
-    # ---------- 2) Sliding windows
-    best_candidate = None
-    best_rating = 0
-    if not nombre_candidato and nombre_norm:
-        words = texto_for_extraction.split()
-        windows = [" ".join(words[i:i+size]) for i in range(len(words)) for size in range(2,6) if i+size <= len(words)]
-        if windows:
-            best_candidate, best_rating = process.extractOne(nombre_norm, windows, scorer=fuzz.ratio)
+    palabras_nombre = []
+    stop_words = {"identificado", "identificada", "identificad", "identificacion",
+                  "con", "cc", "cedula", "numero", "c", "documento"}
+    skip_words = {"el","la","del","de","los","las","y","en","por","a","al"}
+    for palabra in documento.despues_de(ANCLAS_NOMBRE, max_palabras=12):
+        t = palabra.token
+        if t in stop_words:
+            break
+        if t in skip_words or len(t) <= 1:
+            continue
+        palabras_nombre.append(palabra)
+        if len(palabras_nombre) >= 5:
+            break
+    if palabras_nombre:
+        nombre_candidato = " ".join(p.token for p in palabras_nombre)
+    # Los tokens del documento no tienen tildes: el nombre esperado se compara igual
+    nombre_tokens = " ".join(normalizar_token(t) for t in nombre_norm.split())
 
-    # ---------- 3) Decidir si nombre coincide
+    # ---------- 2) Decidir con el candidato del ancla
     nombre_encontrado = False
     similitud_nombre = 0
     if nombre_candidato:
-        similitud_nombre = fuzz.ratio(nombre_norm, nombre_candidato) / 100
-        nombre_encontrado = similitud_nombre > 0.5 or all(tok in nombre_candidato for tok in nombre_norm.split())
-    elif best_candidate:
-        similitud_nombre = best_rating / 100
-        nombre_encontrado = similitud_nombre > 0.55 or all(tok in best_candidate for tok in nombre_norm.split())
-    else:
-        nombre_encontrado = all(tok in texto_for_extraction for tok in nombre_norm.split())
+        similitud_nombre = fuzz.ratio(nombre_tokens, nombre_candidato) / 100
+        nombre_encontrado = similitud_nombre > 0.5 or all(tok in nombre_candidato for tok in nombre_tokens.split())
+
+    # ---------- 3) Sliding windows si el ancla no dio el nombre
+    if not nombre_encontrado and nombre_norm:
+        words = tokenizar(texto_for_extraction)
+        if len(words) >= 2:
+            best_candidate, best_rating = mejor_ventana(nombre_norm, words, corte=0.55)
+            if best_candidate:
+                palabras_nombre = []  # la confianza solo aplica al candidato del ancla
+                similitud_nombre = best_rating
+                nombre_encontrado = similitud_nombre > 0.55 or all(tok in best_candidate for tok in nombre_norm.split())
+        elif not nombre_candidato:
+            nombre_encontrado = all(tok in texto_for_extraction for tok in nombre_norm.split())
 
     # ---------- 4) Validar cédula
-    posibles_cedulas = re.findall(r"(\d{1,3}(?:\.\d{3}){1,2}|\d{7,12})", texto_eps)
-    posibles_cedulas = [limpiar_digitos(c) for c in posibles_cedulas if c]
+    posibles_cedulas = extraccion.candidatos(PATRON_CEDULA)
     cedula_encontrada = False
     for c in posibles_cedulas:
         if c == cedula_clean:
@@ -86,37 +108,24 @@ def validar_eps(file_path: str, nombre_esperado: str, cedula_esperada: str):
                 cedula_encontrada = True
                 break
 
-    # ---------- 5) Validar fecha expedición (solo ejemplo simplificado aquí)
-    fecha_detectada = None
-    fecha_valida = False
-    diff_dias = None
-    regex_fecha = re.search(r"(\d{1,2})[\/\-](\d{1,2})[\/\-](\d{2,4})", texto_eps)
-    if regex_fecha:
-        d, m, y = regex_fecha.groups()
-        y = "20" + y if len(y) == 2 else y
-        try:
-            fecha_doc = datetime(int(y), int(m), int(d))
-            hoy = datetime.today().replace(hour=0, minute=0, second=0, microsecond=0)
-            diff_dias = (hoy - fecha_doc).days
-            fecha_valida = 0 <= diff_dias <= 30
-            fecha_detectada = fecha_doc.strftime("%d/%m/%Y")
-        except Exception:
-            pass
+    # ---------- 5) Validar fecha expedición
+    fecha_detectada, fecha_valida, diff_dias = extraccion.fecha_expedicion()
 
     # ---------- 6) Palabras clave
     palabras_clave = {
-        "afiliado": "afiliado" in texto_plano,
-        "activo": "activo" in texto_plano,
-        "vinculado": "vinculado" in texto_plano,
-        "habilitado": "habilitado" in texto_plano,
-        "vigente": "vigente" in texto_plano,
+        "afiliado": extraccion.tiene("afiliado"),
+        "activo": extraccion.tiene("activo"),
+        "vinculado": extraccion.tiene("vinculado"),
+        "habilitado": extraccion.tiene("habilitado"),
+        "vigente": extraccion.tiene("vigente"),
     }
-    estado_match = re.search(r"estado\s+de\s+la\s+afiliaci[oó]n[:\s]+([a-z]+)", texto_eps, re.I)
-    estado_afiliacion = estado_match.group(1).upper() if estado_match else None
+    estado_afiliacion = extraccion.estado_afiliacion()
 
     return {
         "nombreEncontrado": nombre_encontrado,
         "similitudNombre": similitud_nombre,
+        # Confianza media de tesseract en las palabras del nombre (si salió del ancla)
+        "confianzaNombre": documento.confianza(palabras_nombre),
         "cedulaEncontrada": cedula_encontrada,
         "fechaDetectada": fecha_detectada,
         "fechaValida": fecha_valida,